@@ -0,0 +1,165 @@
+# Fyre-OS IMA-ADPCM decoder
+# Sound assets get a standard IMA-ADPCM WAV copy (format tag 0x11, 4 bits
+# per sample) named <sound>.adp next to the PCM <sound>.wav: a quarter of
+# the 16-bit PCM size, so a quarter of the SD reads. Make them on a PC
+# with tools/wav2adpcm.py; audiosvc.py streams them block by block:
+#   samples = adpcm.decode_block(block, pcm, channels)
+# Each block starts with a 4-byte header per channel (int16 first sample,
+# u8 step index, u8 0), then groups of 4 bytes per channel (8 nibbles,
+# low nibble first). Output is interleaved little-endian int16.
+# The decoder is compiled with viper on the device; the plain Python
+# version is the reference and the fallback.
+
+import array
+
+WAVE_FORMAT_IMA_ADPCM = 0x11
+ADPCM_EXT = ".adp"
+
+STEPS = array.array("H", (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37,
+    41, 45, 50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173,
+    190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658,
+    724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066,
+    2272, 2499, 2749, 3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484,
+    7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899, 15289, 16818,
+    18500, 20350, 22385, 24623, 27086, 29794, 32767,
+))
+
+# Step index change per nibble (sign bit ignored), stored +1 so it fits u8
+ADJUST = bytes((0, 0, 0, 0, 3, 5, 7, 9, 0, 0, 0, 0, 3, 5, 7, 9))
+
+def samples_per_block(block_align, channels):
+    return 1 + 8 * ((block_align - 4 * channels) // (4 * channels))
+
+def pcm_bytes(block_align, channels):
+    """Decoded size of one full block."""
+    return samples_per_block(block_align, channels) * channels * 2
+
+# ------------------------------
+# REFERENCE DECODER
+# ------------------------------
+def _decode_py(src, nbytes, dst, channels):
+    groups = (nbytes - 4 * channels) // (4 * channels)
+    for ch in range(channels):
+        h = ch * 4
+        pred = src[h] | (src[h + 1] << 8)
+        if pred >= 32768:
+            pred -= 65536
+        index = min(src[h + 2], 88)
+        dst[ch] = pred
+        out = channels + ch
+        pos = 4 * channels + 4 * ch
+        for _ in range(groups):
+            for k in range(4):
+                byte = src[pos + k]
+                for nib in (byte & 15, byte >> 4):
+                    step = STEPS[index]
+                    diff = step >> 3
+                    if nib & 4:
+                        diff += step
+                    if nib & 2:
+                        diff += step >> 1
+                    if nib & 1:
+                        diff += step >> 2
+                    pred = pred - diff if nib & 8 else pred + diff
+                    if pred > 32767:
+                        pred = 32767
+                    elif pred < -32768:
+                        pred = -32768
+                    index += ADJUST[nib] - 1
+                    if index < 0:
+                        index = 0
+                    elif index > 88:
+                        index = 88
+                    dst[out] = pred
+                    out += channels
+            pos += 4 * channels
+    return 1 + 8 * groups
+
+_decode = _decode_py
+
+try:
+    import micropython
+
+    @micropython.viper
+    def _decode_viper(src: ptr8, nbytes: int, dst: ptr16, channels: int, steps: ptr16, adjust: ptr8) -> int:
+        groups = (nbytes - 4 * channels) // (4 * channels)
+        ch = 0
+        while ch < channels:
+            h = ch * 4
+            pred = src[h] | (src[h + 1] << 8)
+            if pred >= 32768:
+                pred -= 65536
+            index = src[h + 2]
+            if index > 88:
+                index = 88
+            dst[ch] = pred
+            out = channels + ch
+            pos = 4 * channels + 4 * ch
+            g = 0
+            while g < groups:
+                k = 0
+                while k < 8:
+                    nib = (src[pos + (k >> 1)] >> ((k & 1) << 2)) & 15
+                    step = steps[index]
+                    diff = step >> 3
+                    if nib & 4:
+                        diff += step
+                    if nib & 2:
+                        diff += step >> 1
+                    if nib & 1:
+                        diff += step >> 2
+                    if nib & 8:
+                        pred -= diff
+                    else:
+                        pred += diff
+                    if pred > 32767:
+                        pred = 32767
+                    elif pred < -32768:
+                        pred = -32768
+                    index += adjust[nib] - 1
+                    if index < 0:
+                        index = 0
+                    elif index > 88:
+                        index = 88
+                    dst[out] = pred
+                    out += channels
+                    k += 1
+                pos += 4 * channels
+                g += 1
+            ch += 1
+        return 1 + 8 * groups
+
+    def _decode_native(src, nbytes, dst, channels):
+        return _decode_viper(src, nbytes, dst, channels, STEPS, ADJUST)
+
+    _decode = _decode_native
+except:
+    pass
+
+# ------------------------------
+# API
+# ------------------------------
+def decode_block(block, pcm, channels, nbytes=None):
+    """Decode one block into pcm (bytearray, >= pcm_bytes). Returns samples per channel."""
+    if nbytes is None:
+        nbytes = len(block)
+    if nbytes < 4 * channels:
+        return 0
+    if _decode is _decode_py:
+        # The reference decoder indexes int16 values, not bytes
+        out = array.array("h", bytes(len(pcm)))
+        n = _decode_py(block, nbytes, out, channels)
+        pcm[:n * channels * 2] = bytes(out)[:n * channels * 2]
+        return n
+    return _decode(block, nbytes, pcm, channels)
+
+def decode(data, block_align, channels):
+    """Decode a whole ADPCM data chunk to 16-bit PCM bytes."""
+    out = bytearray()
+    pcm = bytearray(pcm_bytes(block_align, channels))
+    for pos in range(0, len(data), block_align):
+        block = data[pos:pos + block_align]
+        n = decode_block(block, pcm, channels)
+        out += pcm[:n * channels * 2]
+    return bytes(out)
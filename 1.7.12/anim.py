@@ -0,0 +1,124 @@
+# Fyre-OS animation engine
+# Time-based tweens driven at a fixed frame budget:
+#   animator = anim.Animator(fps=30)
+#   scroll = animator.tween(0)
+#   scroll.to(120, 200)                 # 200 ms, eased
+#   while ...:
+#       if animator.begin_frame():
+#           draw(scroll.value())
+#           animator.end_frame()
+#       time.sleep_ms(animator.ms_to_next_frame(50))
+# Values are computed from the clock, not from the number of frames
+# drawn, so a slow frame is simply skipped and the tween still ends on
+# time.
+
+import time
+
+# ------------------------------
+# EASING
+# ------------------------------
+def linear(t):
+    return t
+
+def ease_out_quad(t):
+    return t * (2 - t)
+
+def ease_out_cubic(t):
+    t -= 1
+    return t * t * t + 1
+
+def ease_in_out_cubic(t):
+    if t < 0.5:
+        return 4 * t * t * t
+    t = 2 * t - 2
+    return 0.5 * t * t * t + 1
+
+# ------------------------------
+# TWEEN
+# ------------------------------
+class Tween:
+    def __init__(self, value=0, duration_ms=200, ease=ease_out_cubic):
+        self.start = value
+        self.target = value
+        self.duration_ms = duration_ms
+        self.ease = ease
+        self.t0 = time.ticks_ms()
+        self.running = False
+
+    def to(self, target, duration_ms=None):
+        """Animate from the current value to target. Re-targeting mid-flight starts from where it is now."""
+        if target == self.target and self.running:
+            return
+        self.start = self.value()
+        self.target = target
+        if duration_ms is not None:
+            self.duration_ms = duration_ms
+        self.t0 = time.ticks_ms()
+        self.running = self.start != target and self.duration_ms > 0
+        if not self.running:
+            self.start = target
+
+    def jump(self, value):
+        self.start = value
+        self.target = value
+        self.running = False
+
+    def value(self):
+        if not self.running:
+            return self.target
+        t = time.ticks_diff(time.ticks_ms(), self.t0) / self.duration_ms
+        if t >= 1:
+            self.running = False
+            return self.target
+        return self.start + (self.target - self.start) * self.ease(t)
+
+# ------------------------------
+# ANIMATOR
+# ------------------------------
+class Animator:
+    def __init__(self, fps=30):
+        self.frame_ms = 1000 // fps
+        self.tweens = []
+        self.last_frame = time.ticks_ms()
+        self.frame_start = self.last_frame
+        self.frames = 0
+        self.skipped = 0
+        self.overruns = 0
+
+    def tween(self, value=0, duration_ms=200, ease=ease_out_cubic):
+        tw = Tween(value, duration_ms, ease)
+        self.tweens.append(tw)
+        return tw
+
+    def active(self):
+        for tw in self.tweens:
+            if tw.running:
+                return True
+        return False
+
+    def begin_frame(self):
+        """True when a tween is running and the frame budget has elapsed."""
+        if not self.active():
+            return False
+        now = time.ticks_ms()
+        elapsed = time.ticks_diff(now, self.last_frame)
+        if elapsed < self.frame_ms:
+            return False
+        if elapsed >= 2 * self.frame_ms and self.frames:
+            # the previous frame overran: those frames are dropped, not queued
+            self.skipped += elapsed // self.frame_ms - 1
+        self.last_frame = now
+        self.frame_start = now
+        self.frames += 1
+        return True
+
+    def end_frame(self):
+        if time.ticks_diff(time.ticks_ms(), self.frame_start) > self.frame_ms:
+            self.overruns += 1
+
+    def ms_to_next_frame(self, idle_ms):
+        """How long a main loop may sleep: until the next frame, or idle_ms when nothing animates."""
+        if not self.active():
+            return idle_ms
+        wait = self.frame_ms - time.ticks_diff(time.ticks_ms(), self.last_frame)
+        return max(0, min(wait, idle_ms))
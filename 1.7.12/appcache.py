@@ -0,0 +1,111 @@
+# Fyre-OS app code cache
+# Keeps compiled code objects for apps so they are not re-parsed on
+# every boot/launch. Cache files live in a __pycache__ folder next to
+# the app and are keyed by the source mtime + size:
+#   /sd/apps/LoRaPass.py -> /sd/apps/__pycache__/LoRaPass.fyc
+# Nothing is kept in RAM: an app's code is freed with the app when it
+# exits. Firmware without the marshal module compiles every launch.
+
+import os
+try:
+    import marshal
+except:
+    marshal = None
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+CACHE_DIR_NAME = "__pycache__"
+CACHE_EXT = ".fyc"
+CACHE_MAGIC = b"FYC1"
+
+# ------------------------------
+# STATE
+# ------------------------------
+hits = 0
+misses = 0
+last_status = ""  # "disk", "compiled" or "" before first load
+
+# ------------------------------
+# UTIL
+# ------------------------------
+def source_key(path):
+    st = os.stat(path)
+    return "{} {}".format(st[8], st[6])
+
+def cache_path(path):
+    slash = path.rfind("/")
+    folder = path[:slash] if slash >= 0 else "."
+    name = path[slash + 1:]
+    if name.endswith(".py"):
+        name = name[:-3]
+    return folder + "/" + CACHE_DIR_NAME + "/" + name + CACHE_EXT
+
+def _read_disk(path, key):
+    if marshal is None:
+        return None
+    try:
+        with open(cache_path(path), "rb") as f:
+            header = f.readline()
+            if header != CACHE_MAGIC + b" " + key.encode() + b"\n":
+                return None  # stale: source changed since it was cached
+            return marshal.loads(f.read())
+    except:
+        return None
+
+def _write_disk(path, key, code):
+    if marshal is None:
+        return
+    target = cache_path(path)
+    tmp = target + ".tmp"
+    try:
+        try:
+            os.mkdir(target[:target.rfind("/")])
+        except:
+            pass
+        with open(tmp, "wb") as f:
+            f.write(CACHE_MAGIC + b" " + key.encode() + b"\n")
+            f.write(marshal.dumps(code))
+        try:
+            os.remove(target)
+        except:
+            pass
+        os.rename(tmp, target)
+    except Exception as e:
+        print("App cache write failed:", e)
+        try:
+            os.remove(tmp)
+        except:
+            pass
+
+# ------------------------------
+# API
+# ------------------------------
+def load_code(path):
+    """Return the compiled code for an app, compiling from source only when the cache is stale."""
+    global hits, misses, last_status
+    key = source_key(path)
+
+    code = _read_disk(path, key)
+    if code is not None:
+        hits += 1
+        last_status = "disk"
+        return code
+
+    misses += 1
+    last_status = "compiled"
+    with open(path, "r") as f:
+        source = f.read()
+    code = compile(source, path, "exec")
+    source = None
+    _write_disk(path, key, code)
+    return code
+
+def run(path, namespace):
+    exec(load_code(path), namespace)
+
+def invalidate(path):
+    try:
+        os.remove(cache_path(path))
+    except:
+        pass
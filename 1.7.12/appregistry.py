@@ -0,0 +1,221 @@
+# Fyre-OS app registry
+# One small document (/sd/app_registry.json, through store) describing
+# every installed app, so the launcher starts without scanning folders:
+#   appregistry.refresh()                # cheap when nothing changed
+#   for app in appregistry.apps("usage"):
+#       app["name"], app["icon"], app["launches"]
+#   appregistry.record_launch("LoRaPass")
+# Each entry: name, file, icon, sound, size, mtime, hash (of the
+# source), opened, launches, last_launch, and heap_used/heap_leaked of
+# the last run once it has exited. refresh() compares the apps
+# folder mtime with the one recorded; only when it moved is the folder
+# listed, and only new or changed files are stat'ed and hashed. FAT may
+# not stamp folders, so writers call invalidate() after adding or
+# removing apps.
+# The registry lives outside the apps folder so saving it does not
+# change the folder mtime it is compared against.
+
+import os
+import time
+import store
+import assetindex
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+APPS_DIR = "/sd/apps"
+ASSETS_DIR = "/sd/assets"
+REGISTRY_NS = "app_registry"
+HASH_CHUNK = 512
+
+# ------------------------------
+# STATE
+# ------------------------------
+_checked = False   # folder compared with the registry this session
+scans = 0          # folder listings; the launcher reloads its list when this moves
+hashed = 0         # files hashed
+
+# ------------------------------
+# UTIL
+# ------------------------------
+def _doc():
+    doc = store.load(REGISTRY_NS, None)
+    if not isinstance(doc, dict) or "apps" not in doc:
+        doc = {"dir_mtime": None, "apps": {}}
+        store.save(REGISTRY_NS, doc)
+    return doc
+
+def _dir_mtime():
+    try:
+        return os.stat(APPS_DIR)[8]
+    except:
+        return None
+
+def _list_sources():
+    """The .py files in the apps folder."""
+    found = set()
+    try:
+        for item in os.ilistdir(APPS_DIR):
+            if item[0].endswith(".py") and not item[1] & 0x4000:
+                found.add(item[0])
+    except AttributeError:
+        for name in os.listdir(APPS_DIR):
+            if name.endswith(".py"):
+                found.add(name)
+    return found
+
+def source_hash(path):
+    """Short hex digest of a file, or None without hashlib."""
+    global hashed
+    try:
+        import hashlib
+        import binascii
+    except ImportError:
+        return None
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    hashed += 1
+    return binascii.hexlify(h.digest())[:16].decode()
+
+def _asset(name, ext):
+    file = name + ext
+    return file if assetindex.exists(ASSETS_DIR + "/" + file) else None
+
+def _new_entry(name, file, opened):
+    return {
+        "name": name,
+        "file": file,
+        "icon": None,
+        "sound": None,
+        "size": None,
+        "mtime": None,
+        "hash": None,
+        "opened": opened,
+        "launches": 0,
+        "last_launch": 0,
+    }
+
+# ------------------------------
+# SCAN
+# ------------------------------
+def _rescan(doc):
+    global scans
+    scans += 1
+    try:
+        os.stat(APPS_DIR)
+    except:
+        os.mkdir(APPS_DIR)
+    sources = _list_sources()
+    apps = doc["apps"]
+    # Apps opened before the registry existed keep their icon
+    opened_before = store.load("opened_apps", []) if not apps else []
+    changed = False
+    for name in list(apps):
+        if apps[name]["file"] not in sources:
+            del apps[name]
+            changed = True
+    for file in sources:
+        name = file[:-3]
+        entry = apps.get(name)
+        if entry is None:
+            entry = apps[name] = _new_entry(name, file, name in opened_before)
+        # Size and mtime both: an edit can keep the size the same
+        path = APPS_DIR + "/" + file
+        try:
+            st = os.stat(path)
+        except:
+            continue
+        if entry["size"] == st[6] and entry["mtime"] == st[8] and entry["hash"] is not None:
+            continue
+        entry["size"] = st[6]
+        entry["mtime"] = st[8]
+        try:
+            entry["hash"] = source_hash(path)
+        except Exception as e:
+            print("App hash failed:", file, e)
+        changed = True
+    # Icons and sounds come from the in-memory asset index: always current
+    for entry in apps.values():
+        icon = _asset(entry["name"], ".png")
+        sound = _asset(entry["name"], ".wav")
+        if icon != entry["icon"] or sound != entry["sound"]:
+            entry["icon"] = icon
+            entry["sound"] = sound
+            changed = True
+    mtime = _dir_mtime()
+    if mtime != doc["dir_mtime"]:
+        doc["dir_mtime"] = mtime
+        changed = True
+    if changed:
+        store.touch(REGISTRY_NS)
+
+# ------------------------------
+# API
+# ------------------------------
+def refresh(force=False):
+    """Bring the registry in line with the apps folder. Checks once per session unless forced."""
+    global _checked
+    doc = _doc()
+    if _checked and not force:
+        return doc
+    _checked = True
+    mtime = _dir_mtime()
+    if force or not mtime or mtime != doc["dir_mtime"] or not doc["apps"]:
+        _rescan(doc)
+    return doc
+
+def invalidate():
+    """Call after installing, updating or deleting apps: the next refresh() rescans."""
+    global _checked
+    _checked = False
+    _doc()["dir_mtime"] = None
+    store.touch(REGISTRY_NS)
+
+def apps(order="name"):
+    """Registry entries sorted by "name", "usage" (launch count) or "recent"."""
+    entries = list(refresh()["apps"].values())
+    if order == "usage":
+        entries.sort(key=lambda e: (-e["launches"], e["name"].lower()))
+    elif order == "recent":
+        entries.sort(key=lambda e: (-e["last_launch"], e["name"].lower()))
+    else:
+        entries.sort(key=lambda e: e["name"].lower())
+    return entries
+
+def get(name):
+    return refresh()["apps"].get(name)
+
+def find(prefix):
+    """Names of apps starting with prefix (case-insensitive)."""
+    prefix = prefix.lower()
+    return [n for n in refresh()["apps"] if n.lower().startswith(prefix)]
+
+def path_of(name):
+    entry = get(name)
+    return APPS_DIR + "/" + entry["file"] if entry else None
+
+def record_launch(name):
+    """Count a launch. Returns True the first time the app is opened."""
+    entry = get(name)
+    if entry is None:
+        return False
+    first = not entry["opened"]
+    entry["opened"] = True
+    entry["launches"] += 1
+    entry["last_launch"] = time.time()
+    store.touch(REGISTRY_NS)
+    return first
+
+def record_heap(name, report):
+    """Keep the heap figures of an app's last run (appruntime report) with its entry."""
+    entry = get(name)
+    if entry is None or not report:
+        return
+    entry["heap_used"] = report.get("used")
+    entry["heap_leaked"] = report.get("leaked")
+    store.touch(REGISTRY_NS)
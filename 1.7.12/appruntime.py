@@ -0,0 +1,264 @@
+# Fyre-OS app runtime
+# Runs an app in a fresh namespace and cleans up after it:
+#   report = appruntime.run("/sd/apps/LoRaPass.py", {"kb": kb})
+# While the app runs, the _thread and machine modules it imports are
+# thin wrappers that remember the threads and Timers it starts; with
+# the performance HUD on, its time.sleep*() calls drive perfhud.py. When
+# the app exits (returns, raises SystemExit/app_exit(), or crashes):
+#   - its Timers are deinit()ed
+#   - its threads are stopped: the sleep/wait functions they call raise
+#     AppExit, and after STOP_WAIT_MS the namespace is cleared anyway
+#   - gc.collect() runs and the heap before/after is recorded
+# report: name, ms, heap_before, heap_exit, heap_after, used, freed,
+# leaked, threads, timers, error.
+
+import gc
+import sys
+import time
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+STOP_WAIT_MS = 500
+LEAK_WARN_BYTES = 8 * 1024
+SLEEP_NAMES = ("wait", "wait_ms", "wait_us", "sleep", "sleep_ms", "sleep_us")
+
+# ------------------------------
+# STATE
+# ------------------------------
+_app = None      # AppContext of the running app
+history = {}     # app name -> report of its last run
+
+class AppExit(BaseException):
+    """Raised inside an app's leftover threads to end them (not an Exception, so 'except Exception' won't swallow it)."""
+    pass
+
+def heap_free():
+    try:
+        return gc.mem_free()
+    except:
+        return None
+
+def app_exit():
+    """For apps: leave and return to the launcher."""
+    raise SystemExit
+
+def _stopped(*args, **kwargs):
+    raise AppExit
+
+# ------------------------------
+# TRACKING
+# ------------------------------
+class AppContext:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.threads = []   # idents of running app threads
+        self.started = 0    # threads started in total
+        self.timers = []
+        self.stopping = False
+
+class _Wrapper:
+    """Stands in for a module: everything not overridden comes from the real one."""
+    def __init__(self, real):
+        self._real = real
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+class _ThreadModule(_Wrapper):
+    def __init__(self, real, ctx):
+        _Wrapper.__init__(self, real)
+        self._ctx = ctx
+
+    def start_new_thread(self, fn, args, kwargs=None):
+        self._ctx.started += 1
+        return self._real.start_new_thread(_thread_main, (self._ctx, fn, args, kwargs or {}))
+
+def _thread_main(ctx, fn, args, kwargs):
+    import _thread
+    ident = _thread.get_ident()
+    ctx.threads.append(ident)
+    try:
+        fn(*args, **kwargs)
+    except AppExit:
+        pass
+    except Exception as e:
+        if not ctx.stopping:
+            print("App thread failed:", ctx.name, e)
+    finally:
+        if ident in ctx.threads:
+            ctx.threads.remove(ident)
+
+class _TimerClass(_Wrapper):
+    def __init__(self, real, ctx):
+        _Wrapper.__init__(self, real)
+        self._ctx = ctx
+
+    def __call__(self, *args, **kwargs):
+        timer = self._real(*args, **kwargs)
+        self._ctx.timers.append(timer)
+        return timer
+
+class _MachineModule(_Wrapper):
+    def __init__(self, real, ctx):
+        _Wrapper.__init__(self, real)
+        self.Timer = _TimerClass(real.Timer, ctx)
+
+class _HudTime(_Wrapper):
+    """time module while the performance HUD is on: every sleep is a main-loop pass."""
+    def __init__(self, real, ctx):
+        _Wrapper.__init__(self, real)
+        import perfhud
+        self._hud = perfhud
+
+    def sleep_ms(self, ms):
+        self._hud.loop(ms)
+        self._hud.tick()
+        self._real.sleep_ms(ms)
+
+    def sleep(self, s):
+        self.sleep_ms(int(s * 1000))
+
+class _StoppedTime(_Wrapper):
+    """time module for an app that has exited: its threads end at their next sleep."""
+    sleep = staticmethod(_stopped)
+    sleep_ms = staticmethod(_stopped)
+    sleep_us = staticmethod(_stopped)
+
+def _install(ctx):
+    """Swap the tracking wrappers into sys.modules; returns what to restore."""
+    saved = {}
+    wrappers = [("_thread", _ThreadModule), ("machine", _MachineModule)]
+    if _hud_on():
+        wrappers.append(("time", _HudTime))
+    for name, wrap in wrappers:
+        try:
+            real = __import__(name)
+        except ImportError:
+            continue
+        saved[name] = sys.modules.get(name)
+        sys.modules[name] = wrap(real, ctx)
+    return saved
+
+def _hud_on():
+    try:
+        import perfhud
+        return perfhud.enabled
+    except ImportError:
+        return False
+
+def _restart_hud():
+    # The launcher's loop timing doesn't carry over into the app or back
+    if _hud_on():
+        import perfhud
+        perfhud.restart()
+
+def _restore(saved):
+    for name, module in saved.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+
+# ------------------------------
+# TEARDOWN
+# ------------------------------
+def _stop_timers(ctx, namespace):
+    timers = list(ctx.timers)
+    try:
+        import machine
+        for value in namespace.values():
+            if isinstance(value, machine.Timer) and value not in timers:
+                timers.append(value)
+    except:
+        pass
+    for timer in timers:
+        try:
+            timer.deinit()
+        except:
+            pass
+    return len(timers)
+
+def _stop_threads(ctx, namespace):
+    # Leftover threads look these up in the app's globals on every call
+    for name in SLEEP_NAMES:
+        if name in namespace and callable(namespace[name]):
+            namespace[name] = _stopped
+    if "time" in namespace:
+        namespace["time"] = _StoppedTime(namespace["time"])
+    start = time.ticks_ms()
+    while ctx.threads and time.ticks_diff(time.ticks_ms(), start) < STOP_WAIT_MS:
+        time.sleep_ms(10)
+    return len(ctx.threads)
+
+# ------------------------------
+# API
+# ------------------------------
+def load(path):
+    try:
+        import appcache
+        return appcache.load_code(path)
+    except ImportError:
+        with open(path, "r") as f:
+            return f.read()
+
+def current():
+    """Name of the app running now, or None in the launcher."""
+    return _app.name if _app else None
+
+def run(path, base=None, name=None):
+    """Run the app at path in its own namespace; returns its report once it has exited."""
+    global _app
+    if name is None:
+        name = path[path.rfind("/") + 1:]
+        if name.endswith(".py"):
+            name = name[:-3]
+    namespace = {"__name__": "__main__", "__file__": path, "app_exit": app_exit}
+    if base:
+        namespace.update(base)
+    ctx = AppContext(name, path)
+    report = {"name": name, "error": None}
+    gc.collect()
+    report["heap_before"] = heap_free()
+    start = time.ticks_ms()
+    _app = ctx
+    _restart_hud()
+    saved = _install(ctx)
+    try:
+        exec(load(path), namespace)
+    except (SystemExit, KeyboardInterrupt, AppExit):
+        pass
+    except Exception as e:
+        print("App crashed:", name, e)
+        report["error"] = str(e)
+    finally:
+        _restore(saved)
+        _app = None
+        _restart_hud()
+    report["ms"] = time.ticks_diff(time.ticks_ms(), start)
+    report["heap_exit"] = heap_free()
+
+    ctx.stopping = True
+    report["timers"] = _stop_timers(ctx, namespace)
+    left = _stop_threads(ctx, namespace)
+    report["threads"] = ctx.started
+    if left:
+        print("App threads still running:", name, left)
+    # Whatever is left (widgets, buffers, callbacks' globals) goes with it
+    namespace.clear()
+    del namespace
+    gc.collect()
+    report["heap_after"] = heap_free()
+
+    before, at_exit, after = report["heap_before"], report["heap_exit"], report["heap_after"]
+    if before is not None and at_exit is not None and after is not None:
+        report["used"] = before - at_exit
+        report["freed"] = after - at_exit
+        report["leaked"] = before - after
+        if report["leaked"] > LEAK_WARN_BYTES:
+            print("App leaked:", name, report["leaked"], "bytes")
+    else:
+        report["used"] = report["freed"] = report["leaked"] = None
+    history[name] = report
+    return report
@@ -2,6 +2,8 @@ from m5stack import *
 from m5ui import *
 from uiflow import *
 import os
+import inputsvc
+import textcache
 
 # ------------------------------
 # UI Setup
@@ -64,28 +66,54 @@ def save_file():
 # ------------------------------
 keywords = ["def", "class", "import", "from", "for", "while", "if", "else", "elif", "return"]
 
+def word_color(word):
+    return KEYWORD_COLOR if word in keywords else STRING_COLOR if '"' in word or "'" in word else COMMENT_COLOR if word.startswith("#") else 0xFFFFFF
+
+# ------------------------------
+# Screen rows
+# Only rows whose text or cursor changed are repainted
+# ------------------------------
+max_lines = 16  # lines visible on screen
+editor_rows = textcache.Rows(0, 0, 15, max_lines)
+list_rows = textcache.Rows(0, 20, 15, max(1, len(py_files)))
+shown_view = None
+
+def show_view(view):
+    global shown_view
+    if shown_view != view:
+        lcd.clear()
+        editor_rows.invalidate()
+        list_rows.invalidate()
+        shown_view = view
+        return True
+    return False
+
 def draw_editor():
-    lcd.clear()
-    max_lines = 16  # lines visible on screen
-    for idx in range(scroll_y, min(scroll_y + max_lines, len(lines))):
-        line = lines[idx]
-        x = 0
-        for word in line.split(" "):
-            color = KEYWORD_COLOR if word in keywords else STRING_COLOR if '"' in word or "'" in word else COMMENT_COLOR if word.startswith("#") else 0xFFFFFF
-            lcd.print(word + " ", x, (idx - scroll_y) * 15, color)
-            x += 8 * (len(word)+1)
-    # Draw cursor
-    lcd.rect(cursor_x*8, (cursor_y-scroll_y)*15, 8, 15, CURSOR_COLOR)
+    show_view("editor")
+    visible = max(0, min(max_lines, len(lines) - scroll_y))
+    for row in range(visible):
+        idx = scroll_y + row
+        spans = tuple((word + " ", word_color(word)) for word in lines[idx].split(" "))
+        cursor = cursor_x if idx == cursor_y else None
+        if editor_rows.changed(row, (spans, cursor)):
+            x = 0
+            for text, color in spans:
+                textcache.draw(text, x, row * 15, color)
+                x += 8 * len(text)
+            if cursor is not None:
+                # Draw cursor
+                lcd.rect(cursor*8, row*15, 8, 15, CURSOR_COLOR)
+    editor_rows.trim(visible)
 
 # ------------------------------
 # File Selection
 # ------------------------------
 def display_file_list():
-    lcd.clear()
-    lcd.print("Python Files:", 0, 0, 0xFFFFFF)
+    if show_view("files"):
+        textcache.draw("Python Files:", 0, 0, 0xFFFFFF)
     for idx, f in enumerate(py_files):
         color = CURSOR_COLOR if idx == selected_file_idx else 0xFFFFFF
-        lcd.print(f"  {f}", 0, 20 + idx*15, color)
+        list_rows.text(idx, f"  {f}", color)
 
 # ------------------------------
 # Main Loop
@@ -93,7 +121,7 @@ def display_file_list():
 display_file_list()
 
 while True:
-    if btnA.isPressed():  # Up
+    if inputsvc.take("A"):  # Up
         if file_path:  # in editor
             cursor_y = max(0, cursor_y-1)
             if cursor_y < scroll_y:
@@ -102,9 +130,8 @@ while True:
         else:
             selected_file_idx = max(0, selected_file_idx-1)
             display_file_list()
-        wait_ms(150)
 
-    if btnB.isPressed():  # Enter / Select
+    if inputsvc.take("B") == inputsvc.PRESS:  # Enter / Select
         if not file_path:
             file_path = py_files[selected_file_idx]
             load_file(file_path)
@@ -112,9 +139,8 @@ while True:
             draw_editor()
         else:
             save_file()
-        wait_ms(150)
 
-    if btnC.isPressed():  # Down
+    if inputsvc.take("C"):  # Down
         if file_path:
             cursor_y = min(len(lines)-1, cursor_y+1)
             if cursor_y - scroll_y >= 16:
@@ -123,4 +149,3 @@ while True:
         else:
             selected_file_idx = min(len(py_files)-1, selected_file_idx+1)
             display_file_list()
-        wait_ms(150)
@@ -1,5 +1,7 @@
 import urequests as requests
 import os
+import assetindex
+import appregistry
 from m5stack import *
 from m5ui import *
 from uiflow import *
@@ -63,22 +65,21 @@ def download_file(download_url, filename):
         r.close()
         with open(local_path, "wb") as f:
             f.write(content)
+        # Keep the launcher's asset index in step with the new file
+        assetindex.added(local_path)
     except:
         print("Failed downloading:", filename)
 
 
 def update_if_exists(download_url, filename):
     local_path = resolve_path(filename)
-    if os.path.exists(local_path):
+    if assetindex.exists(local_path):
         download_file(download_url, filename)
 
 
 # ------------------- Detect app -------------------
 def app_exists(appname):
-    for f in os.listdir(APPS_DIR):
-        if f.lower().startswith(appname.lower()):
-            return True
-    return False
+    return bool(appregistry.find(appname))
 
 
 # ------------------- Delete app -------------------
@@ -102,6 +103,8 @@ def delete_app(appname):
                 os.remove(f"{ASSETS_DIR}/{f}")
             except:
                 pass
+    assetindex.rescan(ASSETS_DIR)
+    appregistry.invalidate()
 
     lcd.print("App deleted!", 5, 70, 0x00FF00)
     wait_ms(1000)
@@ -129,12 +132,13 @@ def get_icon_url_and_path(api_data):
 def show_icon_from_sd(url, local_path):
     try:
         # Download to assets if not exists
-        if not os.path.exists(local_path):
+        if not assetindex.exists(local_path):
             r = requests.get(url)
             data = r.content
             r.close()
             with open(local_path, "wb") as f:
                 f.write(data)
+            assetindex.added(local_path)
 
         # Display icon
         lcd.clear()
@@ -222,6 +226,7 @@ else:
     lcd.print("Installing app...", 5, 30)
 
 process_folder(GITHUB_API_ROOT + selected, not exists)
+appregistry.invalidate()
 
 lcd.clear()
 lcd.print("Process complete.", 5, 60, 0x00FF00)
@@ -3,14 +3,8 @@ from m5stack import *
 from m5ui import *
 from uiflow import *
 import espnow
-import ujson
 import _thread
-import os
-
-# ----------------------------------------------------
-# Files
-# ----------------------------------------------------
-NICKNAME_FILE = "/sd/espnow_nickname.json"
+import store
 
 # ----------------------------------------------------
 # Setup screen
@@ -23,17 +17,16 @@ lcd.text(10, 5, "ESP-NOW Chat", 0xFFFFFF)
 # ----------------------------------------------------
 # Load or set nickname
 # ----------------------------------------------------
-if os.path.exists(NICKNAME_FILE):
-    with open(NICKNAME_FILE, "r") as f:
-        nickname = ujson.load(f).get("nickname", "Me")
+if store.exists("espnow"):
+    nickname = store.get("espnow", "nickname", "Me")
 else:
     # First time: ask for nickname
     from uiflow import inputBox
     nickname = inputBox("Enter nickname:", "")
     if not nickname:
         nickname = "Me"
-    with open(NICKNAME_FILE, "w") as f:
-        ujson.dump({"nickname": nickname}, f)
+    store.put("espnow", "nickname", nickname)
+    store.flush("espnow")
 
 # ----------------------------------------------------
 # Chat display area
@@ -4,6 +4,9 @@ from uiflow import *
 import os
 import shutil
 import time
+import assetindex
+import inputsvc
+import textcache
 
 # ------------------------------
 # UI Setup
@@ -23,6 +26,10 @@ max_display = 16
 hidden_files = set()
 show_hidden = False
 last_dot_time = 0  # For double-tap detection
+row_flags = {}  # name -> " [R]"/" [H]" flags, worked out when first shown
+# Path line and list rows; only rows whose text changed are repainted
+header_row = textcache.Rows(0, 0, 20, 1)
+list_rows = textcache.Rows(0, 20, 15, max_display)
 
 # ------------------------------
 # Helpers
@@ -43,28 +50,36 @@ def list_dir(path):
         pass
     return entries
 
+def flags_of(name):
+    # Only for rows on screen, once each: not an os.access() per entry per listing
+    flags = row_flags.get(name)
+    if flags is None:
+        flags = ""
+        if not os.access(os.path.join(current_path, name), os.W_OK):
+            flags += " [R]"
+        if name.startswith("."):
+            flags += " [H]"
+        row_flags[name] = flags
+    return flags
+
 def draw_file_manager():
-    lcd.clear()
-    lcd.print("Path: " + current_path, 0, 0, 0xFFFFFF)
+    header_row.text(0, "Path: " + current_path, 0xFFFFFF)
     start = max(0, selected_idx - max_display + 1)
-    for i, (typ, name) in enumerate(files_list[start:start+max_display]):
-        y = 20 + i*15
+    shown = files_list[start:start+max_display]
+    for i, (typ, name) in enumerate(shown):
+        flags = flags_of(name)
         icon = ">" if typ=="folder" else "#"
         color = 0xFF0000 if i+start==selected_idx else 0xFFFFFF
         # Gray out if cut
         if cut_item and os.path.join(current_path, name) == cut_item:
             color = 0x888888
-        flags = ""
-        full_path = os.path.join(current_path, name)
-        if not os.access(full_path, os.W_OK):
-            flags += " [R]"
-        if name.startswith("."):
-            flags += " [H]"
-        lcd.print(f"{icon} {name}{flags}", 0, y, color)
+        list_rows.text(i, f"{icon} {name}{flags}", color)
+    list_rows.trim(len(shown))
 
 def refresh_files():
     global files_list
     files_list = list_dir(current_path)
+    row_flags.clear()
     draw_file_manager()
 
 def delete_file(path):
@@ -73,6 +88,7 @@ def delete_file(path):
             shutil.rmtree(path)
         else:
             os.remove(path)
+        assetindex.removed(path)
     except:
         pass
 
@@ -111,14 +127,12 @@ refresh_files()
 while True:
     wait_ms(50)
 
-    if btnA.isPressed():
+    if inputsvc.take("A"):
         selected_idx = max(0, selected_idx-1)
         draw_file_manager()
-        wait_ms(150)
-    if btnC.isPressed():
+    if inputsvc.take("C"):
         selected_idx = min(len(files_list)-1, selected_idx+1)
         draw_file_manager()
-        wait_ms(150)
 
     key = kb.getKey()
     if key:
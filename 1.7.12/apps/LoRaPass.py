@@ -1,6 +1,9 @@
 # LoRaPass - UIFlow2 app for Cardputer ADV + StampS3A
 # Features:
 # - Background LoRa TX/RX
+# - Compact binary beacons (legacy JSON beacons are still understood)
+# - Short presence beacons; profiles are requested only when unknown
+#   and cached by profile hash
 # - Profile editor (name, country, favorite place, future OS)
 # - Custom message box
 # - History of passes with RSSI + time
@@ -12,6 +15,8 @@ from m5stack import *
 from m5stack_ui import *
 from uiflow import *
 import time, os, ubinascii, json, math
+import store
+import powermgr
 import _thread
 from machine import Timer, Pin
 import ubinascii
@@ -32,23 +37,41 @@ except Exception as e:
 # CONFIG
 # ----------------------------
 APP_DIR = "/sd/lorapass"
-PROFILE_FILE = APP_DIR + "/profile.json"
-HISTORY_FILE = APP_DIR + "/history.json"
-COLLECT_FILE = APP_DIR + "/collected.json"
-COUNTRIES_FILE = APP_DIR + "/countries.json"
+# System store namespaces (files under APP_DIR)
+PROFILE_NS = "lorapass.profile"
+HISTORY_NS = "lorapass.history"
+COLLECT_NS = "lorapass.collected"
+COUNTRIES_NS = "lorapass.countries"
+PEERS_NS = "lorapass.peers"
 
 APP_NAME = "LoRaPass"
 TX_INTERVAL = 5         # seconds between beacon broadcasts
+PROFILE_EVERY = 12      # every Nth beacon carries the full profile (older LoRaPass)
 RX_POLL_MS = 200        # how often receiver thread checks LoRa
+RX_QUEUE_MAX = 32       # received packets waiting for the main loop
 FREQUENCY = 868000000   # 868 MHz
 SPREADING = 7
 BW = 125000
 
+# Beacon wire format (see make_packet); JSON beacons start with "{"
+PACKET_MAGIC = 0xA7
+PACKET_VERSION = 2      # full profile; the JSON beacons were version 1
+PACKET_BEACON = 3       # id hash + profile hash only
+PACKET_REQUEST = 4      # "send me your profile", addressed by id hash
+FIELD_MAX = 48          # bytes per text field on air
+COUNTRY_OTHER = 0xFF    # country not in COUNTRIES: sent as a trailing field
+PACKET_FIELDS = ("name", "favorite", "future_os", "message")
+
 # RSSI thresholds
 RSSI_CLOSE = -65
 RSSI_MED = -80
 RSSI_FAR = -95
 
+# Profile exchange
+PEER_CACHE_MAX = 200    # profiles kept, by profile hash
+REQUEST_RETRY_MS = 15000  # before asking the same peer again
+REPLY_MIN_MS = 2000     # one profile broadcast answers every request in this window
+
 # StampS3A NeoPixel pin (1 LED)
 NEOPIXEL_PIN = 21
 NEO_COUNT = 1
@@ -56,6 +79,7 @@ NEO_COUNT = 1
 # ----------------------------
 # Built-in country list (195+ names)
 # (This is a full list to be used for collection)
+# Beacons send the index into this list: only ever append to it
 # ----------------------------
 COUNTRIES = [
 "Afghanistan","Albania","Algeria","Andorra","Angola","Antigua and Barbuda","Argentina","Armenia","Aruba","Australia",
@@ -81,7 +105,8 @@ COUNTRIES = [
 ]
 
 # ----------------------------
-# Helpers: filesystem, JSON persistence
+# Helpers: filesystem
+# (JSON persistence goes through the system store)
 # ----------------------------
 def ensure_app_dir():
     try:
@@ -90,37 +115,24 @@ def ensure_app_dir():
     except Exception as e:
         print("mkdir failed:", e)
 
-def load_json(path, default):
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return default
-
-def save_json(path, data):
-    try:
-        with open(path, "w") as f:
-            json.dump(data, f)
-    except Exception as e:
-        print("save failed:", e)
-
 # ----------------------------
 # Persistence init
 # ----------------------------
 ensure_app_dir()
-profile = load_json(PROFILE_FILE, {
+profile = store.load(PROFILE_NS, {
     "name": "Anon",
     "country": "United States of America",
     "favorite": "Unknown Place",
     "future_os": "LoRaOS",
     "message": "Hello from LoRaPass!"
 })
-history = load_json(HISTORY_FILE, [])
-collected = load_json(COLLECT_FILE, [])
+history = store.load(HISTORY_NS, [])
+collected = store.load(COLLECT_NS, [])
+peer_profiles = store.load(PEERS_NS, {})   # profile hash (hex) -> profile fields
 
 # Ensure countries file exists to let user view full list
-if not os.path.exists(COUNTRIES_FILE):
-    save_json(COUNTRIES_FILE, COUNTRIES)
+if not store.exists(COUNTRIES_NS):
+    store.save(COUNTRIES_NS, COUNTRIES)
 
 # ----------------------------
 # NeoPixel (StampS3A) control
@@ -163,6 +175,16 @@ init_neopixel()
 lora_dev = None
 device_id = ubinascii.hexlify(machine.unique_id()).decode()
 
+def fnv32(data):
+    h = 0x811C9DC5
+    for b in data:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+# 4-byte id hash sent in binary beacons, and the id they show up under
+device_tag = "{:08x}".format(fnv32(device_id.encode()))
+device_hash = ubinascii.unhexlify(device_tag)
+
 def init_lora():
     global lora_dev
     if LoRa is None:
@@ -219,7 +241,7 @@ def edit_profile():
     global profile
     name = textBox("Name", profile.get("name",""))
     if name is None: return
-    country = choiceBox("Country", load_json(COUNTRIES_FILE, COUNTRIES), selected=profile.get("country"))
+    country = choiceBox("Country", store.load(COUNTRIES_NS, COUNTRIES), selected=profile.get("country"))
     if country is None: return
     favorite = textBox("Favorite place", profile.get("favorite",""))
     if favorite is None: return
@@ -233,7 +255,9 @@ def edit_profile():
     profile["favorite"] = favorite
     profile["future_os"] = future_os
     profile["message"] = message
-    save_json(PROFILE_FILE, profile)
+    profile_changed()
+    store.save(PROFILE_NS, profile)
+    store.flush(PROFILE_NS)
     toast("Profile saved")
     lbl_status.set_text("Status: Profile updated")
 
@@ -255,7 +279,7 @@ def show_history():
 def show_countries():
     # Show list with collected status
     lines = []
-    for c in load_json(COUNTRIES_FILE, COUNTRIES):
+    for c in store.load(COUNTRIES_NS, COUNTRIES):
         mark = "✅" if c in collected else "  "
         lines.append("{} {}".format(mark, c))
     textBox("Countries collected", "\n".join(lines))
@@ -267,7 +291,8 @@ def reset_collected():
     global collected
     if confirmBox("Reset collected?", "Erase collected countries?"):
         collected = []
-        save_json(COLLECT_FILE, collected)
+        store.save(COLLECT_NS, collected)
+        store.flush(COLLECT_NS)
         toast("Collected cleared")
         update_main_ui()
 
@@ -281,32 +306,135 @@ btn_reset.pressed(reset_collected)
 
 # ----------------------------
 # LoRaPass packet format
-# ----------------------------
+# magic, version, id hash (4), country index (1), then PACKET_FIELDS as
+# length-prefixed UTF-8 (plus the country itself if it has no index).
+# A typical profile is ~55 bytes instead of ~190 as JSON: about a third
+# of the airtime at SF7/125 kHz.
+# Most beacons are just magic, PACKET_BEACON, id hash, profile hash (10
+# bytes); the profile hash is fnv32 of the profile packet from byte 6 on,
+# so a receiver can check a profile against the beacons that named it.
+# A receiver that doesn't know the hash sends PACKET_REQUEST (magic,
+# type, its id hash, the peer's id hash) and the peer broadcasts its
+# profile packet, which everyone listening can cache.
+# ----------------------------
+def utf8_field(text):
+    b = str(text).encode()
+    if len(b) > FIELD_MAX:
+        # cut on a character boundary
+        i = FIELD_MAX
+        while i > 0 and (b[i] & 0xC0) == 0x80:
+            i -= 1
+        b = b[:i]
+    return bytes((len(b),)) + b
+
+profile_packet = None   # make_packet() cache, cleared when the profile changes
+profile_hash = None
+
+def profile_changed():
+    global profile_packet, profile_hash
+    profile_packet = profile_hash = None
+
 def make_packet():
-    pkt = {
-        "type": "lorapass",
-        "id": device_id,
-        "name": profile.get("name",""),
-        "country": profile.get("country",""),
-        "favorite": profile.get("favorite",""),
-        "future_os": profile.get("future_os",""),
-        "message": profile.get("message",""),
-        "version": 1
-    }
+    """The full profile packet (PACKET_VERSION)."""
+    global profile_packet, profile_hash
+    if profile_packet is not None:
+        return profile_packet
+    country = profile.get("country","")
+    try:
+        idx = COUNTRIES.index(country)
+    except ValueError:
+        idx = COUNTRY_OTHER
+    pkt = bytearray((PACKET_MAGIC, PACKET_VERSION))
+    pkt += device_hash
+    pkt.append(idx)
+    for key in PACKET_FIELDS:
+        pkt += utf8_field(profile.get(key,""))
+    if idx == COUNTRY_OTHER:
+        pkt += utf8_field(country)
+    profile_packet = bytes(pkt)
+    profile_hash = fnv32(profile_packet[6:]).to_bytes(4, "big")
+    return profile_packet
+
+def make_beacon():
+    if profile_hash is None:
+        make_packet()
+    return bytes((PACKET_MAGIC, PACKET_BEACON)) + device_hash + profile_hash
+
+def make_request(peer_tag):
+    return bytes((PACKET_MAGIC, PACKET_REQUEST)) + device_hash + ubinascii.unhexlify(peer_tag)
+
+def decode_json_packet(text):
     try:
-        return json.dumps(pkt)
+        pkt = json.loads(text)
     except:
-        return "{}"
+        return None
+    if not isinstance(pkt, dict):
+        return None
+    # Same key as the binary beacons from that device: its id hash
+    peer = pkt.get("id")
+    if isinstance(peer, str):
+        pkt["id"] = "{:08x}".format(fnv32(peer.encode()))
+    return pkt
+
+def decode_packet(raw):
+    """Binary or legacy JSON beacon -> dict with the JSON beacon's keys, or None."""
+    if isinstance(raw, str):
+        return decode_json_packet(raw)
+    if not raw:
+        return None
+    if raw[0] != PACKET_MAGIC:
+        try:
+            return decode_json_packet(raw.decode())
+        except:
+            return None
+    kind = raw[1] if len(raw) > 1 else None
+    if kind == PACKET_BEACON or kind == PACKET_REQUEST:
+        if len(raw) < 10:
+            return None
+        pkt = {"type": "beacon" if kind == PACKET_BEACON else "request",
+               "id": ubinascii.hexlify(raw[2:6]).decode()}
+        pkt["hash" if kind == PACKET_BEACON else "to"] = ubinascii.hexlify(raw[6:10]).decode()
+        return pkt
+    if len(raw) < 7 or kind != PACKET_VERSION:
+        return None
+    fields = []
+    pos = 7
+    try:
+        while pos < len(raw):
+            n = raw[pos]
+            fields.append(bytes(raw[pos+1:pos+1+n]).decode())
+            pos += 1 + n
+    except:
+        return None
+    while len(fields) <= len(PACKET_FIELDS):
+        fields.append("")
+    pkt = {"type": "lorapass", "id": ubinascii.hexlify(raw[2:6]).decode(), "version": PACKET_VERSION,
+           "hash": "{:08x}".format(fnv32(raw[6:]))}
+    for i, key in enumerate(PACKET_FIELDS):
+        pkt[key] = fields[i]
+    idx = raw[6]
+    pkt["country"] = COUNTRIES[idx] if idx < len(COUNTRIES) else fields[len(PACKET_FIELDS)]
+    return pkt
 
 # ----------------------------
 # Broadcast timer (uses Timer)
 # ----------------------------
 tx_timer = None
+tx_count = 0
+radio_lock = _thread.allocate_lock()
+
+def send_packet(data):
+    # the TX timer and the receiver thread (requests, replies) share the radio
+    with radio_lock:
+        lora_dev.send(data)
+
 def tx_callback(t):
+    global tx_count
     if lora_dev:
         try:
-            data = make_packet()
-            lora_dev.send(data)
+            data = make_packet() if tx_count % PROFILE_EVERY == 0 else make_beacon()
+            tx_count += 1
+            send_packet(data)
             # update status briefly
             lbl_status.set_text("Status: Beacon sent")
         except Exception as e:
@@ -336,16 +464,74 @@ else:
 received_lock = False
 new_countries_since_last_check = 0
 
+requested = {}      # peer id hash -> ticks_ms of our last request
+last_reply = None
+# The receiver thread only queues (raw, rssi); the main loop handles them,
+# so the store, history and labels are only touched from one thread
+rx_queue = []
+
+def remember_profile(pkt):
+    h = pkt.get("hash")
+    if not h or h in peer_profiles:
+        return
+    if len(peer_profiles) >= PEER_CACHE_MAX:
+        # no ages kept: drop any one to make room
+        for old in peer_profiles:
+            del peer_profiles[old]
+            break
+    peer_profiles[h] = {k: pkt.get(k, "") for k in ("country",) + PACKET_FIELDS}
+    store.save(PEERS_NS, peer_profiles)
+
+def request_profile(peer):
+    now = time.ticks_ms()
+    last = requested.get(peer)
+    if last is not None and time.ticks_diff(now, last) < REQUEST_RETRY_MS:
+        return
+    requested[peer] = now
+    if lora_dev:
+        try:
+            send_packet(make_request(peer))
+        except Exception as e:
+            print("Request error:", e)
+
+def answer_request():
+    global last_reply
+    now = time.ticks_ms()
+    if last_reply is not None and time.ticks_diff(now, last_reply) < REPLY_MIN_MS:
+        return
+    last_reply = now
+    if lora_dev:
+        try:
+            send_packet(make_packet())
+        except Exception as e:
+            print("Reply error:", e)
+
 def handle_packet(raw, rssi):
-    global history, collected, new_countries_since_last_check
-    try:
-        pkt = json.loads(raw)
-    except:
+    pkt = decode_packet(raw)
+    if not pkt: return
+    if pkt.get("id") == device_tag: return  # ignore self
+    kind = pkt.get("type")
+    if kind == "request":
+        if pkt.get("to") == device_tag:
+            answer_request()
+        return
+    if kind == "beacon":
+        known = peer_profiles.get(pkt["hash"])
+        if known is None:
+            request_profile(pkt["id"])
+            return
+        known = dict(known)
+        known["id"] = pkt["id"]
+        pkt = known
+    elif kind != "lorapass":
         return
-    if not isinstance(pkt, dict): return
-    if pkt.get("type") != "lorapass": return
-    if pkt.get("id") == device_id: return  # ignore self
+    else:
+        requested.pop(pkt.get("id"), None)
+        remember_profile(pkt)
+    record_pass(pkt, rssi)
 
+def record_pass(pkt, rssi):
+    global history, collected, new_countries_since_last_check
     entry = {
         "id": pkt.get("id"),
         "name": pkt.get("name",""),
@@ -363,13 +549,14 @@ def handle_packet(raw, rssi):
         # trim history
         if len(history) > 1000:
             history = history[-1000:]
-        save_json(HISTORY_FILE, history)
+        # coalesced: written by store.tick() in the main loop
+        store.save(HISTORY_NS, history)
 
     # Country collection
     c = entry.get("country","")
     if c and c not in collected:
         collected.append(c)
-        save_json(COLLECT_FILE, collected)
+        store.save(COLLECT_NS, collected)
         new_countries_since_last_check += 1
         # Flash LED blue to indicate new collection
         try:
@@ -391,27 +578,33 @@ def rx_loop():
                 continue
             raw = lora_dev.recv()  # non-blocking receive in many LoRa libs, may return bytes or str or None
             if raw:
-                # If bytes, decode
-                try:
-                    if isinstance(raw, bytes):
-                        s = raw.decode('utf-8', 'ignore')
-                    else:
-                        s = str(raw)
-                except:
-                    s = str(raw)
+                # binary or JSON: decode_packet tells them apart
                 # try to read rssi if supported
                 rssi = None
                 try:
                     rssi = lora_dev.get_rssi()
                 except:
                     rssi = 0
-                handle_packet(s, rssi)
+                if len(rx_queue) < RX_QUEUE_MAX:
+                    rx_queue.append((raw, rssi))
         except Exception as e:
             print("RX loop error:", e)
         time.sleep_ms(RX_POLL_MS)
 
-# start receiver thread if LoRa available
+def handle_received():
+    while rx_queue:
+        raw, rssi = rx_queue.pop(0)
+        try:
+            handle_packet(raw, rssi)
+        except Exception as e:
+            print("RX handle error:", e)
+
+# start receiver thread if LoRa available; the radio is polled at full
+# clock speed even while the screen is dimmed. No keys are used, and the
+# buttons are seen by the power manager through inputsvc
+powermgr.own_input()
 if lora_ok:
+    powermgr.acquire("lorapass")
     try:
         _thread.start_new_thread(rx_loop, ())
         lbl_status.set_text("Status: Running")
@@ -442,4 +635,6 @@ indicator_timer.init(period=5000, mode=Timer.PERIODIC, callback=lambda t: check_
 # ----------------------------
 while True:
     # allow screen interaction; background TX/RX continue via Timer and thread
+    handle_received()
+    store.tick()
     wait_ms(200)
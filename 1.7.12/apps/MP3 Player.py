@@ -2,6 +2,8 @@ from m5stack import *
 from m5ui import *
 from uiflow import *
 import audio
+import perfhud
+import powermgr
 import os
 import random
 import time
@@ -128,13 +130,20 @@ def toggle_screen():
     screen_on = not screen_on
     if not screen_on:
         lcd.clear()
+        powermgr.screen_off()
     else:
+        powermgr.activity()
         redraw()
 
 # ---------- KEYBOARD ----------
 def on_key(k):
     global cursor, scroll, search_mode, search_text
 
+    # Keys still control playback while the screen is off; only "s"
+    # turns it back on then
+    if screen_on:
+        powermgr.activity()
+
     if k == "up":
         cursor = max(cursor - 1, 0)
         auto_scroll()
@@ -191,12 +200,27 @@ def on_key(k):
     redraw()
 
 keyboard.event(on_key)
+# Keys arrive through the callback above, which reports them; decoding
+# needs the full CPU clock even when the screen dims
+powermgr.own_input()
+powermgr.acquire("mp3")
 
 # ---------- MAIN ----------
 load_music()
 redraw()
+was_dark = False
 
 while True:
-    if screen_on:
+    if screen_on and powermgr.state() != powermgr.OFF:
+        if was_dark:
+            redraw()
+            was_dark = False
+        perfhud.frame_start()
         draw_wave()
-    wait_ms(60)
+        perfhud.frame_end()
+        perfhud.loop(60)
+        wait_ms(60)
+    else:
+        # Nothing to show: just keep the app alive for the key callback
+        was_dark = True
+        wait_ms(500)
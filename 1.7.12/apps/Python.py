@@ -3,6 +3,8 @@ from m5ui import *
 from uiflow import *
 import sys
 import io
+import inputsvc
+import textcache
 
 # ------------------------------
 # UI Setup
@@ -43,16 +45,22 @@ sys.stderr = StdCatcher()
 # ------------------------------
 # Draw shell
 # ------------------------------
+# Output rows plus the input row; only changed rows are repainted, so
+# typing redraws one line instead of the whole screen
+shell_rows = textcache.Rows(0, 0, 15, max_lines + 1)
+
 def draw_shell():
-    lcd.clear()
     # Show output
     start = max(0, len(output_lines) - max_lines)
-    for idx, (line, color) in enumerate(output_lines[start:]):
-        lcd.print(line, 0, idx*15, color)
+    shown = output_lines[start:]
+    for idx, (line, color) in enumerate(shown):
+        shell_rows.text(idx, line, color)
+    shell_rows.trim(len(shown), max_lines)
     # Show input line
-    lcd.print("> " + input_line, 0, max_lines*15, INPUT_COLOR)
-    # Cursor
-    lcd.rect((2+cursor_pos)*8, max_lines*15, 8, 15, CURSOR_COLOR)
+    if shell_rows.changed(max_lines, (input_line, cursor_pos)):
+        textcache.draw("> " + input_line, 0, max_lines*15, INPUT_COLOR, cache=False)
+        # Cursor
+        lcd.rect((2+cursor_pos)*8, max_lines*15, 8, 15, CURSOR_COLOR)
 
 draw_shell()
 
@@ -80,21 +88,19 @@ while True:
     
     # Handle buttons
     global history_idx, input_line, cursor_pos
-    if btnA.isPressed():  # Up = previous history
+    if inputsvc.take("A"):  # Up = previous history
         if history:
             history_idx = max(0, history_idx-1) if history_idx >= 0 else len(history)-1
             input_line = history[history_idx]
             cursor_pos = len(input_line)
             draw_shell()
-            wait_ms(150)
-    if btnC.isPressed():  # Down = next history
+    if inputsvc.take("C"):  # Down = next history
         if history:
             history_idx = (history_idx+1) % len(history) if history_idx >=0 else 0
             input_line = history[history_idx]
             cursor_pos = len(input_line)
             draw_shell()
-            wait_ms(150)
-    if btnB.isPressed():  # Enter = execute
+    if inputsvc.take("B") == inputsvc.PRESS:  # Enter = execute
         if input_line.strip():
             output_lines.append(("> " + input_line, INPUT_COLOR))
             execute_command(input_line)
@@ -103,7 +109,6 @@ while True:
             input_line = ""
             cursor_pos = 0
             draw_shell()
-            wait_ms(150)
     
     # Keyboard input
     key = kb.getKey()
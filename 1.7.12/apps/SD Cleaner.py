@@ -1,5 +1,6 @@
 import os
 import shutil
+import store
 from m5stack import *
 from m5stack_ui import *
 from uiflow import *
@@ -12,7 +13,6 @@ title = M5Label("System Folder Cleaner", x=10, y=10, color=0xFFFFFF, font=FONT_M
 info = M5Label("", x=10, y=40, color=0xAAAAAA, font=FONT_MONT_18)
 
 BASE_PATH = "/sd"
-CONFIG_FILE = os.path.join(BASE_PATH, "auto_run_config.txt")
 
 # System-generated folders from various OS
 SYSTEM_FOLDERS = [
@@ -87,14 +87,11 @@ def scan_sd():
     return system_folders_found
 
 def load_auto_run():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            return f.read().strip() == "ON"
-    return False
+    return store.load("sd_cleaner", "OFF") == "ON"
 
 def save_auto_run(enabled):
-    with open(CONFIG_FILE, "w") as f:
-        f.write("ON" if enabled else "OFF")
+    store.save("sd_cleaner", "ON" if enabled else "OFF")
+    store.flush("sd_cleaner")
 
 def delete_folders(folders):
     for f in folders:
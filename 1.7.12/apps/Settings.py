@@ -1,3 +1,36 @@
+import os
+import json
+import store
+
+# ------------------------------
+# JSON helpers
+# System files go through the store so the launcher and
+# other apps see the edit without re-reading the SD card.
+# ------------------------------
+def load_json(path):
+    ns = store.namespace_for(path)
+    if ns:
+        data = store.load(ns, {})
+    else:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except:
+            data = {}
+    return data if isinstance(data, dict) else {}
+
+def save_json(path, data):
+    ns = store.namespace_for(path)
+    if ns:
+        store.save(ns, data)
+        store.flush(ns)
+        return
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f)
+    except:
+        pass
+
 # ------------------------------
 # Scan for JSON and TXT files
 # ------------------------------
@@ -64,5 +97,8 @@ def save_current_file():
             with open(file_path, "w") as f:
                 for k, v in zip(current_keys, current_values):
                     f.write(f"{k}={v}\n")
+            ns = store.namespace_for(file_path)
+            if ns:
+                store.forget(ns)
         except:
             pass
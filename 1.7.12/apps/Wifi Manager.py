@@ -1,14 +1,15 @@
 import os
 import time
-import json
 from M5 import *
 from M5Stack import Speaker
 import network
+import store
+import netmon
+import assetindex
 
 # -------------------------------------------------------
 # Paths and constants
 # -------------------------------------------------------
-WIFI_FILE = "/sd/wifi_networks.json"
 MAX_NETWORKS = 10
 
 WIFI_PINGING = "/sd/wifipinging.wav"
@@ -23,17 +24,14 @@ CONNECT_ANIM = ["connecting1.png", "connecting2.png", "connecting3.png", "connec
 SYSTEM_PASSWORD = "jal190413"
 
 # -------------------------------------------------------
-# Load/save networks
+# Load/save networks (cached by the system store)
 # -------------------------------------------------------
 def load_networks():
-    if os.path.exists(WIFI_FILE):
-        with open(WIFI_FILE, "r") as f:
-            return json.load(f)
-    return []
+    return store.load("wifi", [])
 
 def save_networks(networks):
-    with open(WIFI_FILE, "w") as f:
-        json.dump(networks[:MAX_NETWORKS], f)
+    store.save("wifi", networks[:MAX_NETWORKS])
+    store.flush("wifi")
 
 # -------------------------------------------------------
 # Display Wi-Fi icon
@@ -41,7 +39,7 @@ def save_networks(networks):
 def draw_wifi_icon(icon_file):
     screen = M5Screen()
     path = os.path.join(ASSETS_DIR, icon_file)
-    if os.path.exists(path):
+    if assetindex.exists(path):
         try:
             screen.drawImage(path, 0, 0)
         except:
@@ -55,7 +53,7 @@ def connect_to_network(ssid, password):
     wlan.active(True)
 
     # Play connecting sound
-    if os.path.exists(WIFI_PINGING):
+    if assetindex.exists(WIFI_PINGING):
         Speaker.playWAV(WIFI_PINGING, loop=True)
 
     screen = M5Screen()
@@ -72,7 +70,9 @@ def connect_to_network(ssid, password):
     Speaker.stop()
 
     if wlan.isconnected():
-        if os.path.exists(WIFI_CONNECT):
+        # Let the status bar re-check the internet right away
+        netmon.refresh()
+        if assetindex.exists(WIFI_CONNECT):
             Speaker.playWAV(WIFI_CONNECT)
         # Determine signal level
         rssi = wlan.status()  # approximate signal strength
@@ -83,7 +83,7 @@ def connect_to_network(ssid, password):
         draw_wifi_icon(f"wifi{level}.png")
         return True
     else:
-        if os.path.exists(ERROR_SOUND):
+        if assetindex.exists(ERROR_SOUND):
             Speaker.playWAV(ERROR_SOUND)
         draw_wifi_icon("wifi0.png")
         screen.setCursor(10, 30)
@@ -0,0 +1,191 @@
+# Fyre-OS asset index
+# One directory listing per folder instead of a FAT lookup for every
+# "does this file exist?" question:
+#   assetindex.exists("/sd/assets/wifi3.png")
+#   assetindex.info("/sd/assets/startup.wav")   # {"type", "size", "mtime"}
+# A folder is listed the first time it is asked about (main.py lists
+# /sd/assets during boot). Each entry keeps its type and size; mtime is
+# read on first use of info(). Names asked for but absent are remembered
+# as known-missing. A folder is re-listed when its own mtime changes
+# (checked at most every CHECK_MS), or on rescan() after writing to it.
+
+import os
+import time
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+ASSETS_DIR = "/sd/assets"
+CHECK_MS = 5000
+
+TYPE_DIR = "dir"
+TYPE_FILE = "file"
+
+# ------------------------------
+# STATE
+# ------------------------------
+_dirs = {}      # folder -> {"mtime", "checked", "entries", "missing"}
+scans = 0
+hits = 0
+misses = 0      # lookups answered "missing" without touching the SD
+
+# ------------------------------
+# UTIL
+# ------------------------------
+def _split(path):
+    cut = path.rfind("/")
+    if cut < 0:
+        return "", path
+    return path[:cut] or "/", path[cut + 1:]
+
+def _kind(name):
+    dot = name.rfind(".")
+    return name[dot + 1:].lower() if dot > 0 else ""
+
+def _dir_mtime(folder):
+    try:
+        return os.stat(folder)[8]
+    except:
+        return None
+
+def _list(folder):
+    """name -> [type, size, mtime]; mtime is filled in lazily by info()."""
+    entries = {}
+    try:
+        for item in os.ilistdir(folder):
+            # (name, type, inode[, size]); 0x4000 marks a directory
+            is_dir = item[1] & 0x4000
+            size = item[3] if len(item) > 3 else None
+            entries[item[0]] = [TYPE_DIR if is_dir else TYPE_FILE, size, None]
+    except AttributeError:
+        # No ilistdir on this port: plain listdir, sizes come from info()
+        for name in os.listdir(folder):
+            entries[name] = [TYPE_FILE, None, None]
+    return entries
+
+def _folder(folder):
+    """Index of folder, listing it if it is new or changed on disk."""
+    global scans
+    d = _dirs.get(folder)
+    now = time.ticks_ms()
+    if d is not None:
+        if time.ticks_diff(now, d["checked"]) < CHECK_MS:
+            return d
+        d["checked"] = now
+        mtime = _dir_mtime(folder)
+        if not mtime or mtime == d["mtime"]:
+            # FAT may not stamp folders: then only rescan() re-lists
+            return d
+    try:
+        entries = _list(folder)
+    except:
+        # Missing folder: everything in it is missing until a rescan
+        entries = None
+    d = {
+        "mtime": _dir_mtime(folder) if entries is not None else None,
+        "checked": now,
+        "entries": entries,
+        "missing": set(),
+    }
+    _dirs[folder] = d
+    scans += 1
+    return d
+
+def _entry(path):
+    global hits, misses
+    folder, name = _split(path)
+    d = _folder(folder)
+    entries = d["entries"]
+    entry = entries.get(name) if entries is not None else None
+    if entry is None:
+        misses += 1
+        d["missing"].add(name)
+    else:
+        hits += 1
+    return entry
+
+# ------------------------------
+# API
+# ------------------------------
+def scan(folder=ASSETS_DIR):
+    """List folder now (e.g. during boot) so later lookups are free."""
+    rescan(folder)
+    return names(folder)
+
+def rescan(folder=None):
+    """Forget folder (or every folder); it is listed again on next use. Call after writing files."""
+    for key in list(_dirs):
+        if folder is None or key == folder:
+            del _dirs[key]
+    if folder is not None:
+        _folder(folder)
+
+def exists(path):
+    return _entry(path) is not None
+
+def is_file(path):
+    entry = _entry(path)
+    return entry is not None and entry[0] == TYPE_FILE
+
+def info(path):
+    """{"type", "size", "mtime", "kind"} for path, or None if it is missing."""
+    entry = _entry(path)
+    if entry is None:
+        return None
+    if entry[2] is None or entry[1] is None:
+        try:
+            st = os.stat(path)
+            entry[1] = st[6]
+            entry[2] = st[8]
+        except:
+            pass
+    return {
+        "type": entry[0],
+        "size": entry[1],
+        "mtime": entry[2],
+        "kind": _kind(path),
+    }
+
+def size(path):
+    entry = info(path)
+    return entry["size"] if entry else None
+
+def names(folder=ASSETS_DIR, kind=None):
+    """Names in folder, optionally only one extension ("png", "wav", ...)."""
+    entries = _folder(folder)["entries"] or {}
+    if kind is None:
+        return list(entries)
+    return [n for n in entries if _kind(n) == kind]
+
+def missing(folder=ASSETS_DIR):
+    """Names looked up in folder that were not there."""
+    d = _dirs.get(folder)
+    return sorted(d["missing"]) if d else []
+
+def added(path):
+    """Record a file just written, without re-listing its folder."""
+    folder, name = _split(path)
+    d = _dirs.get(folder)
+    if d is None or d["entries"] is None:
+        return
+    size = None
+    try:
+        size = os.stat(path)[6]
+    except:
+        pass
+    d["entries"][name] = [TYPE_FILE, size, None]
+    d["missing"].discard(name)
+
+def removed(path):
+    folder, name = _split(path)
+    d = _dirs.get(folder)
+    if d is not None and d["entries"] is not None:
+        d["entries"].pop(name, None)
+
+def stats():
+    return {
+        "folders": len(_dirs),
+        "scans": scans,
+        "hits": hits,
+        "misses": misses,
+    }
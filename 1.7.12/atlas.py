@@ -0,0 +1,96 @@
+# Fyre-OS sprite atlas
+# One packed file holding many small RGB565 sprites, loaded into a
+# single resident buffer and drawn by name:
+#   bar = atlas.load("/sd/assets/statusbar.atlas")
+#   bar.blit("wifi3", 5, 2)
+# File layout (little-endian header):
+#   b"FYA1"  u16 index length  index JSON  pixel data
+# The index maps each sprite name to [offset, w, h] inside the pixel
+# data; every sprite is stored as w*h big-endian RGB565 words.
+# Build atlases on a PC with tools/pack_atlas.py
+
+ATLAS_MAGIC = b"FYA1"
+
+_loaded = {}
+
+# ------------------------------
+# BACKEND
+# ------------------------------
+def _draw_raw(buf, x, y, w, h):
+    import M5
+    M5.Lcd.drawRawBuf(buf, x, y, w, h, len(buf), False)
+
+# ------------------------------
+# ATLAS
+# ------------------------------
+class Atlas:
+    def __init__(self, path):
+        import json
+        with open(path, "rb") as f:
+            head = f.read(6)
+            if head[:4] != ATLAS_MAGIC:
+                raise ValueError("not an atlas: " + path)
+            index = json.loads(f.read(int.from_bytes(head[4:6], "little")))
+            self.pixels = f.read()
+        self.path = path
+        self.sprites = index["sprites"]
+        self.view = memoryview(self.pixels)
+        self.blits = 0
+        self.drawable = True
+
+    def has(self, name):
+        return name in self.sprites
+
+    def size(self, name):
+        off, w, h = self.sprites[name]
+        return w, h
+
+    def sprite(self, name):
+        """Pixels of one sprite as a zero-copy slice of the resident buffer."""
+        off, w, h = self.sprites[name]
+        return self.view[off:off + w * h * 2]
+
+    def blit(self, name, x, y):
+        """Draw a sprite at x, y. Returns False if the atlas doesn't have it or can't draw."""
+        entry = self.sprites.get(name)
+        if entry is None or not self.drawable:
+            return False
+        off, w, h = entry
+        try:
+            _draw_raw(self.view[off:off + w * h * 2], x, y, w, h)
+        except Exception as e:
+            # No raw blit on this firmware: callers fall back to the PNGs
+            print("Atlas blit unsupported:", e)
+            self.drawable = False
+            return False
+        self.blits += 1
+        return True
+
+    def nbytes(self):
+        return len(self.pixels)
+
+# ------------------------------
+# API
+# ------------------------------
+def load(path):
+    """Return the Atlas for path (loaded once), or None if it is missing or unreadable."""
+    if path in _loaded:
+        return _loaded[path]
+    try:
+        atlas = Atlas(path)
+    except Exception as e:
+        print("Atlas unavailable:", path, e)
+        atlas = None
+    _loaded[path] = atlas
+    return atlas
+
+def unload(path=None):
+    for key in list(_loaded):
+        if path is None or key == path:
+            del _loaded[key]
+
+def sprite_name(path):
+    """'/sd/assets/wifi3.png' -> 'wifi3'"""
+    name = path[path.rfind("/") + 1:]
+    dot = name.rfind(".")
+    return name[:dot] if dot > 0 else name
@@ -0,0 +1,455 @@
+# Fyre-OS audio service
+# One voice, fed a chunk at a time from the main loop, so playing a
+# sound never blocks on the SD card:
+#   audiosvc.play("/sd/assets/Settings.wav")          # returns at once
+#   audiosvc.play(SHUTDOWN, audiosvc.PRIO_SYSTEM)
+#   while True: ...; audiosvc.tick()
+# A new sound cuts off the one playing unless that one has a higher
+# priority; then it waits in a small queue (or is dropped when the
+# queue is full). Only the latest request made between two ticks is
+# opened, so scrolling past ten apps opens one file, not ten.
+# Short sounds (see preload) stay decoded in RAM and start with a single
+# call; longer ones stream through STREAM_BUFFERS buffers of CHUNK_BYTES.
+# A sound's IMA-ADPCM copy (<sound>.adp, see adpcm.py) is used instead
+# of the .wav when there is one; it streams one block at a time, decoded
+# into the same ring of buffers.
+# Firmware without Speaker.playRaw falls back to Speaker.playWAV(path)
+# with the PCM .wav.
+
+import os
+import time
+import adpcm
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+PRIO_UI = 1       # hover/click sounds: newest wins
+PRIO_APP = 2
+PRIO_SYSTEM = 3   # startup/shutdown: not cut off by UI sounds
+
+CHANNEL = 0
+CHUNK_BYTES = 8192          # ~46 ms of 44.1 kHz 16-bit stereo
+STREAM_BUFFERS = 3
+CACHE_BUDGET = 96 * 1024    # decoded PCM kept in RAM
+CACHE_MAX_BYTES = 48 * 1024 # longer sounds are always streamed
+MAX_QUEUE = 4
+POLL_MS = 20                # how often tick() must run while streaming
+
+# ------------------------------
+# STATE
+# ------------------------------
+_speaker = None
+_backend = None     # "raw", "file" or "legacy"
+_current = None     # Voice playing now
+_request = None     # (path, priority) waiting for the next tick
+_queue = []         # [(priority, path)] waiting behind a higher priority sound
+_cache = {}         # path -> (info, pcm)
+_cache_order = []
+_cache_bytes = 0
+_headers = {}       # path -> info, or None for files that can't be parsed
+_sources = {}       # requested path -> file streamed for it (its .adp copy or itself)
+_next_volume = None # set_volume(after_current=True) waiting for the voice to end
+played = 0
+preempted = 0
+dropped = 0
+underruns = 0
+
+# ------------------------------
+# BACKEND
+# ------------------------------
+def _init():
+    global _speaker, _backend
+    if _backend is not None:
+        return _speaker
+    try:
+        from M5 import Speaker
+    except ImportError:
+        try:
+            from M5Stack import Speaker
+        except ImportError:
+            Speaker = None
+    if Speaker is not None:
+        _speaker = Speaker
+        _backend = "raw" if hasattr(Speaker, "playRaw") else "file"
+        return _speaker
+    try:
+        from m5stack import speaker
+        _speaker = speaker
+        _backend = "legacy"
+    except ImportError:
+        _backend = "none"
+    return _speaker
+
+def _stop_speaker():
+    try:
+        if _backend == "raw":
+            _speaker.stop(CHANNEL)
+        elif _speaker is not None:
+            _speaker.stop()
+    except:
+        pass
+
+# ------------------------------
+# WAV
+# ------------------------------
+def parse_wav(f):
+    """(channels, rate, bits, data offset, data bytes, format tag, block align) of WAV file f.
+
+    None unless it is 8/16-bit PCM or IMA-ADPCM."""
+    head = f.read(12)
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+    fmt = None
+    pos = 12
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        size = int.from_bytes(chunk[4:8], "little")
+        pos += 8
+        if chunk[:4] == b"fmt ":
+            body = f.read(size)
+            tag = int.from_bytes(body[0:2], "little")
+            # Only integer PCM and ADPCM can be pushed raw (float WAVs use playWAV)
+            if tag != 1 and tag != adpcm.WAVE_FORMAT_IMA_ADPCM:
+                return None
+            fmt = (int.from_bytes(body[2:4], "little"),
+                   int.from_bytes(body[4:8], "little"),
+                   int.from_bytes(body[14:16], "little"),
+                   tag,
+                   int.from_bytes(body[12:14], "little"))
+        elif chunk[:4] == b"data":
+            if fmt is None:
+                return None
+            if fmt[3] == 1 and fmt[2] not in (8, 16):
+                return None
+            return fmt[:3] + (pos, size) + fmt[3:]
+        else:
+            f.seek(size, 1)
+        pos += size + (size & 1)
+        if size & 1:
+            f.read(1)
+
+def source(path):
+    """The file played for path: its ADPCM copy when there is one and the raw backend can stream it."""
+    _init()
+    if _backend != "raw":
+        return path
+    found = _sources.get(path)
+    if found is None:
+        found = path
+        dot = path.rfind(".")
+        if dot > 0 and path[dot:].lower() == ".wav":
+            try:
+                os.stat(path[:dot] + adpcm.ADPCM_EXT)
+                found = path[:dot] + adpcm.ADPCM_EXT
+            except OSError:
+                pass
+        _sources[path] = found
+    return found
+
+def _info(path, f):
+    if path not in _headers:
+        try:
+            _headers[path] = parse_wav(f)
+        except:
+            _headers[path] = None
+    return _headers[path]
+
+def _is_adpcm(info):
+    return info[5] == adpcm.WAVE_FORMAT_IMA_ADPCM
+
+def _duration_ms(info, nbytes):
+    """Play time of nbytes of the PCM sent to the speaker (ADPCM is sent decoded, 16-bit)."""
+    channels, rate = info[0], info[1]
+    width = 1 if info[2] == 8 else 2
+    return nbytes * 1000 // (rate * channels * width)
+
+def _decode_all(f, info):
+    f.seek(info[3])
+    data = f.read(info[4])
+    if _is_adpcm(info):
+        return adpcm.decode(data, info[6], info[0])
+    return data
+
+def _pcm_size(info):
+    if _is_adpcm(info):
+        blocks = (info[4] + info[6] - 1) // info[6]
+        return blocks * adpcm.pcm_bytes(info[6], info[0])
+    return info[4]
+
+# ------------------------------
+# VOICE
+# ------------------------------
+class Voice:
+    def __init__(self, path, priority):
+        self.path = path
+        self.priority = priority
+        self.file = None
+        self.info = None
+        self.pcm = None
+        self.remaining = 0
+        self.block = None
+        self.buffers = None
+        self.next_buffer = 0
+        self.play_until = time.ticks_ms()
+        self.done = False
+
+    def start(self):
+        cached = _cache.get(self.path)
+        if cached and _backend == "raw":
+            _touch(self.path)
+            self.info, self.pcm = cached
+            self._submit(self.pcm)
+            self.done = True
+            return
+        if _backend != "raw":
+            self._play_file()
+            return
+        src = source(self.path)
+        self.file = open(src, "rb")
+        self.info = _info(src, self.file)
+        if self.info is None:
+            self.close()
+            self._play_file()
+            return
+        self.file.seek(self.info[3])
+        self.remaining = self.info[4]
+        size = CHUNK_BYTES
+        if _is_adpcm(self.info):
+            # One compressed block in, one decoded block per ring buffer
+            self.block = bytearray(self.info[6])
+            size = adpcm.pcm_bytes(self.info[6], self.info[0])
+        self.buffers = [bytearray(size) for _ in range(STREAM_BUFFERS)]
+        self.feed()
+
+    def _play_file(self):
+        # Whole-file playback by the firmware (UIFlow 1, float WAVs)
+        if _backend == "legacy":
+            _speaker.playWAV(self.path)
+        else:
+            _speaker.playWAV(self.path, loop=False)
+        self.done = True
+
+    def _submit(self, pcm):
+        channels, rate = self.info[0], self.info[1]
+        _speaker.playRaw(pcm, rate, channels == 2, 1, CHANNEL, False)
+        now = time.ticks_ms()
+        if time.ticks_diff(self.play_until, now) < 0:
+            self.play_until = now
+        self.play_until = time.ticks_add(self.play_until, _duration_ms(self.info, len(pcm)))
+
+    def ahead_ms(self):
+        return time.ticks_diff(self.play_until, time.ticks_ms())
+
+    def feed(self):
+        """Queue the next chunk once at most one chunk is still playing."""
+        global underruns
+        if self.done or self.file is None:
+            return
+        chunk_ms = _duration_ms(self.info, len(self.buffers[0]))
+        while self.remaining > 0 and self.ahead_ms() <= chunk_ms:
+            if self.ahead_ms() <= 0 and self.next_buffer:
+                underruns += 1
+            pcm = self._read_chunk(self.buffers[self.next_buffer % STREAM_BUFFERS])
+            if pcm is None:
+                self.remaining = 0
+                break
+            self.next_buffer += 1
+            self._submit(pcm)
+        if self.remaining <= 0:
+            self.close()
+            self.done = True
+
+    def _read_chunk(self, buf):
+        """Fill buf with the next PCM chunk; returns the filled part or None at the end."""
+        if self.block is None:
+            n = self.file.readinto(memoryview(buf)[:min(len(buf), self.remaining)])
+            if not n:
+                return None
+            self.remaining -= n
+            return buf if n == len(buf) else memoryview(buf)[:n]
+        n = self.file.readinto(memoryview(self.block)[:min(len(self.block), self.remaining)])
+        if not n:
+            return None
+        self.remaining -= n
+        samples = adpcm.decode_block(self.block, buf, self.info[0], n)
+        if not samples:
+            return None
+        nbytes = samples * self.info[0] * 2
+        return buf if nbytes == len(buf) else memoryview(buf)[:nbytes]
+
+    def playing(self):
+        if not self.done:
+            return True
+        if _backend != "raw":
+            try:
+                return bool(_speaker.isPlaying())
+            except:
+                return False
+        return self.ahead_ms() > 0
+
+    def close(self):
+        if self.file:
+            try:
+                self.file.close()
+            except:
+                pass
+            self.file = None
+
+# ------------------------------
+# CACHE
+# ------------------------------
+def _touch(path):
+    if path in _cache_order:
+        _cache_order.remove(path)
+    _cache_order.append(path)
+
+def _cache_add(path, info, pcm):
+    global _cache_bytes
+    while _cache_order and _cache_bytes + len(pcm) > CACHE_BUDGET:
+        old = _cache_order.pop(0)
+        _cache_bytes -= len(_cache.pop(old)[1])
+    _cache[path] = (info, pcm)
+    _cache_bytes += len(pcm)
+    _touch(path)
+
+def preload(paths):
+    """Keep short sounds (<= CACHE_MAX_BYTES of PCM) in RAM. Returns how many are cached."""
+    _init()
+    count = 0
+    for path in paths:
+        if path in _cache:
+            count += 1
+            continue
+        try:
+            src = source(path)
+            with open(src, "rb") as f:
+                info = _info(src, f)
+                if info is None or _pcm_size(info) > min(CACHE_MAX_BYTES, CACHE_BUDGET):
+                    continue
+                pcm = _decode_all(f, info)
+            _cache_add(path, info, pcm)
+            count += 1
+        except Exception as e:
+            print("Sound preload failed:", path, e)
+    return count
+
+def uncache(path=None):
+    global _cache_bytes
+    for key in list(_cache):
+        if path is None or key == path:
+            _cache_bytes -= len(_cache.pop(key)[1])
+            _cache_order.remove(key)
+
+# ------------------------------
+# API
+# ------------------------------
+def play(path, priority=PRIO_UI):
+    """Ask for a sound. Never touches the SD card: the file is opened by tick()."""
+    global _request, dropped
+    current = _current if _current and _current.playing() else None
+    if current and priority < current.priority:
+        if len(_queue) >= MAX_QUEUE:
+            dropped += 1
+            return False
+        _queue.append((priority, path))
+        return True
+    if _request and priority < _request[1]:
+        dropped += 1
+        return False
+    if _request:
+        dropped += 1
+    _request = (path, priority)
+    return True
+
+def stop():
+    global _current, _request
+    _request = None
+    del _queue[:]
+    if _current:
+        _current.close()
+        _current = None
+    _stop_speaker()
+    _apply_next_volume()
+
+def busy():
+    return bool(_request or _queue or (_current and _current.playing()))
+
+def streaming():
+    """True while tick() has to be called at least every POLL_MS."""
+    return bool(_current and not _current.done)
+
+def tick():
+    """Call from main loops: starts requested sounds and feeds the stream."""
+    global _current, _request, played, preempted
+    if _request is None and _current is None and not _queue:
+        return
+    if _init() is None:
+        _request = None
+        del _queue[:]
+        return
+    if _current and not _current.playing():
+        _current.close()
+        _current = None
+        _apply_next_volume()
+    if _request is None and _current is None and _queue:
+        # Highest priority first, oldest first within a priority
+        best = 0
+        for i in range(1, len(_queue)):
+            if _queue[i][0] > _queue[best][0]:
+                best = i
+        priority, path = _queue.pop(best)
+        _request = (path, priority)
+    if _request:
+        path, priority = _request
+        _request = None
+        if _current:
+            preempted += 1
+            _current.close()
+            _stop_speaker()
+        _current = Voice(path, priority)
+        try:
+            _current.start()
+            played += 1
+        except Exception as e:
+            print("Sound failed:", path, e)
+            _current.close()
+            _current = None
+        return
+    if _current:
+        try:
+            _current.feed()
+        except Exception as e:
+            print("Sound failed:", _current.path, e)
+            _current.close()
+            _current = None
+
+def set_volume(volume, after_current=False):
+    """after_current: leave the sound playing now at its volume, change it for the next one."""
+    global _next_volume
+    if after_current and _current and _current.playing():
+        _next_volume = volume
+        return
+    _next_volume = None
+    try:
+        if _init() is not None:
+            _speaker.setVolume(volume)
+    except:
+        pass
+
+def _apply_next_volume():
+    if _next_volume is not None:
+        set_volume(_next_volume)
+
+def stats():
+    return {
+        "backend": _backend,
+        "played": played,
+        "preempted": preempted,
+        "dropped": dropped,
+        "underruns": underruns,
+        "queued": len(_queue),
+        "cached": len(_cache),
+        "cache_bytes": _cache_bytes,
+    }
@@ -0,0 +1,74 @@
+# Fyre-OS boot scheduler
+# Runs boot jobs (splash fade, startup sound, app preload) side by side.
+# Each job is a generator: it does a short step, then yields how many ms
+# to wait before its next step. Steps never block, so while the fade
+# waits for its next frame the preload job can read from the SD card.
+# A background job (the startup sound) is stepped alongside the others
+# but not waited for: run() returns once only background jobs are left,
+# and whatever it was doing is carried on by the launcher.
+
+import time
+
+class BootScheduler:
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.tasks = []
+
+    def add(self, name, gen, background=False):
+        if gen is None:
+            return
+        now = time.ticks_ms()
+        # [name, generator, wake at, started at, SD reads, SD bytes, background]
+        self.tasks.append([name, gen, now, now, 0, 0, background])
+
+    def _step(self, task):
+        trace = self.trace
+        reads = trace.reads if trace else 0
+        nbytes = trace.read_bytes if trace else 0
+        start = time.ticks_ms()
+        done = False
+        try:
+            delay = next(task[1])
+        except StopIteration:
+            done = True
+        except Exception as e:
+            print("Boot task {} failed: {}".format(task[0], e))
+            done = True
+        if trace:
+            task[4] += trace.reads - reads
+            task[5] += trace.read_bytes - nbytes
+        if done:
+            self._finish(task)
+            return False
+        # Wake relative to when the step started, so frame pacing does
+        # not drift by however long the step itself took.
+        task[2] = time.ticks_add(start, delay or 0)
+        return True
+
+    def _finish(self, task):
+        if self.trace:
+            duration = time.ticks_diff(time.ticks_ms(), task[3])
+            start = time.ticks_diff(task[3], self.trace.t0)
+            self.trace.span(task[0], start, duration, task[4], task[5])
+
+    def run(self):
+        """Step every job until all of them (background jobs aside) have finished."""
+        while self.tasks:
+            if all(task[6] for task in self.tasks):
+                for task in self.tasks:
+                    self._finish(task)
+                self.tasks = []
+                break
+            now = time.ticks_ms()
+            next_wake = None
+            for task in self.tasks[:]:
+                if time.ticks_diff(task[2], now) <= 0:
+                    if not self._step(task):
+                        self.tasks.remove(task)
+                        continue
+                    now = time.ticks_ms()
+                wait = time.ticks_diff(task[2], now)
+                if next_wake is None or wait < next_wake:
+                    next_wake = wait
+            if next_wake is not None and next_wake > 0:
+                time.sleep_ms(next_wake)
@@ -0,0 +1,132 @@
+# Fyre-OS boot tracer
+# Timestamps every boot stage and appends one compact line per boot
+# to /sd/boottrace.log (rotated to boottrace.1.log when it grows).
+# Read the logs on a PC with tools/boottrace_report.py
+
+import os
+import json
+import time
+try:
+    import gc
+except:
+    gc = None
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+TRACE_LOG = "/sd/boottrace.log"
+TRACE_OLD = "/sd/boottrace.1.log"
+MAX_LOG_BYTES = 16 * 1024
+TRACE_VERSION = 1
+
+# ------------------------------
+# UTIL
+# ------------------------------
+def file_size(path):
+    try:
+        return os.stat(path)[6]
+    except:
+        return -1
+
+def heap_free():
+    if gc is None:
+        return -1
+    try:
+        return gc.mem_free()
+    except:
+        return -1
+
+def rotate_log(path=TRACE_LOG, old_path=TRACE_OLD, max_bytes=MAX_LOG_BYTES):
+    if file_size(path) < max_bytes:
+        return
+    try:
+        os.remove(old_path)
+    except:
+        pass
+    try:
+        os.rename(path, old_path)
+    except Exception as e:
+        print("Boot trace rotate failed:", e)
+
+# ------------------------------
+# TRACER
+# ------------------------------
+class BootTrace:
+    def __init__(self, path=TRACE_LOG, old_path=TRACE_OLD, max_bytes=MAX_LOG_BYTES):
+        self.path = path
+        self.old_path = old_path
+        self.max_bytes = max_bytes
+        self.t0 = time.ticks_ms()
+        self.stages = []
+        self.current = None
+        self.reads = 0
+        self.read_bytes = 0
+        self.info = {}
+        self.committed = False
+
+    def elapsed(self):
+        return time.ticks_diff(time.ticks_ms(), self.t0)
+
+    def begin(self, name):
+        """Close the running stage (if any) and start a new one."""
+        self.end()
+        self.current = (name, self.elapsed(), self.reads, self.read_bytes)
+
+    def end(self):
+        if self.current is None:
+            return
+        name, start, reads, nbytes = self.current
+        self.current = None
+        # [name, start ms, duration ms, free heap, SD reads, SD bytes]
+        self.stages.append([
+            name,
+            start,
+            self.elapsed() - start,
+            heap_free(),
+            self.reads - reads,
+            self.read_bytes - nbytes,
+        ])
+
+    def span(self, name, start, duration, reads=0, nbytes=0):
+        """Record a stage that ran alongside others (see bootsched)."""
+        self.stages.append([name, start, duration, heap_free(), reads, nbytes])
+
+    def read(self, path, nbytes=None):
+        """Count one SD read; size is taken from the file when not given."""
+        if nbytes is None:
+            nbytes = file_size(path)
+        self.reads += 1
+        if nbytes > 0:
+            self.read_bytes += nbytes
+
+    def note(self, key, value):
+        self.info[key] = value
+
+    def asset(self, key, path):
+        """Record an asset's size so the report can tell asset changes apart from regressions."""
+        self.info[key] = file_size(path)
+
+    def record(self):
+        return {
+            "v": TRACE_VERSION,
+            "t": time.time(),
+            "total": self.elapsed(),
+            "heap": heap_free(),
+            "reads": self.reads,
+            "bytes": self.read_bytes,
+            "info": self.info,
+            "stages": self.stages,
+        }
+
+    def commit(self):
+        """Close the last stage and append this boot to the trace log (once)."""
+        self.end()
+        if self.committed:
+            return
+        self.committed = True
+        try:
+            rotate_log(self.path, self.old_path, self.max_bytes)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(self.record()) + "\n")
+        except Exception as e:
+            print("Boot trace write failed:", e)
@@ -0,0 +1,289 @@
+# Fyre-OS off-screen canvas
+# Draw a whole frame into RAM, then send it to the panel in one
+# transfer, so the user never sees half-drawn frames:
+#   c = canvas.Canvas(0, 20, 240, 115)   # screen area it covers
+#   c.clear(); c.image(path, 0, 0); c.text(4, 4, "hi", 0xFFFFFF)
+#   c.push()
+# Coordinates are relative to the canvas. Backends, best first:
+#   "m5"       UIFlow 2 sprite (M5.Lcd.newCanvas); images are decoded once
+#              into imgcache sprites made on it
+#   "framebuf" bytearray RGB565 + framebuf; images come from atlases and
+#              only the changed rows/columns are pushed (Lcd.drawRawBuf).
+#              Other images are drawn on the panel after the push, and so
+#              is whatever the frame drew over them
+#   "direct"   no RAM canvas: calls go straight to the panel
+# Any app can use it; hmenu's AppMenu is the first user.
+
+try:
+    import framebuf
+except:
+    framebuf = None
+
+USE_PSRAM = True
+
+_atlases = []
+_spare = None   # made by reserve(), waiting for get()
+
+def add_atlas(atlas):
+    """Let framebuf canvases draw the sprites of an atlas (see atlas.py)."""
+    if atlas and atlas not in _atlases:
+        _atlases.append(atlas)
+
+def reserve(x, y, w, h):
+    """Make the next get() canvas ahead of time (main.py, so boot can draw onto it)."""
+    global _spare
+    _spare = Canvas(x, y, w, h)
+    return _spare
+
+def get(x, y, w, h):
+    """A canvas for this area; the reserved one if it matches, otherwise a new one."""
+    global _spare
+    c = _spare
+    _spare = None
+    if c is not None:
+        if (c.x, c.y, c.w, c.h) == (x, y, w, h):
+            return c
+        c.delete()
+    return Canvas(x, y, w, h)
+
+def rgb565(color):
+    """0xRRGGBB -> RGB565 with its bytes swapped, so the buffer holds panel (big-endian) order."""
+    c = ((color >> 8) & 0xF800) | ((color >> 5) & 0x07E0) | ((color >> 3) & 0x001F)
+    return ((c & 0xFF) << 8) | (c >> 8)
+
+def _sprite_name(path):
+    name = path[path.rfind("/") + 1:]
+    dot = name.rfind(".")
+    return name[:dot] if dot > 0 else name
+
+class Canvas:
+    def __init__(self, x, y, w, h, backend=None):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.dirty = None   # [x0, y0, x1, y1] changed since the last push
+        self.pushes = 0
+        self.pushed_bytes = 0
+        self.late = None    # framebuf: panel draws to repeat after the push
+        self.late_draws = 0 # how many the last push made
+        self.surface = None
+        self.buf = None
+        self.fb = None
+        self.lcd = None
+        self.mode = None
+        for mode in ((backend,) if backend else ("m5", "framebuf", "direct")):
+            if self._init_backend(mode):
+                self.mode = mode
+                break
+
+    def _init_backend(self, mode):
+        try:
+            if mode == "m5":
+                import M5
+                self.surface = M5.Lcd.newCanvas(self.w, self.h, 16, USE_PSRAM)
+                return self.surface is not None
+            if mode == "framebuf":
+                import M5
+                if framebuf is None or not hasattr(M5.Lcd, "drawRawBuf"):
+                    return False
+                self.lcd = M5.Lcd
+                self.buf = bytearray(self.w * self.h * 2)
+                self.fb = framebuf.FrameBuffer(self.buf, self.w, self.h, framebuf.RGB565)
+                return True
+            if mode == "direct":
+                try:
+                    from m5stack import lcd
+                except ImportError:
+                    from M5 import Lcd as lcd
+                self.lcd = lcd
+                return True
+        except Exception as e:
+            print("canvas backend", mode, "unavailable:", e)
+        return False
+
+    # ------------------------------
+    # Dirty region
+    # ------------------------------
+    def mark(self, x, y, w, h):
+        x0 = max(0, int(x))
+        y0 = max(0, int(y))
+        x1 = min(self.w, int(x + w))
+        y1 = min(self.h, int(y + h))
+        if x0 >= x1 or y0 >= y1:
+            return
+        d = self.dirty
+        if d is None:
+            self.dirty = [x0, y0, x1, y1]
+        else:
+            d[0] = min(d[0], x0)
+            d[1] = min(d[1], y0)
+            d[2] = max(d[2], x1)
+            d[3] = max(d[3], y1)
+
+    # ------------------------------
+    # Drawing
+    # ------------------------------
+    def clear(self, color=0x000000):
+        self.fill_rect(0, 0, self.w, self.h, color)
+
+    def fill_rect(self, x, y, w, h, color):
+        x, y, w, h = int(x), int(y), int(w), int(h)
+        self.mark(x, y, w, h)
+        if self.mode == "m5":
+            self.surface.fillRect(x, y, w, h, color)
+        elif self.mode == "framebuf":
+            self.fb.fill_rect(x, y, w, h, rgb565(color))
+            self._later(("fill", x, y, w, h, color))
+        else:
+            self.lcd.fillRect(self.x + x, self.y + y, w, h, color)
+
+    def rect(self, x, y, w, h, color):
+        x, y, w, h = int(x), int(y), int(w), int(h)
+        self.mark(x, y, w, h)
+        if self.mode == "m5":
+            self.surface.drawRect(x, y, w, h, color)
+        elif self.mode == "framebuf":
+            self.fb.rect(x, y, w, h, rgb565(color))
+            self._later(("rect", x, y, w, h, color))
+        else:
+            self.lcd.rect(self.x + x, self.y + y, w, h, color)
+
+    def text(self, x, y, s, color):
+        x, y = int(x), int(y)
+        self.mark(x, y, len(s) * 8, 12)
+        if self.mode == "m5":
+            self.surface.setTextColor(color)
+            self.surface.drawString(s, x, y)
+        elif self.mode == "framebuf":
+            self.fb.text(s, x, y, rgb565(color))
+            self._later(("text", x, y, s, color))
+        else:
+            self.lcd.text(self.x + x, self.y + y, s, color)
+
+    def blit_raw(self, pixels, x, y, w, h):
+        """Copy a w*h big-endian RGB565 buffer (e.g. an atlas sprite) into the canvas, clipped."""
+        x, y = int(x), int(y)
+        self.mark(x, y, w, h)
+        if self.mode == "m5":
+            self.surface.drawRawBuf(pixels, x, y, w, h, len(pixels), False)
+            return
+        if self.mode == "direct":
+            self.lcd.drawRawBuf(pixels, self.x + x, self.y + y, w, h, len(pixels), False)
+            return
+        self._later(("raw", pixels, x, y, w, h))
+        sx0 = max(0, -x)
+        sx1 = min(w, self.w - x)
+        if sx0 >= sx1:
+            return
+        row_bytes = (sx1 - sx0) * 2
+        for row in range(max(0, -y), min(h, self.h - y)):
+            src = (row * w + sx0) * 2
+            dst = ((y + row) * self.w + x + sx0) * 2
+            self.buf[dst:dst + row_bytes] = pixels[src:src + row_bytes]
+
+    def image(self, path, x, y):
+        """Draw an image file. Returns False if this backend/firmware can't (caller draws a placeholder)."""
+        x, y = int(x), int(y)
+        if self.mode == "framebuf":
+            name = _sprite_name(path)
+            for atlas in _atlases:
+                if atlas.has(name):
+                    w, h = atlas.size(name)
+                    self.blit_raw(atlas.sprite(name), x, y, w, h)
+                    return True
+            # Not in an atlas: goes to the panel once the buffer is pushed
+            if self.late is None:
+                self.late = []
+            self.late.append(("image", path, x, y))
+            return True
+        try:
+            import imgcache
+            if self.mode == "m5":
+                # cached decoded sprite pushed onto ours; the file only on a miss
+                if not imgcache.draw(path, x, y, self.surface.drawImage, self.surface):
+                    return False
+                self.mark(x, y, self.w - x, self.h - y)
+                return True
+            return imgcache.draw(path, self.x + x, self.y + y)
+        except:
+            return False
+
+    def _later(self, op):
+        # Drawn over a late image: has to be repeated on the panel as well
+        if self.late is not None:
+            self.late.append(op)
+
+    def _draw_late(self):
+        late = self.late
+        self.late = None
+        self.late_draws = len(late)
+        lcd = self.lcd
+        for op in late:
+            kind = op[0]
+            try:
+                if kind == "image":
+                    import imgcache
+                    imgcache.draw(op[1], self.x + op[2], self.y + op[3])
+                elif kind == "fill":
+                    lcd.fillRect(self.x + op[1], self.y + op[2], op[3], op[4], op[5])
+                elif kind == "rect":
+                    lcd.drawRect(self.x + op[1], self.y + op[2], op[3], op[4], op[5])
+                elif kind == "text":
+                    lcd.setTextColor(op[4])
+                    lcd.drawString(op[3], self.x + op[1], self.y + op[2])
+                elif kind == "raw":
+                    pixels = op[1]
+                    lcd.drawRawBuf(pixels, self.x + op[2], self.y + op[3], op[4], op[5], len(pixels), False)
+            except Exception as e:
+                print("canvas late draw failed:", e)
+
+    # ------------------------------
+    # Present
+    # ------------------------------
+    def push(self, full=False):
+        """Send what changed since the last push to the panel in one transfer."""
+        if full:
+            self.dirty = [0, 0, self.w, self.h]
+        d = self.dirty
+        self.dirty = None
+        self.late_draws = 0
+        if self.late is not None and d is None:
+            self.pushes += 1
+            self._draw_late()
+            return
+        if d is None or self.mode == "direct":
+            return
+        self.pushes += 1
+        if self.mode == "m5":
+            # the sprite is pushed whole, still one transfer
+            self.surface.push(self.x, self.y)
+            self.pushed_bytes += self.w * self.h * 2
+            return
+        x0, y0, x1, y1 = d
+        w = x1 - x0
+        h = y1 - y0
+        if w == self.w:
+            # full-width rows are already contiguous
+            out = memoryview(self.buf)[y0 * self.w * 2:y1 * self.w * 2]
+        else:
+            out = bytearray(w * h * 2)
+            for row in range(h):
+                src = ((y0 + row) * self.w + x0) * 2
+                out[row * w * 2:(row + 1) * w * 2] = self.buf[src:src + w * 2]
+        self.lcd.drawRawBuf(out, self.x + x0, self.y + y0, w, h, len(out), False)
+        self.pushed_bytes += len(out)
+        if self.late is not None:
+            self._draw_late()
+
+    def delete(self):
+        if self.mode == "m5":
+            try:
+                import imgcache
+                imgcache.release(self.surface)
+                self.surface.delete()
+            except:
+                pass
+        self.surface = None
+        self.buf = None
+        self.fb = None
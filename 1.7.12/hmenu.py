@@ -2,13 +2,29 @@
 # Full Tkinter-style fidelity with smooth scroll
 
 import os
-import json
 import time
-import textwrap
-from m5stack import lcd, btnA, btnB, btnC
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+import store
+import netmon
+import imgcache
+import atlas
+import canvas
+import anim
+import assetindex
+import appregistry
+import audiosvc
+import appruntime
+import inputsvc
+import perfhud
+import powermon
+import powermgr
+import textcache
+from m5stack import lcd
 from uiflow import machine
 from machine import RTC
-import wifiCfg
 
 # ------------------------------
 # CONFIG
@@ -26,10 +42,10 @@ ICON_PADDING = 5
 TEXT_WIDTH = 80
 TEXT_MAX_LINES = 3
 STATUS_BAR_HEIGHT = 20
-OPENED_APPS_FILE = os.path.join(APPS_PATH, "opened_apps.json")
-LOCKED_FILE = os.path.join(APPS_PATH, "lockstate.json")
 
-ANIMATION_STEPS = 5
+ANIMATION_FPS = 30        # frame budget while the menu is scrolling
+SCROLL_MS = 200           # time for the menu to glide to a new selection
+LOOP_IDLE_MS = 50         # longest frame wait of the animation task
 TEXT_FONT_SIZE = 10
 HIGHLIGHT_X = 10
 
@@ -38,6 +54,23 @@ WIFI_ANIM_FILES = ["wifi0.png", "wifi1.png", "wifi2.png", "wifi3.png", "wifi4.pn
 CONNECT_ANIM_FILES = ["connect1.png", "connect2.png", "connect3.png", "connect2.png"]
 WIFI_LOCKED_FILE = "wifilocked.png"
 
+# All status bar icons packed into one file (tools/pack_atlas.py)
+STATUS_ATLAS = os.path.join(ASSETS_PATH, "statusbar.atlas")
+
+# Status bar widget areas (x, y, w, h) cleared when a widget changes
+WIFI_RECT = (0, 0, 40, STATUS_BAR_HEIGHT)
+CLOCK_RECT = (SCREEN_WIDTH//2 - 32, 0, 68, STATUS_BAR_HEIGHT)
+BATTERY_RECT = (SCREEN_WIDTH - 52, 0, 52, STATUS_BAR_HEIGHT)
+STATUS_ANIM_MS = 300      # Wi-Fi connect / critical battery frame time
+
+# Launcher tasks (see ENTRY LOOP)
+INPUT_MS = 20             # input task: how often queued keys/buttons are handled
+CLOCK_MS = 1000           # clock task
+SAMPLE_MS = 2000          # Wi-Fi/battery task when neither is animating
+JOBS_MS = 100             # background jobs task (store, netmon, audio)
+IDLE_AFTER_MS = 5000      # no input for this long: light sleep between tasks
+LIGHT_SLEEP_MS = 30       # one light sleep slice; presses are caught between them
+
 # Battery images
 BATTERY_FILES = ["battery1.png","battery2.png","battery3.png","battery4.png"]
 BATTERY_CHARGE_FILE = "batterycharge.png"
@@ -46,21 +79,12 @@ BAT_CRIT_FILES = ["batcritanim1.png","batcritanim2.png"]
 # ------------------------------
 # UTIL
 # ------------------------------
-def load_json_file(path):
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_json_file(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f)
-
 def run_python_app(path):
-    with open(path, "r") as f:
-        code = f.read()
-    exec(code, globals())
+    # Each app gets its own namespace; its timers and threads are torn
+    # down and its heap use recorded when it exits (appruntime.py).
+    # kb (keys from inputsvc) is the one launcher global apps have always
+    # relied on.
+    return appruntime.run(path, {"kb": kb})
 
 # ------------------------------
 # STATUS BAR
@@ -74,100 +98,117 @@ class StatusBar:
         self.battery_images = [os.path.join(ASSETS_PATH, f) for f in BATTERY_FILES]
         self.battery_charge_image = os.path.join(ASSETS_PATH, BATTERY_CHARGE_FILE)
         self.bat_crit_images = [os.path.join(ASSETS_PATH, f) for f in BAT_CRIT_FILES]
+        self.atlas = atlas.load(STATUS_ATLAS)
 
         self.connecting = True
-        self.wifi_index = 0
-        self.bat_crit_index = 0
         self.battery_level = 50
         self.charging = False
 
-    def draw(self):
-        lcd.fillRect(0, 0, SCREEN_WIDTH, STATUS_BAR_HEIGHT, lcd.BLACK)
+        # Last rendered state per widget; only widgets whose state
+        # changed are repainted
+        self.rendered = {}
+        self.repaints = 0
 
-        # --------------------
-        # Wi-Fi
-        # --------------------
-        wifi_img_path = None
+    def draw_icon(self, path, x, y):
+        # One resident atlas buffer; the PNG files are only a fallback
+        if self.atlas and self.atlas.blit(atlas.sprite_name(path), x, y):
+            return True
+        return imgcache.draw(path, x, y)
+
+    def anim_frame(self, frames):
+        return (time.ticks_ms() // STATUS_ANIM_MS) % len(frames)
+
+    # --------------------
+    # Widget state
+    # --------------------
+    def wifi_state(self):
         try:
-            sta_if = wifiCfg.getWiFiStatus()  # connected to router? returns dict with rssi
-            if not sta_if:
-                # Not connected to any Wi-Fi
+            # Cached by the background monitor, never blocks on the network
+            net = netmon.status()
+            if net == netmon.OFFLINE or net == netmon.CHECKING:
+                # Not connected yet / internet check still pending
                 self.connecting = True
-                wifi_img_path = self.connect_images[self.wifi_index % len(self.connect_images)]
-                self.wifi_index += 1
-            else:
-                self.connecting = False
-                # Check internet by simple GET request
-                internet_ok = False
-                try:
-                    import urequests
-                    urequests.get("http://clients3.google.com/generate_204", timeout=1)
-                    internet_ok = True
-                except:
-                    internet_ok = False
-                if internet_ok:
-                    # Show strength bars
-                    wifi_strength = min(max(int(sta_if['rssi'] / -20), 0), 4)
-                    wifi_img_path = self.wifi_images[wifi_strength]
-                else:
-                    # Connected to router but no internet
-                    wifi_img_path = self.wifi_locked
+                return self.connect_images[self.anim_frame(self.connect_images)]
+            self.connecting = False
+            if net == netmon.ONLINE:
+                # Show strength bars
+                wifi_strength = min(max(int(netmon.rssi() / -20), 0), 4)
+                return self.wifi_images[wifi_strength]
+            # Connected to router but no internet
+            return self.wifi_locked
         except:
             # fallback
             self.connecting = True
-            wifi_img_path = self.connect_images[self.wifi_index % len(self.connect_images)]
-            self.wifi_index += 1
+            return self.connect_images[self.anim_frame(self.connect_images)]
 
-        if wifi_img_path and os.path.exists(wifi_img_path):
-            lcd.image(5, 2, wifi_img_path)
-        else:
-            lcd.text(5, 2, "WiFi", lcd.WHITE)
+    def battery_state(self):
+        # Smoothed, cached readings; the ADC is sampled at powermon's rate
+        self.battery_level = powermon.level()
+        self.charging = powermon.charging()
 
-        # --------------------
-        # Battery
-        # --------------------
-        try:
-            self.battery_level = machine.battery()  # 0-100
-        except:
-            self.battery_level = 50
-        # Optionally detect charging
+        if powermon.critical():
+            # Critical animation
+            return self.bat_crit_images[self.anim_frame(self.bat_crit_images)]
+        if self.charging:
+            return self.battery_charge_image
+        # battery1-4, with hysteresis between them
+        return self.battery_images[powermon.bucket()]
+
+    def clock_state(self):
         try:
-            self.charging = machine.is_charging()
+            t = RTC().datetime()
+            return "{:02d}:{:02d}:{:02d}".format(t[4], t[5], t[6])
         except:
-            self.charging = False
+            return "00:00:00"
 
-        if self.battery_level < 10:
-            # Critical animation
-            bat_img_path = self.bat_crit_images[self.bat_crit_index % len(self.bat_crit_images)]
-            self.bat_crit_index += 1
-        elif self.charging:
-            bat_img_path = self.battery_charge_image
-        else:
-            # Map battery % to battery1-4
-            if self.battery_level < 25:
-                bat_img_path = self.battery_images[0]
-            elif self.battery_level < 50:
-                bat_img_path = self.battery_images[1]
-            elif self.battery_level < 75:
-                bat_img_path = self.battery_images[2]
-            else:
-                bat_img_path = self.battery_images[3]
+    # --------------------
+    # Widget painters
+    # --------------------
+    def paint_wifi(self, wifi_img_path):
+        if not (wifi_img_path and self.draw_icon(wifi_img_path, 5, 2)):
+            lcd.text(5, 2, "WiFi", lcd.WHITE)
 
-        if bat_img_path and os.path.exists(bat_img_path):
-            lcd.image(SCREEN_WIDTH-30, 2, bat_img_path)
-        else:
+    def paint_battery(self, bat_img_path):
+        if not (bat_img_path and self.draw_icon(bat_img_path, SCREEN_WIDTH-30, 2)):
             lcd.text(SCREEN_WIDTH-50, 2, "Bat:{}%".format(self.battery_level), lcd.WHITE)
 
-        # --------------------
-        # Clock
-        # --------------------
-        try:
-            t = RTC().datetime()
-            time_str = "{:02d}:{:02d}:{:02d}".format(t[4], t[5], t[6])
-        except:
-            time_str = "00:00:00"
+    def paint_clock(self, time_str):
         lcd.text(SCREEN_WIDTH//2 - 30, 2, time_str, lcd.WHITE)
 
+    def invalidate(self):
+        """Forget what is on screen, e.g. after lcd.clear()."""
+        self.rendered = {}
+
+    def animating(self):
+        """True while a widget shows an animation (connecting, critical battery)."""
+        return self.connecting or powermon.critical()
+
+    def draw(self, force=False, widgets=None):
+        """Repaint the widgets (all, or the names in widgets) whose state changed. Returns True if anything was drawn."""
+        if force or not self.rendered:
+            lcd.fillRect(0, 0, SCREEN_WIDTH, STATUS_BAR_HEIGHT, lcd.BLACK)
+            self.rendered = {}
+            widgets = None
+
+        changed = False
+        for name, state_fn, paint, rect in (
+            ("wifi", self.wifi_state, self.paint_wifi, WIFI_RECT),
+            ("battery", self.battery_state, self.paint_battery, BATTERY_RECT),
+            ("clock", self.clock_state, self.paint_clock, CLOCK_RECT),
+        ):
+            if widgets is not None and name not in widgets:
+                continue
+            state = state_fn()
+            if self.rendered.get(name) == state:
+                continue
+            if name in self.rendered:
+                lcd.fillRect(rect[0], rect[1], rect[2], rect[3], lcd.BLACK)
+            paint(state)
+            self.rendered[name] = state
+            self.repaints += 1
+            changed = True
+        return changed
+
 # ------------------------------
 # POWER "P" SPLASH HANDLER WITH TRUE FADE SIMULATION
 # ------------------------------
@@ -175,12 +216,17 @@ def handle_power_splash():
     offsplash = os.path.join(ASSETS_PATH, "offsplash.png")
     shutdown_sound = os.path.join(ASSETS_PATH, "shutdown.wav")
 
+    # Commit pending state before the power goes
+    store.flush()
+
     # --- Step 1: fade out menu to black ---
     try:
         import machine
     except:
         pass
 
+    # A hover sound still playing would hold the speaker: stop it now
+    audiosvc.stop()
     for level in range(10, -1, -1):  # brightness 10->0
         try:
             machine.screen_brightness(level)
@@ -190,23 +236,20 @@ def handle_power_splash():
 
     # --- Step 2: show splash image while black ---
     lcd.clear()
-    if os.path.exists(offsplash):
+    if assetindex.exists(offsplash):
         lcd.image(0, 0, offsplash)
 
     # --- Step 3: fade in splash ---
-    try:
-        # Play sound during fade-in
-        from m5stack import speaker
-        speaker.setVolume(100)
-        speaker.playWAV(shutdown_sound)
-    except:
-        pass
+    # Play sound during fade-in (streamed: audiosvc.tick() feeds it)
+    audiosvc.set_volume(100)
+    audiosvc.play(shutdown_sound, audiosvc.PRIO_SYSTEM)
 
     for level in range(0, 11):  # brightness 0->10
         try:
             machine.screen_brightness(level)
         except:
             pass
+        audiosvc.tick()
         time.sleep(0.03)  # ~0.33 seconds fade-in
 
     # --- Done, splash fully visible ---
@@ -219,38 +262,52 @@ class AppMenu:
         self.selected_index = 0
         self.scroll_offset = 0
         self.target_offset = 0
+        self.anim = anim.Animator(ANIMATION_FPS)
+        self.scroll = self.anim.tween(0, SCROLL_MS, anim.ease_out_cubic)
         self.last_aa_presses = []
-        if not os.path.exists(APPS_PATH):
-            os.mkdir(APPS_PATH)
-        self.app_files = [f for f in os.listdir(APPS_PATH) if f.endswith(".py")]
-        self.opened_apps = load_json_file(OPENED_APPS_FILE)
+        self.load_apps()
         self.status = StatusBar()
+        # Menu area below the status bar, drawn off-screen and pushed at once
+        # (main.py reserves it at boot and decodes the first icons onto it)
+        self.canvas = canvas.get(0, STATUS_BAR_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT - STATUS_BAR_HEIGHT)
+        canvas.add_atlas(self.status.atlas)
         self.load_icons()
         self.draw_menu()
+        # The startup sound main.py handed over keeps its volume
+        audiosvc.tick()
+        audiosvc.set_volume(100, after_current=True)
+        # Short hover sounds stay in RAM; the rest are streamed
+        audiosvc.preload([os.path.join(ASSETS_PATH, app["sound"]) for app in self.apps if app["sound"]])
+        self.play_hover_sound()
+
+    def load_apps(self):
+        # Registry entries (appregistry.py): one read instead of a folder scan
+        self.apps = appregistry.apps(store.get("settings", "app_sort", "name"))
+        self.app_files = [app["file"] for app in self.apps]
+        self.apps_scan = appregistry.scans
+        self.selected_index = min(self.selected_index, max(0, len(self.apps) - 1))
 
     def load_icons(self):
         self.icons = []
-        for app in self.app_files:
-            base_name = app[:-3]
-            icon_file = os.path.join(ASSETS_PATH, NEW_ICON_NAME) if base_name not in self.opened_apps else os.path.join(ASSETS_PATH, f"{base_name}.png")
-            if os.path.exists(icon_file):
-                self.icons.append(icon_file)
+        new_icon = os.path.join(ASSETS_PATH, NEW_ICON_NAME)
+        has_new_icon = assetindex.exists(new_icon)
+        for app in self.apps:
+            if not app["opened"]:
+                self.icons.append(new_icon if has_new_icon else None)
+            elif app["icon"]:
+                self.icons.append(os.path.join(ASSETS_PATH, app["icon"]))
             else:
                 self.icons.append(None)
 
     def draw_menu(self):
-        lcd.clear()
-        # Background
-        if os.path.exists(BACKGROUND_IMG):
-            try:
-                lcd.image(0, 0, BACKGROUND_IMG)
-            except:
-                lcd.clear()
-        # Status bar
-        self.status.draw()
-
-        # Icons
-        y = STATUS_BAR_HEIGHT + (SCREEN_HEIGHT - STATUS_BAR_HEIGHT - ICON_SIZE)//2 - 5
+        perfhud.frame_start()
+        c = self.canvas
+        c.clear()
+        # Background (the canvas starts below the status bar)
+        c.image(BACKGROUND_IMG, 0, -STATUS_BAR_HEIGHT)
+
+        # Icons (y is relative to the canvas)
+        y = (SCREEN_HEIGHT - STATUS_BAR_HEIGHT - ICON_SIZE)//2 - 5
         ICON_TOTAL = ICON_SIZE + ICON_PADDING
         positions = []
         current_x = 0
@@ -264,20 +321,11 @@ class AppMenu:
             else:
                 positions.append(current_x)
                 current_x += ICON_TOTAL
-        # Smooth scroll
+        # Smooth scroll: time-based tween, the main loop keeps drawing
+        # frames until it reaches the target
         self.target_offset = positions[self.selected_index] - HIGHLIGHT_X
-        self.scroll_offset += (self.target_offset - self.scroll_offset)/ANIMATION_STEPS
-
-        # --- Play hover sound ---
-        try:
-            from m5stack import speaker
-            current_app_name = self.app_files[self.selected_index][:-3]
-            sound_file = os.path.join(ASSETS_PATH, f"{current_app_name}.wav")
-            if os.path.exists(sound_file):
-                speaker.setVolume(100)
-                speaker.playWAV(sound_file)
-        except:
-            pass  # silently ignore if speaker not available or file missing
+        self.scroll.to(self.target_offset)
+        self.scroll_offset = self.scroll.value()
 
         for i, icon_path in enumerate(self.icons):
             x = positions[i] - self.scroll_offset
@@ -286,77 +334,219 @@ class AppMenu:
 
             # Highlighted icon
             if i == self.selected_index:
-                lcd.rect(x-2, y-2, ICON_SIZE + TEXT_WIDTH, ICON_SIZE + 4, lcd.YELLOW)
+                c.rect(x-2, y-2, ICON_SIZE + TEXT_WIDTH, ICON_SIZE + 4, lcd.YELLOW)
                 name = self.app_files[i][:-3]
-                lines = textwrap.wrap(name, width=10)[:TEXT_MAX_LINES]
+                # Wrapped once per name, not on every frame
+                lines = textcache.wrap(name, TEXT_WIDTH)[:TEXT_MAX_LINES]
                 for idx, line in enumerate(lines):
-                    lcd.text(x + ICON_SIZE + 2, y + idx*12, line, lcd.WHITE)
+                    c.text(x + ICON_SIZE + 2, y + idx*12, line, lcd.WHITE)
 
             # Draw icon
-            if icon_path and os.path.exists(icon_path):
-                lcd.image(x, y, icon_path)
-            else:
-                lcd.rect(x, y, ICON_SIZE, ICON_SIZE, lcd.WHITE)
+            if not (icon_path and c.image(icon_path, x, y)):
+                c.rect(x, y, ICON_SIZE, ICON_SIZE, lcd.WHITE)
+
+        # One transfer for the whole menu area
+        c.push()
+        # Status bar: a direct canvas, or images a framebuf canvas drew
+        # on the panel, may have put the background over it
+        self.status.draw(force=(c.mode == "direct" or c.late_draws > 0))
+        perfhud.frame_end()
+
+    def play_hover_sound(self):
+        # Only queued here: audiosvc.tick() in the main loop opens and streams
+        # it, and a newer hover sound cuts this one off
+        if not self.apps:
+            return
+        sound = self.apps[self.selected_index]["sound"]
+        if sound:
+            audiosvc.play(os.path.join(ASSETS_PATH, sound))
+
+    def animate(self):
+        """Draw the next scroll frame if one is due. Call every main-loop pass."""
+        if self.anim.begin_frame():
+            self.draw_menu()
+            self.anim.end_frame()
 
     def move_left(self):
         self.selected_index = max(0, self.selected_index-1)
         self.draw_menu()
+        self.play_hover_sound()
 
     def move_right(self):
         self.selected_index = min(len(self.app_files)-1, self.selected_index+1)
         self.draw_menu()
+        self.play_hover_sound()
 
     def launch_app(self):
         if not self.app_files:
             return
         path = os.path.join(APPS_PATH, self.app_files[self.selected_index])
-        run_python_app(path)
-        name = self.app_files[self.selected_index][:-3]
-        if name not in self.opened_apps:
-            self.opened_apps.append(name)
-            save_json_file(OPENED_APPS_FILE, self.opened_apps)
+        # Nothing feeds the stream while the app runs; free the speaker for it
+        audiosvc.stop()
+        # Keys reach the app's own keyboard callbacks unless it reads kb
+        inputsvc.clear()
+        inputsvc.capture_keys(False)
+        report = run_python_app(path)
+        inputsvc.clear()
+        inputsvc.capture_keys(True)
+        # Wake locks the app forgot to release end with it
+        powermgr.release_all()
+        powermgr.activity()
+        # The app drew over the whole screen
+        self.status.invalidate()
+        name = self.apps[self.selected_index]["name"]
+        first = appregistry.record_launch(name)
+        appregistry.record_heap(name, report)
+        if appregistry.scans != self.apps_scan:
+            # The app installed or removed apps (App Manager)
+            self.load_apps()
+            first = True
+        if first:
+            # First launch: the "New App!" icon becomes the app's own
             self.load_icons()
-            self.draw_menu()
+        self.draw_menu()
 
     def handle_triple_a(self):
         self.last_aa_presses.append(time.ticks_ms())
         self.last_aa_presses = self.last_aa_presses[-3:]
         if len(self.last_aa_presses) == 3 and (self.last_aa_presses[-1] - self.last_aa_presses[0]) < 2000:
-            save_json_file(LOCKED_FILE, {"locked": True})
+            store.put("launcher_lock", "locked", True)
+            store.flush()
             machine.reset()
 
 # ------------------------------
-# ENTRY LOOP
+# LAUNCHER TASKS
 # ------------------------------
-menu = AppMenu()
-
-while True:
-    # --- Keyboard P key handler ---
-    try:
-        import m5stack
-        kb = m5stack.machine.Keyboard()
-        key = kb.get_key()
+# Each job runs at its own rate on the uasyncio scheduler instead of one
+# polling loop doing everything every pass. Apps and the power splash
+# block the loop while they run; the tasks pick up where they were.
+redraw = asyncio.Event()     # set when the menu has a new scroll target
+last_input = time.ticks_ms()
+
+async def input_task(menu):
+    global last_input
+    while True:
+        # --- Keyboard P key handler ---
+        key = inputsvc.get_key()
+        handled = bool(key)
         if key == "p":
             handle_power_splash()
-    except:
-        pass
+            menu.status.invalidate()
+            perfhud.restart()
+        elif key == "h":
+            # Performance overlay; turning it off repaints what it covered
+            if not perfhud.toggle():
+                menu.draw_menu()
+
+        # --- Button A (left) --- held: auto-repeat; only real presses count
+        # towards the triple-A lock
+        event = inputsvc.take("A")
+        if event:
+            menu.move_left()
+            if event == inputsvc.PRESS:
+                menu.handle_triple_a()
+            handled = True
+
+        # --- Button B (enter/open) ---
+        if inputsvc.take("B") == inputsvc.PRESS:
+            menu.launch_app()
+            handled = True
+
+        # --- Button C (right) ---
+        if inputsvc.take("C"):
+            menu.move_right()
+            handled = True
+
+        if handled:
+            last_input = time.ticks_ms()
+            redraw.set()
+        perfhud.loop(INPUT_MS)
+        await asyncio.sleep_ms(INPUT_MS)
+
+async def animation_task(menu):
+    while True:
+        if not menu.anim.active():
+            # Nothing moving: sleep until the input task moves the menu
+            await redraw.wait()
+            redraw.clear()
+        menu.animate()
+        await asyncio.sleep_ms(menu.anim.ms_to_next_frame(LOOP_IDLE_MS))
+
+async def clock_task(menu):
+    while True:
+        if powermgr.state() != powermgr.OFF:
+            menu.status.draw(widgets=("clock",))
+        await asyncio.sleep_ms(CLOCK_MS)
+
+async def sample_task(menu):
+    while True:
+        if powermgr.state() != powermgr.OFF:
+            menu.status.draw(widgets=("wifi", "battery"))
+        await asyncio.sleep_ms(STATUS_ANIM_MS if menu.status.animating() else SAMPLE_MS)
+
+async def jobs_task():
+    while True:
+        netmon.tick()
+        store.tick()
+        audiosvc.tick()
+        perfhud.tick()
+        await asyncio.sleep_ms(audiosvc.POLL_MS if audiosvc.streaming() else JOBS_MS)
+
+def light_sleep(ms):
+    try:
+        import machine as hw
+        hw.lightsleep(ms)
+        return True
+    except Exception as e:
+        print("Light sleep unavailable:", e)
+        return False
+
+async def idle_task(menu):
+    # The scheduler has nothing to do most of the time: spend it in light
+    # sleep in short slices so the input timer still sees button presses.
+    # Not while netmon's thread or a Wi-Fi link is up: sleep stops both
+    while True:
+        await asyncio.sleep_ms(INPUT_MS)
+        if (time.ticks_diff(time.ticks_ms(), last_input) < IDLE_AFTER_MS
+                or menu.anim.active() or audiosvc.busy() or inputsvc.pending()
+                or not powermgr.can_sleep() or perfhud.enabled or netmon.busy()):
+            continue
+        if not light_sleep(LIGHT_SLEEP_MS):
+            return
+
+async def launcher(menu):
+    tasks = [
+        asyncio.create_task(input_task(menu)),
+        asyncio.create_task(animation_task(menu)),
+        asyncio.create_task(clock_task(menu)),
+        asyncio.create_task(sample_task(menu)),
+        asyncio.create_task(jobs_task()),
+    ]
+    if store.get("settings", "light_sleep", True):
+        tasks.append(asyncio.create_task(idle_task(menu)))
+    await asyncio.gather(*tasks)
 
-    # --- Button A (left) ---
-    if btnA.isPressed():
-        menu.move_left()
-        menu.handle_triple_a()
-        time.sleep(0.2)
-
-    # --- Button B (enter/open) ---
-    if btnB.isPressed():
-        menu.launch_app()
-        time.sleep(0.2)
-
-    # --- Button C (right) ---
-    if btnC.isPressed():
-        menu.move_right()
-        time.sleep(0.2)
-
-    # --- Status bar redraw ---
-    menu.status.draw()
-    time.sleep(0.05)
+# ------------------------------
+# ENTRY LOOP
+# ------------------------------
+netmon.configure(interval_ms=store.get("settings", "net_probe_interval", 30) * 1000)
+netmon.start()
+imgcache.set_budget(store.get("settings", "image_cache_kb", 128) * 1024)
+audiosvc.CACHE_BUDGET = store.get("settings", "sound_cache_kb", 96) * 1024
+powermon.configure(sample_ms=store.get("settings", "battery_sample_s", 10) * 1000)
+menu = AppMenu()
+# Keys and buttons are polled in the background (inputsvc.py) and
+# queued, so presses made during a redraw are not lost
+inputsvc.start()
+kb = inputsvc.Keyboard()
+# Dim, then switch off the backlight and slow the CPU when idle
+powermgr.configure(
+    brightness=store.get("settings", "brightness", 80),
+    dim_after_ms=store.get("settings", "dim_after_s", 30) * 1000,
+    off_after_ms=store.get("settings", "screen_off_s", 60) * 1000,
+    enabled=store.get("settings", "power_save", True),
+)
+powermgr.start()
+if store.get("settings", "perf_hud", False):
+    perfhud.enable()
+asyncio.run(launcher(menu))
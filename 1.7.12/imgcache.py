@@ -0,0 +1,199 @@
+# Fyre-OS decoded image cache
+# Keeps decoded RGB565 sprites of PNG/BMP assets in RAM so redraws
+# push pixels instead of opening and decoding the file again:
+#   imgcache.draw("/sd/assets/wifi3.png", 5, 2)
+#   imgcache.draw(path, x, y, target=sprite)  # onto an off-screen canvas
+# Sprites are evicted least-recently-used once their total size passes
+# the byte budget. Firmware without canvas support (UIFlow 1) falls
+# back to drawing straight from the file.
+
+import os
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+BUDGET_BYTES = 128 * 1024
+USE_PSRAM = True
+
+# ------------------------------
+# STATE
+# ------------------------------
+_sprites = {}   # path, or (path, target) -> (canvas, bytes)
+_order = []     # least recently used first
+_sizes = {}     # path -> (w, h) or None when it can't be cached
+used_bytes = 0
+hits = 0
+misses = 0
+evictions = 0
+direct = 0      # draws that went straight to the panel
+
+# ------------------------------
+# BACKENDS
+# ------------------------------
+def _new_canvas(w, h, target=None):
+    # A canvas made by target.newCanvas() pushes onto target
+    try:
+        if target is None:
+            import M5
+            target = M5.Lcd
+        return target.newCanvas(w, h, 16, USE_PSRAM)
+    except:
+        return None
+
+def _free_canvas(canvas):
+    try:
+        canvas.delete()
+    except:
+        pass
+
+def _draw_file(path, x, y):
+    try:
+        from m5stack import lcd
+        lcd.image(x, y, path)
+    except ImportError:
+        import M5
+        M5.Lcd.drawImage(path, x, y)
+
+# ------------------------------
+# UTIL
+# ------------------------------
+def image_size(path):
+    """Width and height from the PNG/BMP header, or None for other formats."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(26)
+    except:
+        return None
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+    if head[:2] == b"BM" and len(head) >= 26:
+        return int.from_bytes(head[18:22], "little"), abs(int.from_bytes(head[22:26], "little"))
+    return None
+
+def _key(path, target):
+    return path if target is None else (path, target)
+
+def _path_of(key):
+    return key[0] if isinstance(key, tuple) else key
+
+def _touch(key):
+    if key in _order:
+        _order.remove(key)
+    _order.append(key)
+
+def _drop(key):
+    global used_bytes
+    canvas, nbytes = _sprites.pop(key)
+    _free_canvas(canvas)
+    used_bytes -= nbytes
+    _order.remove(key)
+
+def _evict_until(free_needed):
+    global evictions
+    while _order and used_bytes + free_needed > BUDGET_BYTES:
+        _drop(_order[0])
+        evictions += 1
+
+def _load(path, target=None):
+    """Decode path into a new sprite, or return None if it can't be cached."""
+    global used_bytes
+    if path not in _sizes:
+        _sizes[path] = image_size(path)
+    size = _sizes[path]
+    if size is None:
+        return None
+    w, h = size
+    nbytes = w * h * 2
+    if nbytes > BUDGET_BYTES:
+        return None
+    _evict_until(nbytes)
+    canvas = _new_canvas(w, h, target)
+    if canvas is None:
+        _sizes[path] = None
+        return None
+    try:
+        canvas.drawImage(path, 0, 0)
+    except Exception as e:
+        print("imgcache decode failed:", path, e)
+        _free_canvas(canvas)
+        _sizes[path] = None
+        return None
+    _sprites[_key(path, target)] = (canvas, nbytes)
+    used_bytes += nbytes
+    return canvas
+
+# ------------------------------
+# API
+# ------------------------------
+def draw(path, x, y, fallback=None, target=None):
+    """Draw an image at x, y (on the panel, or on target). Returns False if it could not be drawn."""
+    global hits, misses, direct
+    key = _key(path, target)
+    entry = _sprites.get(key)
+    if entry:
+        hits += 1
+        _touch(key)
+        entry[0].push(x, y)
+        return True
+    misses += 1
+    try:
+        canvas = _load(path, target)
+        if canvas is not None:
+            _touch(key)
+            canvas.push(x, y)
+            return True
+        os.stat(path)
+    except:
+        return False
+    direct += 1
+    try:
+        if fallback:
+            fallback(path, x, y)
+        else:
+            _draw_file(path, x, y)
+        return True
+    except:
+        return False
+
+def preload(paths, target=None):
+    for path in paths:
+        key = _key(path, target)
+        if key not in _sprites:
+            try:
+                if _load(path, target) is not None:
+                    _touch(key)
+            except:
+                pass
+
+def invalidate(path=None):
+    for key in list(_sprites):
+        if path is None or _path_of(key) == path:
+            _drop(key)
+    if path is None:
+        _sizes.clear()
+    else:
+        _sizes.pop(path, None)
+
+def release(target):
+    """Free the sprites made for target (before deleting it)."""
+    for key in list(_sprites):
+        if isinstance(key, tuple) and key[1] is target:
+            _drop(key)
+
+def set_budget(nbytes):
+    global BUDGET_BYTES
+    BUDGET_BYTES = nbytes
+    _evict_until(0)
+
+def stats():
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "direct": direct,
+        "evictions": evictions,
+        "sprites": len(_sprites),
+        "bytes": used_bytes,
+        "budget": BUDGET_BYTES,
+        "hit_rate": (hits * 100 // total) if total else 0,
+    }
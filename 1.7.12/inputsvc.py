@@ -0,0 +1,285 @@
+# Fyre-OS input service
+# One keyboard and one set of button drivers for the launcher and apps.
+# A Timer polls them every POLL_MS into a ring buffer, so presses made
+# while the screen is redrawing are queued, not lost:
+#   inputsvc.start()
+#   while True:
+#       if inputsvc.take("A"): move_left()      # press or auto-repeat
+#       key = inputsvc.get_key()                 # next key or None
+# Buttons are debounced (DEBOUNCE_MS) and repeat while held
+# (REPEAT_DELAY_MS, then every REPEAT_MS), so loops need no sleeps to
+# slow them down. Events are (kind, code, ticks_ms) with kind one of
+# KEY, PRESS, REPEAT (and RELEASE when enabled).
+# Keys are only read from the keyboard while capture is on: apps that
+# talk to the keyboard driver themselves keep getting their keys.
+# Without a free Timer every call polls first, which still debounces.
+# event_hook(kind, code) sees every new event first and drops it by
+# returning True (powermgr: the press that only woke the screen);
+# poll_hook() runs after every poll.
+
+import time
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+DEBOUNCE_MS = 20
+REPEAT_DELAY_MS = 400
+REPEAT_MS = 150
+POLL_MS = 10
+RING_SIZE = 32
+TIMER_ID = 3
+KEYS_PER_POLL = 4
+REPORT_RELEASE = False
+
+KEY = "key"
+PRESS = "press"
+REPEAT = "repeat"
+RELEASE = "release"
+
+# ------------------------------
+# STATE
+# ------------------------------
+_ring = [None] * RING_SIZE
+_head = 0
+_count = 0
+_busy = False       # ring being changed: a poll landing now waits for the next one
+_kb = None
+_read_key = None
+_buttons = []
+_timer = None
+_started = False
+_capture = True
+event_hook = None
+poll_hook = None
+dropped = 0
+polls = 0
+
+# ------------------------------
+# RING
+# ------------------------------
+def _push(kind, code, now):
+    global _count, _head, dropped
+    if _count == RING_SIZE:
+        # Full: the oldest event goes
+        _head = (_head + 1) % RING_SIZE
+        _count -= 1
+        dropped += 1
+    _ring[(_head + _count) % RING_SIZE] = (kind, code, now)
+    _count += 1
+
+def _emit(kind, code, now):
+    if event_hook is not None:
+        try:
+            if event_hook(kind, code):
+                return
+        except:
+            pass
+    _push(kind, code, now)
+
+def _pop(match):
+    """Remove and return the first event match(event) accepts."""
+    global _count, _head, _busy
+    _busy = True
+    try:
+        for i in range(_count):
+            event = _ring[(_head + i) % RING_SIZE]
+            if not match(event):
+                continue
+            if i == 0:
+                _ring[_head] = None
+                _head = (_head + 1) % RING_SIZE
+            else:
+                for j in range(i, _count - 1):
+                    _ring[(_head + j) % RING_SIZE] = _ring[(_head + j + 1) % RING_SIZE]
+                _ring[(_head + _count - 1) % RING_SIZE] = None
+            _count -= 1
+            return event
+        return None
+    finally:
+        _busy = False
+
+# ------------------------------
+# DRIVERS
+# ------------------------------
+class Button:
+    def __init__(self, name, hw):
+        self.name = name
+        self.hw = hw
+        self.raw = False
+        self.raw_since = 0
+        self.down = False
+        self.next_repeat = 0
+
+    def update(self, now):
+        try:
+            raw = bool(self.hw.isPressed())
+        except:
+            return
+        if raw != self.raw:
+            self.raw = raw
+            self.raw_since = now
+            return
+        if raw != self.down and time.ticks_diff(now, self.raw_since) >= DEBOUNCE_MS:
+            self.down = raw
+            if raw:
+                _emit(PRESS, self.name, now)
+                self.next_repeat = time.ticks_add(now, REPEAT_DELAY_MS)
+            elif REPORT_RELEASE:
+                _emit(RELEASE, self.name, now)
+            return
+        if self.down and REPEAT_MS and time.ticks_diff(now, self.next_repeat) >= 0:
+            _emit(REPEAT, self.name, now)
+            self.next_repeat = time.ticks_add(now, REPEAT_MS)
+
+def _init_drivers():
+    global _kb, _read_key
+    try:
+        import m5stack
+        for name in ("A", "B", "C"):
+            hw = getattr(m5stack, "btn" + name, None)
+            if hw is not None:
+                _buttons.append(Button(name, hw))
+    except Exception as e:
+        print("Input buttons unavailable:", e)
+    try:
+        import m5stack
+        _kb = m5stack.machine.Keyboard()
+    except:
+        try:
+            import M5
+            _kb = M5.M5Keyboard
+        except:
+            _kb = None
+    if _kb is not None:
+        _read_key = getattr(_kb, "get_key", None) or getattr(_kb, "getKey", None)
+
+# ------------------------------
+# POLLING
+# ------------------------------
+def poll():
+    """Read the drivers into the ring. Runs from the Timer; safe to call from loops too."""
+    global polls
+    if _busy or not _started:
+        return
+    polls += 1
+    now = time.ticks_ms()
+    for button in _buttons:
+        button.update(now)
+    if _capture and _read_key:
+        for _ in range(KEYS_PER_POLL):
+            try:
+                key = _read_key()
+            except:
+                break
+            if not key:
+                break
+            _emit(KEY, key, now)
+    if poll_hook is not None:
+        try:
+            poll_hook()
+        except:
+            pass
+
+def _poll_now():
+    # Without the Timer nothing fills the ring in the background
+    if _timer is None:
+        poll()
+
+def start(use_timer=True):
+    """Create the drivers (once) and start background polling. Returns True with a Timer."""
+    global _timer, _started
+    if not _started:
+        _init_drivers()
+        _started = True
+    if use_timer and _timer is None:
+        try:
+            from machine import Timer
+            _timer = Timer(TIMER_ID)
+            _timer.init(period=POLL_MS, mode=Timer.PERIODIC, callback=lambda t: poll())
+        except Exception as e:
+            print("Input timer unavailable, polling from loops:", e)
+            _timer = None
+    return _timer is not None
+
+def stop():
+    global _timer
+    if _timer is not None:
+        try:
+            _timer.deinit()
+        except:
+            pass
+        _timer = None
+
+# ------------------------------
+# API
+# ------------------------------
+def get(kind=None, code=None):
+    """Next event (kind, code, ticks_ms), optionally only of one kind/code, or None."""
+    _poll_now()
+    return _pop(lambda e: (kind is None or e[0] == kind) and (code is None or e[1] == code))
+
+def take(button):
+    """PRESS or REPEAT if button has one queued (consumed), else None."""
+    _poll_now()
+    event = _pop(lambda e: e[1] == button and (e[0] == PRESS or e[0] == REPEAT))
+    return event[0] if event else None
+
+def get_key():
+    """Next key from the keyboard, or None. Turns key capture on."""
+    capture_keys(True)
+    _poll_now()
+    event = _pop(lambda e: e[0] == KEY)
+    return event[1] if event else None
+
+def is_down(button):
+    for b in _buttons:
+        if b.name == button:
+            return b.down
+    return False
+
+def capture_keys(on):
+    """Off while an app reads the keyboard driver itself (callbacks), so the service doesn't eat its keys."""
+    global _capture
+    _capture = on
+
+def capturing():
+    return _started and _capture and _read_key is not None
+
+def clear():
+    global _head, _count, _busy
+    _busy = True
+    for i in range(RING_SIZE):
+        _ring[i] = None
+    _head = 0
+    _count = 0
+    _busy = False
+
+def configure(debounce_ms=None, repeat_delay_ms=None, repeat_ms=None):
+    global DEBOUNCE_MS, REPEAT_DELAY_MS, REPEAT_MS
+    if debounce_ms is not None:
+        DEBOUNCE_MS = debounce_ms
+    if repeat_delay_ms is not None:
+        REPEAT_DELAY_MS = repeat_delay_ms
+    if repeat_ms is not None:
+        REPEAT_MS = repeat_ms
+
+def pending():
+    return _count
+
+def stats():
+    return {
+        "queued": _count,
+        "dropped": dropped,
+        "polls": polls,
+        "timer": _timer is not None,
+        "keyboard": _kb is not None,
+        "buttons": len(_buttons),
+    }
+
+class Keyboard:
+    """Drop-in for the old launcher 'kb' object: keys come from the service."""
+    def get_key(self):
+        return get_key()
+
+    def getKey(self):
+        return get_key()
@@ -1,20 +1,108 @@
 import os
+import sys
 import json
 import time
 from M5 import *
 from M5Stack import Speaker
 
+# System modules (boottrace, ...) live next to hmenu.py on the SD card
+if "/sd" not in sys.path:
+    sys.path.append("/sd")
+
 # -------------------------------------------------------
 # Paths
 # -------------------------------------------------------
+ASSETS_DIR = "/sd/assets"
+APPS_DIR = "/sd/apps"
 SPLASH = "/sd/assets/splash.png"
 LOCKED = "/sd/assets/locked.png"
 AUDIO = "/sd/assets/startup.wav"
 SETTINGS = "/sd/settings.json"
 LOCKCACHE = "/sd/lockstate.json"
+LOCK_POLL_MS = 100
+# What hmenu.py draws first: its menu canvas (below the 20 px status
+# bar), background and icons. The preload decodes these onto that canvas.
+MENU_AREA = (0, 20, 240, 115)
+MENU_BACKGROUND = "/sd/assets/backgrounddev.png"
+NEW_APP_ICON = "New App!.png"
+BOOT_ICONS = 5
 
 SYSTEM_PASSWORD = "jal190413"
 MAX_AUDIO_TIME = 5
+FADE_FRAME_MS = 20
+
+# -------------------------------------------------------
+# Boot tracer (no-op stand-in if it can't be loaded)
+# -------------------------------------------------------
+class NoTrace:
+    def begin(self, name): pass
+    def end(self): pass
+    def read(self, path, nbytes=None): pass
+    def note(self, key, value): pass
+    def asset(self, key, path): pass
+    def commit(self): pass
+
+try:
+    from boottrace import BootTrace
+    trace = BootTrace()
+except Exception as e:
+    print("Boot trace unavailable:", e)
+    trace = NoTrace()
+
+try:
+    import appcache
+except Exception as e:
+    print("App cache unavailable:", e)
+    appcache = None
+
+try:
+    import store
+    store.read_hook = trace.read
+except Exception as e:
+    print("Store unavailable:", e)
+    store = None
+
+try:
+    import imgcache
+except Exception as e:
+    print("Image cache unavailable:", e)
+    imgcache = None
+
+try:
+    import canvas
+except Exception as e:
+    print("Canvas unavailable:", e)
+    canvas = None
+
+try:
+    import assetindex
+except Exception as e:
+    print("Asset index unavailable:", e)
+    assetindex = None
+
+try:
+    import appregistry
+except Exception as e:
+    print("App registry unavailable:", e)
+    appregistry = None
+
+try:
+    import audiosvc
+except Exception as e:
+    print("Audio service unavailable:", e)
+    audiosvc = None
+
+try:
+    import powermgr
+except Exception as e:
+    print("Power manager unavailable:", e)
+    powermgr = None
+
+try:
+    from bootsched import BootScheduler
+except Exception as e:
+    print("Boot scheduler unavailable:", e)
+    BootScheduler = None
 
 # -------------------------------------------------------
 # Utility: safe file load
@@ -22,14 +110,35 @@ MAX_AUDIO_TIME = 5
 def safe_json_load(path, default):
     try:
         with open(path, "r") as f:
-            return json.load(f)
+            data = json.load(f)
+        trace.read(path)
+        return data
     except:
         return default
 
+def asset_exists(path):
+    # One listing of the folder instead of a lookup per file
+    if assetindex:
+        return assetindex.exists(path)
+    return os.path.exists(path)
+
+def draw_image(screen, path):
+    if imgcache:
+        return imgcache.draw(path, 0, 0, lambda p, x, y: screen.drawImage(p, x, y))
+    screen.drawImage(path, 0, 0)
+    return True
+
+def load_doc(ns, path, default):
+    # Through the store the launcher and apps reuse what boot already read
+    if store:
+        return store.load(ns, default)
+    return safe_json_load(path, default)
+
 # -------------------------------------------------------
 # Load settings
 # -------------------------------------------------------
-settings = safe_json_load(SETTINGS, {
+trace.begin("settings")
+settings = load_doc("settings", SETTINGS, {
     "theme": "dark",
     "volume": 5,
     "boot_app": "hmenu.py",
@@ -40,47 +149,155 @@ settings = safe_json_load(SETTINGS, {
 # Save/load lock state
 # -------------------------------------------------------
 def write_lockstate(is_locked):
+    if store:
+        store.put("lock", "locked", is_locked)
+        store.flush("lock")
+        return
     data = {"locked": is_locked}
     with open(LOCKCACHE, "w") as f:
         json.dump(data, f)
 
 def read_lockstate():
-    data = safe_json_load(LOCKCACHE, {"locked": False})
+    data = load_doc("lock", LOCKCACHE, {"locked": False})
     return data.get("locked", False)
 
 # -------------------------------------------------------
-# Splash fade
+# Boot tasks
+# Generators run side by side by bootsched: each step yields
+# the number of ms to wait before its next step.
 # -------------------------------------------------------
-def show_splash_fade():
+def splash_fade_task():
     screen = M5Screen()
     screen.clean()
-    if not os.path.exists(SPLASH):
+    if not asset_exists(SPLASH):
         return
     try:
-        screen.drawImage(SPLASH, 0, 0)
-        for opacity in range(255, -1, -10):
-            screen.fillRectAlpha(0, 0, 10000, 10000, 0x000000, opacity)
-            time.sleep(0.02)
+        trace.read(SPLASH)
+        draw_image(screen, SPLASH)
     except Exception as e:
         print("Splash error:", e)
+        return
+    for opacity in range(255, -1, -10):
+        try:
+            screen.fillRectAlpha(0, 0, 10000, 10000, 0x000000, opacity)
+        except Exception as e:
+            print("Splash error:", e)
+            break
+        yield FADE_FRAME_MS
+    # Shown once per boot: give its RAM back to the launcher's images
+    if imgcache:
+        imgcache.invalidate(SPLASH)
 
-# -------------------------------------------------------
-# Startup sound
-# -------------------------------------------------------
-def play_startup_sound():
-    if not os.path.exists(AUDIO):
+def startup_sound_task():
+    if not asset_exists(AUDIO):
+        return
+    if audiosvc:
+        # Streamed a chunk per step, so the other boot tasks keep running
+        trace.read(audiosvc.source(AUDIO))
+        audiosvc.set_volume(settings.get("volume", 5) * 10)
+        audiosvc.play(AUDIO, audiosvc.PRIO_SYSTEM)
+        start = time.ticks_ms()
+        while True:
+            audiosvc.tick()
+            if not audiosvc.busy():
+                break
+            if time.ticks_diff(time.ticks_ms(), start) > MAX_AUDIO_TIME * 1000:
+                audiosvc.stop()
+                break
+            yield audiosvc.POLL_MS
         return
     try:
+        trace.read(AUDIO)
         Speaker.setVolume(settings.get("volume", 5) * 10)
         Speaker.playWAV(AUDIO, loop=False)
-        start = time.time()
-        while Speaker.isPlaying():
-            if time.time() - start > MAX_AUDIO_TIME:
+    except Exception as e:
+        print("Audio error:", e)
+        return
+    start = time.ticks_ms()
+    while True:
+        try:
+            if not Speaker.isPlaying():
+                break
+            if time.ticks_diff(time.ticks_ms(), start) > MAX_AUDIO_TIME * 1000:
                 Speaker.stop()
                 break
-            time.sleep(0.05)
+        except Exception as e:
+            print("Audio error:", e)
+            break
+        yield 50
+
+# Filled by preload_task; launch_boot_app() runs this code instead of
+# reading the app again. The launcher's registry, asset listing and
+# decoded icons are kept by the shared modules (appregistry, assetindex,
+# imgcache, canvas) and picked up from there.
+BOOT_PRELOAD = {}
+
+def menu_images():
+    paths = [MENU_BACKGROUND]
+    order = settings.get("app_sort", "name")
+    for app in appregistry.apps(order)[:BOOT_ICONS]:
+        icon = app["icon"] if app["opened"] else NEW_APP_ICON
+        if icon:
+            paths.append(ASSETS_DIR + "/" + icon)
+    return paths
+
+def preload_task():
+    app = settings.get("boot_app", "hmenu.py")
+    path = "/sd/" + app
+    trace.note("boot_app", app)
+    if not os.path.exists(path):
+        return
+    trace.asset("app_size", path)
+    BOOT_PRELOAD["code"] = load_app_code(path)
+    if app != "hmenu.py":
+        return
+    yield 0
+    if assetindex:
+        # Shared module: the launcher's lookups are answered from this listing
+        try:
+            assetindex.names(ASSETS_DIR)
+        except Exception as e:
+            print("Preload error:", e)
+    yield 0
+    if appregistry:
+        # The app list the launcher starts from (needs the asset listing)
+        try:
+            appregistry.refresh()
+        except Exception as e:
+            print("Preload error:", e)
+            return
+    if not (appregistry and canvas and imgcache):
+        return
+    # The menu's background and first icons, decoded onto the canvas
+    # the launcher will draw on, one image per step
+    try:
+        target = canvas.reserve(*MENU_AREA).surface
+        paths = menu_images()
     except Exception as e:
-        print("Audio error:", e)
+        print("Preload error:", e)
+        return
+    for path in paths:
+        yield 0
+        imgcache.preload([path], target)
+
+def run_boot_tasks(tasks):
+    """tasks: (name, generator, background); background ones aren't waited for."""
+    if BootScheduler:
+        sched = BootScheduler(None if isinstance(trace, NoTrace) else trace)
+        for name, gen, background in tasks:
+            sched.add(name, gen, background)
+        sched.run()
+        return
+    # No scheduler: run the same tasks one after another, background
+    # ones only up to their first wait
+    for name, gen, background in tasks:
+        try:
+            for delay in gen:
+                if background:
+                    break
+                time.sleep_ms(delay or 0)
+        except Exception as e:
+            print("Boot task {} failed: {}".format(name, e))
 
 # -------------------------------------------------------
 # Password prompt
@@ -125,29 +342,66 @@ def lock_screen_startup():
         time.sleep(0.05)
 
     if hold_time >= 1500:
-        # RST held → password prompt
+        # RST held → password prompt; boot goes on once it is unlocked
         password_prompt()
+        trace.note("unlocked", True)
     else:
-        # Show locked.png indefinitely
+        # Locked for good: this boot ends here
+        trace.commit()
+        # Show locked.png indefinitely. It never changes, so it is drawn
+        # once; the backlight dims and goes off when idle, a button wakes it
+        if asset_exists(LOCKED):
+            try:
+                draw_image(screen, LOCKED)
+            except Exception as e:
+                print("Critical System Failure!", e)
+        if powermgr:
+            powermgr.configure(brightness=settings.get("brightness", 80))
+            powermgr.own_input()
         while True:
-            if os.path.exists(LOCKED):
+            if powermgr:
                 try:
-                    screen.drawImage(LOCKED, 0, 0)
-                except Exception as e:
-                    print("Critical System Failure!", e)
-            time.sleep(0.5)
+                    if M5Btn.pressed():
+                        powermgr.activity()
+                except:
+                    pass
+                powermgr.tick()
+            time.sleep_ms(LOCK_POLL_MS)
 
 # -------------------------------------------------------
 # Boot launcher
 # -------------------------------------------------------
+def load_app_code(path):
+    if appcache:
+        try:
+            code = appcache.load_code(path)
+            trace.note("app_cache", appcache.last_status)
+            if appcache.last_status == "disk":
+                trace.read(appcache.cache_path(path))
+            elif appcache.last_status == "compiled":
+                trace.read(path)
+            return code
+        except Exception as e:
+            print("App cache error:", e)
+    with open(path, "r") as f:
+        code = f.read()
+    trace.read(path, len(code))
+    return code
+
 def launch_boot_app():
     app = settings.get("boot_app", "hmenu.py")
     path = "/sd/" + app
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            code = f.read()
+    code = BOOT_PRELOAD.pop("code", None)
+    if code is None and os.path.exists(path):
+        code = load_app_code(path)
+    if code is not None:
+        # exec() of the launcher never returns, so this boot ends here
+        trace.commit()
+        if store:
+            store.read_hook = None
         exec(code)
     else:
+        trace.commit()
         print("Please insert the MicroSD Card. \nYour system cannot function properly \nwithout setup data.")
 
 # -------------------------------------------------------
@@ -159,12 +413,23 @@ except:
     pass
 
 # Step 1: Password-only lock on startup
+trace.begin("lockstate")
 if read_lockstate():
     lock_screen_startup()
 
-show_splash_fade()
-play_startup_sound()
-
+# Step 2: Splash, sound and app preload run together
+trace.begin("boot_tasks")
+trace.asset("splash_size", SPLASH)
+trace.asset("audio_size", audiosvc.source(AUDIO) if audiosvc else AUDIO)
+# The launcher's audiosvc.tick() loop finishes a streamed startup
+# sound, so the menu comes up as soon as the fade and preload are done
+hand_off_sound = audiosvc is not None and settings.get("boot_app", "hmenu.py") == "hmenu.py"
+run_boot_tasks([
+    ("splash", splash_fade_task(), False),
+    ("sound", startup_sound_task(), hand_off_sound),
+    ("preload", preload_task(), False),
+])
 
-# Step 2: Launch apps
+# Step 3: Launch apps
+trace.begin("launch")
 launch_boot_app()
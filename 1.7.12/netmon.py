@@ -0,0 +1,190 @@
+# Fyre-OS connectivity monitor
+# Checks the Wi-Fi link and internet reachability in a background
+# thread and caches the result, so drawing code never waits on the
+# network:
+#   netmon.start()
+#   netmon.status()  -> "offline", "checking", "online" or "no_internet"
+#   netmon.rssi()
+#   netmon.busy()    -> True while light sleep would stop it or the link
+# Probes run every PROBE_INTERVAL_MS while online. After a failed probe
+# the retry delay doubles from RETRY_MS up to MAX_BACKOFF_MS. A result
+# holds until the probe after it is due; only a monitor that has
+# stopped probing (RESULT_GRACE_MS late) turns it back into "checking".
+
+import time
+try:
+    import _thread
+except:
+    _thread = None
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+PROBE_URL = "http://clients3.google.com/generate_204"
+PROBE_TIMEOUT = 1
+PROBE_INTERVAL_MS = 30000
+RETRY_MS = 5000
+MAX_BACKOFF_MS = 120000
+RESULT_GRACE_MS = 10000   # how late the next probe may be before a result is stale
+LINK_POLL_MS = 1000
+
+OFFLINE = "offline"
+CHECKING = "checking"
+ONLINE = "online"
+NO_INTERNET = "no_internet"
+
+# ------------------------------
+# STATE
+# ------------------------------
+_link = False
+_rssi = 0
+_result = None        # True/False from the last probe, None if none yet
+_result_at = 0
+_next_probe = 0
+_failures = 0
+_running = False
+_threaded = False
+probes = 0
+
+# ------------------------------
+# LINK + PROBE
+# ------------------------------
+def _read_link():
+    """Return (connected, rssi) without touching the internet."""
+    try:
+        import wifiCfg
+        sta = wifiCfg.getWiFiStatus()
+        if not sta:
+            return False, 0
+        try:
+            return True, sta["rssi"]
+        except:
+            return True, 0
+    except:
+        pass
+    try:
+        import network
+        wlan = network.WLAN(network.STA_IF)
+        if not wlan.isconnected():
+            return False, 0
+        try:
+            return True, wlan.status("rssi")
+        except:
+            return True, 0
+    except:
+        return False, 0
+
+def _probe():
+    global probes
+    probes += 1
+    try:
+        import urequests
+        r = urequests.get(PROBE_URL, timeout=PROBE_TIMEOUT)
+        # captive portals answer 200/302 with a login page
+        ok = r.status_code == 204
+        r.close()
+        return ok
+    except:
+        return False
+
+def _schedule(ok, now):
+    global _failures, _next_probe
+    if ok:
+        _failures = 0
+        delay = PROBE_INTERVAL_MS
+    else:
+        delay = min(RETRY_MS * (1 << _failures), MAX_BACKOFF_MS)
+        _failures = min(_failures + 1, 16)
+    _next_probe = time.ticks_add(now, delay)
+
+def poll():
+    """One monitor step. Runs in the background thread; without threads call it from a main loop."""
+    global _link, _rssi, _result, _result_at, _failures, _next_probe
+    now = time.ticks_ms()
+    link, rssi = _read_link()
+    if link != _link:
+        # Link came up or went down: forget the old result, probe now
+        _result = None
+        _failures = 0
+        _next_probe = now
+    _link = link
+    _rssi = rssi
+    if not link:
+        return
+    if time.ticks_diff(now, _next_probe) < 0:
+        return
+    ok = _probe()
+    now = time.ticks_ms()
+    _result = ok
+    _result_at = now
+    _schedule(ok, now)
+
+def _loop():
+    global _running
+    while _running:
+        try:
+            poll()
+        except Exception as e:
+            print("netmon error:", e)
+        time.sleep_ms(LINK_POLL_MS)
+
+# ------------------------------
+# API
+# ------------------------------
+def configure(interval_ms=None, retry_ms=None, max_backoff_ms=None, grace_ms=None):
+    global PROBE_INTERVAL_MS, RETRY_MS, MAX_BACKOFF_MS, RESULT_GRACE_MS
+    if interval_ms:
+        PROBE_INTERVAL_MS = interval_ms
+    if retry_ms:
+        RETRY_MS = retry_ms
+    if max_backoff_ms:
+        MAX_BACKOFF_MS = max_backoff_ms
+    if grace_ms:
+        RESULT_GRACE_MS = grace_ms
+
+def start():
+    """Start the background thread (once). Returns False if threads are unavailable."""
+    global _running, _threaded
+    if _running:
+        return _threaded
+    _running = True
+    if _thread is None:
+        return False
+    try:
+        _thread.start_new_thread(_loop, ())
+        _threaded = True
+    except Exception as e:
+        print("netmon thread failed:", e)
+    return _threaded
+
+def stop():
+    global _running
+    _running = False
+
+def tick():
+    """Main-loop hook: only does work when the monitor could not get its own thread."""
+    if _running and not _threaded:
+        poll()
+
+def refresh():
+    """Ask for a probe on the next monitor step (e.g. after joining a network)."""
+    global _next_probe, _failures
+    _failures = 0
+    _next_probe = time.ticks_ms()
+
+def status():
+    if not _link:
+        return OFFLINE
+    if _result is None or time.ticks_diff(time.ticks_ms(), _next_probe) > RESULT_GRACE_MS:
+        return CHECKING
+    return ONLINE if _result else NO_INTERNET
+
+def rssi():
+    return _rssi
+
+def busy():
+    """True while the monitor thread runs or Wi-Fi is up: ESP32 light sleep stops both."""
+    return (_running and _threaded) or _link
+
+def is_online():
+    return status() == ONLINE
@@ -0,0 +1,325 @@
+# Fyre-OS performance HUD
+# A two-line overlay at the bottom of the screen with what the device is
+# actually doing:
+#   9/16ms 30fps ov2 812K u41 f3%
+#   o4 r3 w1 s12 l0 d120/s
+# Line 1: average/worst frame time, frames per second, main-loop
+# overruns, gc.mem_free(), how much of the heap is in use and heap
+# fragmentation. Line 2, per second: SD opens (of them reads and
+# writes), stats, listings and lcd draw calls.
+#   perfhud.toggle()                  # launcher: "h" key, "perf_hud" setting
+#   perfhud.frame_start() / perfhud.frame_end()   # around drawing a frame
+#   perfhud.loop(sleep_ms)            # just before a main loop sleeps
+#   perfhud.tick()                    # redraw the overlay when it is due
+# While it is on, open(), os.stat(), os.listdir()/ilistdir() and the lcd
+# drawing calls go through counting wrappers; turned off, the originals
+# are put back and every call above returns at once. Counters whose
+# wrapper the firmware doesn't allow show "-". The heap figures are read,
+# never probed: heap use from gc.mem_free()/gc.mem_alloc(), fragmentation as
+# 100 - largest free block / free bytes of the ESP-IDF data heaps
+# (esp32.idf_heap_info, "-" on ports without it). The HUD allocates
+# nothing to measure them.
+
+import gc
+import time
+try:
+    import esp32
+except:
+    esp32 = None
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+HUD_X = 0
+HUD_Y = 111
+HUD_W = 240
+HUD_H = 24
+LINE_H = 12
+FG = 0x00FF00
+BG = 0x000000
+REFRESH_MS = 500           # rates are worked out over this window
+BUDGET_MS = 33             # loop work above this (a 30 fps frame) is an overrun
+DRAW_NAMES = ("fillRect", "drawRect", "rect", "fillScreen", "clear", "fill",
+              "print", "text", "drawString", "drawImage", "image", "drawPng",
+              "drawRawBuf", "line", "drawLine", "pixel", "drawPixel",
+              "circle", "fillCircle", "triangle", "fillTriangle")
+COUNTERS = ("open", "read", "write", "stat", "listdir", "draw")
+
+# ------------------------------
+# STATE
+# ------------------------------
+enabled = False
+counts = {}               # counter -> calls since the HUD was turned on
+_wrapped = {}             # counter -> True if its wrapper is installed
+_saved = []               # (owner, name, original) to put back
+_last = {}                # counts at the last refresh
+_lcd = None
+_lines = ("", "")
+_last_refresh = 0
+_frame_t0 = None
+_frames = 0
+_frame_total = 0
+_frame_worst = 0
+_loop_last = None
+_loop_sleep = 0
+overruns = 0
+worst_loop_ms = 0
+_heap = 0
+_used = None              # percent of the gc heap allocated, None if unknown
+_frag = None              # heap fragmentation percent, None if unknown
+
+# ------------------------------
+# WRAPPERS
+# ------------------------------
+def _patch(owner, name, make):
+    try:
+        real = getattr(owner, name)
+        setattr(owner, name, make(real))
+        _saved.append((owner, name, real))
+        return True
+    except:
+        return False
+
+def _counting(counter, real):
+    def wrapper(*args, **kwargs):
+        counts[counter] += 1
+        return real(*args, **kwargs)
+    return wrapper
+
+def _counting_open(real):
+    def wrapper(path, mode="r", *args, **kwargs):
+        counts["open"] += 1
+        if "w" in mode or "a" in mode or "+" in mode:
+            counts["write"] += 1
+        else:
+            counts["read"] += 1
+        return real(path, mode, *args, **kwargs)
+    return wrapper
+
+def _displays():
+    """M5.Lcd and/or the UIFlow 1 lcd: whichever this firmware has."""
+    found = []
+    try:
+        import M5
+        found.append(M5.Lcd)
+    except:
+        pass
+    try:
+        from m5stack import lcd
+        if lcd not in found:
+            found.append(lcd)
+    except:
+        pass
+    return found
+
+def _install():
+    global _lcd
+    for name in COUNTERS:
+        counts[name] = 0
+        _wrapped[name] = False
+    try:
+        import builtins
+        ok = _patch(builtins, "open", _counting_open)
+        _wrapped["open"] = _wrapped["read"] = _wrapped["write"] = ok
+    except:
+        pass
+    import os
+    _wrapped["stat"] = _patch(os, "stat", lambda real: _counting("stat", real))
+    _wrapped["listdir"] = _patch(os, "listdir", lambda real: _counting("listdir", real))
+    if hasattr(os, "ilistdir"):
+        _patch(os, "ilistdir", lambda real: _counting("listdir", real))
+    displays = _displays()
+    _lcd = displays[0] if displays else None
+    for lcd in displays:
+        for name in DRAW_NAMES:
+            if hasattr(lcd, name) and _patch(lcd, name, lambda real: _counting("draw", real)):
+                _wrapped["draw"] = True
+
+def _uninstall():
+    while _saved:
+        owner, name, real = _saved.pop()
+        try:
+            setattr(owner, name, real)
+        except:
+            pass
+
+def _original(name):
+    """The lcd method as it was before wrapping: the HUD doesn't count itself."""
+    for owner, attr, real in _saved:
+        if owner is _lcd and attr == name:
+            return real
+    return getattr(_lcd, name, None)
+
+# ------------------------------
+# MEASURING
+# ------------------------------
+def frame_start():
+    global _frame_t0
+    if enabled:
+        _frame_t0 = time.ticks_ms()
+
+def frame_end():
+    """A frame is on screen: record its time and put the overlay back on top of it."""
+    global _frame_t0, _frames, _frame_total, _frame_worst
+    if not enabled or _frame_t0 is None:
+        return
+    ms = time.ticks_diff(time.ticks_ms(), _frame_t0)
+    _frame_t0 = None
+    _frames += 1
+    _frame_total += ms
+    if ms > _frame_worst:
+        _frame_worst = ms
+    tick(force=True)
+
+def loop(sleep_ms=0):
+    """Call just before the main loop sleeps; work above BUDGET_MS between calls is an overrun."""
+    global _loop_last, _loop_sleep, overruns, worst_loop_ms
+    if not enabled:
+        return
+    now = time.ticks_ms()
+    if _loop_last is not None:
+        work = time.ticks_diff(now, _loop_last) - _loop_sleep
+        if work > worst_loop_ms:
+            worst_loop_ms = work
+        if work > BUDGET_MS:
+            overruns += 1
+    _loop_last = now
+    _loop_sleep = sleep_ms
+
+def restart():
+    """Forget loop timing after something blocked on purpose (an app, a splash)."""
+    global _loop_last, _frame_t0
+    _loop_last = None
+    _frame_t0 = None
+
+def _fragmentation():
+    if esp32 is None:
+        return None
+    try:
+        regions = esp32.idf_heap_info(esp32.HEAP_DATA)
+    except:
+        return None
+    free = largest = 0
+    for region in regions:
+        free += region[1]
+        largest = max(largest, region[2])
+    if not free:
+        return None
+    return 100 - largest * 100 // free
+
+def _sample_heap():
+    global _heap, _used, _frag
+    try:
+        _heap = gc.mem_free()
+    except:
+        _heap = 0
+        _used = None
+        return
+    try:
+        alloc = gc.mem_alloc()
+        _used = alloc * 100 // max(1, alloc + _heap)
+    except:
+        _used = None
+    _frag = _fragmentation()
+
+def _rate(name, elapsed):
+    if not _wrapped.get(name):
+        return "-"
+    return str((counts[name] - _last.get(name, 0)) * 1000 // max(1, elapsed))
+
+def _refresh(now):
+    global _lines, _last_refresh, _frames, _frame_total, _frame_worst
+    elapsed = time.ticks_diff(now, _last_refresh)
+    _sample_heap()
+    avg = _frame_total // _frames if _frames else 0
+    fps = _frames * 1000 // max(1, elapsed)
+    used = "-" if _used is None else str(_used)
+    frag = "-" if _frag is None else "{}%".format(_frag)
+    _lines = (
+        "{}/{}ms {}fps ov{} {}K u{} f{}".format(
+            avg, _frame_worst, fps, overruns, _heap // 1024, used, frag),
+        "o{} r{} w{} s{} l{} d{}/s".format(
+            _rate("open", elapsed), _rate("read", elapsed), _rate("write", elapsed),
+            _rate("stat", elapsed), _rate("listdir", elapsed), _rate("draw", elapsed)),
+    )
+    for name in COUNTERS:
+        _last[name] = counts[name]
+    _frames = _frame_total = _frame_worst = 0
+    _last_refresh = now
+
+# ------------------------------
+# DRAWING
+# ------------------------------
+def _text(text, x, y):
+    draw_string = _original("drawString")
+    if draw_string is not None:
+        # UIFlow 2 Lcd: print() ignores x/y, so position and colour go separately
+        _original("setTextColor")(FG, BG)
+        draw_string(text, x, y)
+    else:
+        _original("print")(text, x, y, FG)
+
+def draw():
+    if _lcd is None:
+        return
+    try:
+        _original("fillRect")(HUD_X, HUD_Y, HUD_W, HUD_H, BG)
+        _text(_lines[0], HUD_X + 2, HUD_Y)
+        _text(_lines[1], HUD_X + 2, HUD_Y + LINE_H)
+    except Exception as e:
+        print("HUD draw failed:", e)
+
+def tick(force=False):
+    """Redraw the overlay every REFRESH_MS (force: now, e.g. after a full-screen push)."""
+    if not enabled:
+        return
+    now = time.ticks_ms()
+    due = time.ticks_diff(now, _last_refresh) >= REFRESH_MS
+    if due:
+        _refresh(now)
+    if due or force:
+        draw()
+
+# ------------------------------
+# API
+# ------------------------------
+def enable():
+    global enabled, _last_refresh, overruns, worst_loop_ms
+    if enabled:
+        return
+    _install()
+    enabled = True
+    overruns = worst_loop_ms = 0
+    _last.clear()
+    restart()
+    _last_refresh = time.ticks_ms()
+    _refresh(_last_refresh)
+    draw()
+
+def disable():
+    """Turn off and unwrap; the caller repaints what the overlay covered."""
+    global enabled
+    if not enabled:
+        return
+    enabled = False
+    _uninstall()
+
+def toggle():
+    if enabled:
+        disable()
+    else:
+        enable()
+    return enabled
+
+def stats():
+    return {
+        "enabled": enabled,
+        "counts": dict(counts),
+        "wrapped": [name for name in COUNTERS if _wrapped.get(name)],
+        "overruns": overruns,
+        "worst_loop_ms": worst_loop_ms,
+        "heap": _heap,
+        "heap_used": _used,
+        "frag": _frag,
+        "lines": _lines,
+    }
@@ -0,0 +1,214 @@
+# Fyre-OS idle power manager
+# Dims and then switches off the backlight, and lowers the CPU clock,
+# when there has been no input for a while:
+#   ACTIVE --DIM_AFTER_MS--> DIM (backlight DIM_PERCENT, CPU IDLE_FREQ)
+#          --OFF_AFTER_MS--> OFF (backlight 0)
+# Any input wakes it back to ACTIVE at once. Buttons and keys read
+# through inputsvc are seen automatically (its poll runs tick() too);
+# code that reads the keyboard itself calls activity() and own_input().
+# While keys go past inputsvc and nobody reports them, nothing dims.
+# Wake locks keep things running:
+#   powermgr.acquire("mp3")                 # full CPU speed, no light sleep
+#   powermgr.acquire("video", screen=True)  # also keeps the backlight on
+#   powermgr.release("mp3")
+
+import time
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+DIM_AFTER_MS = 30000
+OFF_AFTER_MS = 60000
+DIM_PERCENT = 20
+BRIGHTNESS = 80           # "brightness" setting, 0-100
+IDLE_FREQ = 80000000      # 80 MHz keeps the APB clock (timers, SPI) unchanged
+TICK_MS = 250
+
+ACTIVE = "active"
+DIM = "dim"
+OFF = "off"
+
+# ------------------------------
+# STATE
+# ------------------------------
+_state = ACTIVE
+_last_activity = time.ticks_ms()
+_last_tick = 0
+_locks = {}               # name -> keeps the screen on
+_full_freq = None
+_own_input = False
+_enabled = True
+wakes = 0
+
+# ------------------------------
+# HARDWARE
+# ------------------------------
+def _set_backlight(percent):
+    try:
+        from M5 import M5Screen
+        M5Screen().setBrightness(percent)
+        return
+    except:
+        pass
+    try:
+        from uiflow import machine
+        machine.screen_brightness((percent + 5) // 10)
+        return
+    except:
+        pass
+    try:
+        import M5
+        M5.Lcd.setBrightness(percent * 255 // 100)
+    except:
+        pass
+
+def _set_freq(hz):
+    global _full_freq
+    try:
+        import machine
+        if _full_freq is None:
+            _full_freq = machine.freq()
+        if machine.freq() != hz:
+            machine.freq(hz)
+    except:
+        pass
+
+def _enter(state):
+    global _state
+    if state == _state:
+        return
+    _state = state
+    if state == ACTIVE:
+        if _full_freq:
+            _set_freq(_full_freq)
+        _set_backlight(BRIGHTNESS)
+    elif state == DIM:
+        _set_backlight(min(DIM_PERCENT, BRIGHTNESS))
+        if not _locks:
+            _set_freq(IDLE_FREQ)
+    else:
+        _set_backlight(0)
+
+# ------------------------------
+# API
+# ------------------------------
+def configure(brightness=None, dim_after_ms=None, off_after_ms=None, dim_percent=None, enabled=None):
+    global BRIGHTNESS, DIM_AFTER_MS, OFF_AFTER_MS, DIM_PERCENT, _enabled
+    if brightness is not None:
+        BRIGHTNESS = brightness
+    if dim_after_ms is not None:
+        DIM_AFTER_MS = dim_after_ms
+    if off_after_ms is not None:
+        OFF_AFTER_MS = off_after_ms
+    if dim_percent is not None:
+        DIM_PERCENT = dim_percent
+    if enabled is not None:
+        _enabled = enabled
+
+def start():
+    """Follow inputsvc: its events count as activity and its poll drives tick()."""
+    try:
+        import inputsvc
+        inputsvc.event_hook = _on_input
+        inputsvc.poll_hook = tick
+        return True
+    except Exception as e:
+        print("Power manager without input service:", e)
+        return False
+
+def _on_input(kind, code):
+    # The press that turns the screen back on is not passed on
+    return activity()
+
+def activity():
+    """Input happened: restart the idle timers. Returns True if this woke the screen."""
+    global _last_activity, wakes
+    _last_activity = time.ticks_ms()
+    if _state == ACTIVE:
+        return False
+    woke = _state == OFF
+    wakes += 1
+    _enter(ACTIVE)
+    return woke
+
+def own_input(on=True):
+    """The running code reads the keyboard itself and calls activity() on input."""
+    global _own_input
+    _own_input = on
+
+def _input_seen():
+    if _own_input:
+        return True
+    try:
+        import inputsvc
+        return inputsvc.capturing()
+    except:
+        return False
+
+def tick():
+    """Move to DIM/OFF when the idle time is up. Cheap; called from inputsvc's poll and main loops."""
+    global _last_tick, _last_activity
+    now = time.ticks_ms()
+    if time.ticks_diff(now, _last_tick) < TICK_MS:
+        return
+    _last_tick = now
+    if not _enabled or _state == OFF:
+        return
+    if not _input_seen() or screen_locked():
+        # Can't tell whether anyone is using the device: stay awake, and
+        # count the idle time from when we can
+        _last_activity = now
+        return
+    idle = time.ticks_diff(now, _last_activity)
+    if idle >= OFF_AFTER_MS:
+        _enter(OFF)
+    elif idle >= DIM_AFTER_MS and _state == ACTIVE:
+        _enter(DIM)
+
+def screen_off():
+    """Switch the backlight off now (e.g. a music player's screen-off key); input turns it back on."""
+    _enter(OFF)
+
+def acquire(name, screen=False):
+    _locks[name] = screen
+    if _state != ACTIVE and _full_freq:
+        # A lock taken while dimmed still needs the full clock
+        _set_freq(_full_freq)
+    if screen:
+        activity()
+
+def release(name):
+    _locks.pop(name, None)
+
+def release_all():
+    """Drop every wake lock and input claim (the launcher calls this when an app exits)."""
+    _locks.clear()
+    own_input(False)
+
+def held():
+    return list(_locks)
+
+def screen_locked():
+    for screen in _locks.values():
+        if screen:
+            return True
+    return False
+
+def can_sleep():
+    """True when nothing holds a wake lock, so light sleep / a slower clock is fine."""
+    return not _locks
+
+def state():
+    return _state
+
+def idle_ms():
+    return time.ticks_diff(time.ticks_ms(), _last_activity)
+
+def stats():
+    return {
+        "state": _state,
+        "idle_ms": idle_ms(),
+        "locks": held(),
+        "wakes": wakes,
+        "full_freq": _full_freq,
+    }
@@ -0,0 +1,193 @@
+# Fyre-OS power monitor
+# Samples the battery at a low rate and serves cached, smoothed values,
+# so drawing code never reads the ADC itself:
+#   powermon.level()      -> 0-100, smoothed
+#   powermon.bucket()     -> 0-3 (battery1-4 icons), with hysteresis
+#   powermon.charging()
+#   powermon.critical()
+#   powermon.drain_per_hour()  -> % per hour, None until known
+# Readings are smoothed with an EMA (EMA_ALPHA). The icon bucket and the
+# critical flag only change once the level is HYSTERESIS points past a
+# boundary, so a reading wobbling around 50% no longer flickers the icon.
+# The last RING_SIZE samples are kept for the drain estimate.
+# Every call samples first when SAMPLE_MS has passed, so apps get fresh
+# values too while the launcher is not running.
+
+import time
+try:
+    from uiflow import machine
+except:
+    try:
+        import machine
+    except:
+        machine = None
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+SAMPLE_MS = 10000
+EMA_ALPHA = 0.2
+HYSTERESIS = 3
+BUCKET_LIMITS = (25, 50, 75)   # battery1 below 25, battery2 below 50, ...
+CRITICAL_LEVEL = 10
+RING_SIZE = 60                 # 10 minutes at the default rate
+MIN_DRAIN_MS = 120000          # samples needed to span this before a drain rate is given
+
+# ------------------------------
+# STATE
+# ------------------------------
+_ring = [None] * RING_SIZE     # (ticks_ms, smoothed level)
+_head = 0
+_count = 0
+_raw = None
+_level = None
+_charging = False
+_bucket = None
+_critical = False
+_last_sample = 0
+samples = 0
+failures = 0
+
+# ------------------------------
+# SAMPLING
+# ------------------------------
+def _read():
+    """Return (level, charging) from the hardware; level None when it can't be read."""
+    global failures
+    level = None
+    charging = False
+    try:
+        level = max(0, min(100, int(machine.battery())))
+    except:
+        failures += 1
+    try:
+        charging = bool(machine.is_charging())
+    except:
+        pass
+    return level, charging
+
+def _bucket_for(level, current):
+    if current is None:
+        bucket = 0
+        for limit in BUCKET_LIMITS:
+            if level >= limit:
+                bucket += 1
+        return bucket
+    # Move one bucket at a time, and only once clearly past the boundary
+    while current < len(BUCKET_LIMITS) and level >= BUCKET_LIMITS[current] + HYSTERESIS:
+        current += 1
+    while current > 0 and level < BUCKET_LIMITS[current - 1] - HYSTERESIS:
+        current -= 1
+    return current
+
+def _record(now, level):
+    global _head, _count
+    if _count == RING_SIZE:
+        _head = (_head + 1) % RING_SIZE
+        _count -= 1
+    _ring[(_head + _count) % RING_SIZE] = (now, level)
+    _count += 1
+
+def _reset_ring():
+    global _head, _count
+    for i in range(RING_SIZE):
+        _ring[i] = None
+    _head = 0
+    _count = 0
+
+def sample():
+    """Read the battery now and update the cached values."""
+    global _raw, _level, _charging, _bucket, _critical, _last_sample, samples
+    now = time.ticks_ms()
+    _last_sample = now
+    samples += 1
+    raw, charging = _read()
+    if charging != _charging:
+        # Plugged or unplugged: the old samples say nothing about the new rate
+        _reset_ring()
+        _charging = charging
+    if raw is None:
+        return
+    _raw = raw
+    _level = raw if _level is None else _level + EMA_ALPHA * (raw - _level)
+    _bucket = _bucket_for(_level, _bucket)
+    if _critical:
+        _critical = _level < CRITICAL_LEVEL + HYSTERESIS
+    else:
+        _critical = _level < CRITICAL_LEVEL
+    _record(now, _level)
+
+def tick():
+    """Sample if SAMPLE_MS has passed since the last sample."""
+    if not samples or time.ticks_diff(time.ticks_ms(), _last_sample) >= SAMPLE_MS:
+        sample()
+
+# ------------------------------
+# API
+# ------------------------------
+def configure(sample_ms=None, alpha=None, hysteresis=None):
+    global SAMPLE_MS, EMA_ALPHA, HYSTERESIS
+    if sample_ms:
+        SAMPLE_MS = sample_ms
+    if alpha:
+        EMA_ALPHA = alpha
+    if hysteresis is not None:
+        HYSTERESIS = hysteresis
+
+def level():
+    """Smoothed battery level 0-100 (50 when the battery can't be read)."""
+    tick()
+    return 50 if _level is None else int(_level + 0.5)
+
+def raw_level():
+    tick()
+    return _raw
+
+def charging():
+    tick()
+    return _charging
+
+def bucket():
+    """Icon index 0-3 for battery1-4.png."""
+    tick()
+    return 2 if _bucket is None else _bucket
+
+def critical():
+    tick()
+    return _critical
+
+def drain_per_hour():
+    """Level lost per hour over the samples kept (negative while charging), or None."""
+    tick()
+    if _count < 2:
+        return None
+    t0, first = _ring[_head]
+    t1, last = _ring[(_head + _count - 1) % RING_SIZE]
+    span = time.ticks_diff(t1, t0)
+    if span < MIN_DRAIN_MS:
+        return None
+    return (first - last) * 3600000 / span
+
+def minutes_left():
+    """Estimated minutes until empty at the current drain rate, or None."""
+    drain = drain_per_hour()
+    if not drain or drain <= 0 or _level is None:
+        return None
+    return int(_level * 60 / drain)
+
+def history():
+    """Kept samples, oldest first, as (ticks_ms, smoothed level)."""
+    return [_ring[(_head + i) % RING_SIZE] for i in range(_count)]
+
+def stats():
+    return {
+        "level": level(),
+        "raw": _raw,
+        "charging": _charging,
+        "bucket": _bucket,
+        "critical": _critical,
+        "drain_per_hour": drain_per_hour(),
+        "samples": samples,
+        "kept": _count,
+        "failures": failures,
+    }
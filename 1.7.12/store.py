@@ -0,0 +1,197 @@
+# Fyre-OS system store
+# One in-RAM cache for the small JSON/TXT state files the system and
+# apps keep on the SD card. Each file is a namespace:
+#   store.get("settings", "volume", 5)
+#   store.put("settings", "volume", 7)      # dict documents
+#   store.save("opened_apps", names)        # whole document (lists, text)
+# Changes only mark the namespace dirty. tick() writes them out in one
+# batch once they have settled for FLUSH_DELAY_MS (or have waited
+# MAX_DIRTY_MS under a steady stream of changes); flush() writes now.
+# Every write goes to <file>.tmp first and is renamed over the old file,
+# so a power cut leaves either the old or the new copy, never half.
+
+import os
+import json
+import time
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+FLUSH_DELAY_MS = 2000
+MAX_DIRTY_MS = 15000
+
+# namespace -> (path, format); format is "json" or "text"
+NAMESPACES = {
+    "settings": ("/sd/settings.json", "json"),
+    "lock": ("/sd/lockstate.json", "json"),
+    "launcher_lock": ("/sd/apps/lockstate.json", "json"),
+    "opened_apps": ("/sd/apps/opened_apps.json", "json"),
+    "app_registry": ("/sd/app_registry.json", "json"),
+    "wifi": ("/sd/wifi_networks.json", "json"),
+    "espnow": ("/sd/espnow_nickname.json", "json"),
+    "sd_cleaner": ("/sd/auto_run_config.txt", "text"),
+    "lorapass.profile": ("/sd/lorapass/profile.json", "json"),
+    "lorapass.history": ("/sd/lorapass/history.json", "json"),
+    "lorapass.collected": ("/sd/lorapass/collected.json", "json"),
+    "lorapass.countries": ("/sd/lorapass/countries.json", "json"),
+    "lorapass.peers": ("/sd/lorapass/peers.json", "json"),
+}
+
+# ------------------------------
+# STATE
+# ------------------------------
+_docs = {}    # namespace -> cached value
+_dirty = {}   # namespace -> [ticks_ms first change, ticks_ms last change]
+read_hook = None   # called as read_hook(path) after each SD read (boot trace)
+
+# ------------------------------
+# FILES
+# ------------------------------
+def register(ns, path, fmt="json"):
+    NAMESPACES[ns] = (path, fmt)
+
+def path_of(ns):
+    return NAMESPACES[ns][0]
+
+def namespace_for(path):
+    for ns in NAMESPACES:
+        if NAMESPACES[ns][0] == path:
+            return ns
+    return None
+
+def _parse(f, fmt):
+    if fmt == "text":
+        return f.read().strip()
+    return json.load(f)
+
+def _read(ns):
+    path, fmt = NAMESPACES[ns]
+    # A leftover .tmp means a commit was cut between remove and rename
+    for candidate in (path, path + ".tmp"):
+        try:
+            with open(candidate, "r") as f:
+                value = _parse(f, fmt)
+            if read_hook:
+                read_hook(candidate)
+            return value
+        except:
+            pass
+    raise OSError("no data for " + ns)
+
+def _write(ns):
+    path, fmt = NAMESPACES[ns]
+    value = _docs[ns]
+    tmp = path + ".tmp"
+    folder = path[:path.rfind("/")]
+    try:
+        os.stat(folder)
+    except:
+        os.mkdir(folder)
+    with open(tmp, "w") as f:
+        if fmt == "text":
+            f.write(str(value))
+        else:
+            json.dump(value, f)
+    try:
+        os.rename(tmp, path)
+    except:
+        # FAT will not rename over an existing file
+        os.remove(path)
+        os.rename(tmp, path)
+
+# ------------------------------
+# DOCUMENTS
+# ------------------------------
+def load(ns, default=None):
+    """Return the cached document for ns, reading the SD card only the first time."""
+    if ns not in _docs:
+        try:
+            _docs[ns] = _read(ns)
+        except:
+            if default is None:
+                return None
+            _docs[ns] = default
+    return _docs[ns]
+
+def _mark(ns):
+    now = time.ticks_ms()
+    if ns in _dirty:
+        _dirty[ns][1] = now
+    else:
+        _dirty[ns] = [now, now]
+
+def save(ns, value):
+    _docs[ns] = value
+    _mark(ns)
+
+def touch(ns):
+    """Mark ns dirty after its document was changed in place."""
+    if ns in _docs:
+        _mark(ns)
+
+def exists(ns):
+    return load(ns) is not None
+
+def forget(ns=None):
+    """Drop cached (clean) documents so the next load re-reads the SD card."""
+    for key in list(_docs):
+        if (ns is None or key == ns) and key not in _dirty:
+            del _docs[key]
+
+# ------------------------------
+# KEYS
+# ------------------------------
+def get(ns, key, default=None):
+    doc = load(ns, {})
+    if isinstance(doc, dict):
+        return doc.get(key, default)
+    return default
+
+def put(ns, key, value):
+    doc = load(ns, {})
+    if not isinstance(doc, dict):
+        doc = {}
+    if key in doc and doc[key] == value:
+        return
+    doc[key] = value
+    save(ns, doc)
+
+def delete(ns, key):
+    doc = load(ns, {})
+    if isinstance(doc, dict) and key in doc:
+        del doc[key]
+        save(ns, doc)
+
+# ------------------------------
+# COMMIT
+# ------------------------------
+def flush(ns=None):
+    """Write dirty namespaces (all, or just ns) to the SD card now."""
+    for key in list(_dirty):
+        if ns is not None and key != ns:
+            continue
+        try:
+            _write(key)
+            del _dirty[key]
+        except Exception as e:
+            print("Store write failed:", key, e)
+
+def tick():
+    """Call from main loops: flushes everything in one batch when it is due."""
+    if not _dirty:
+        return
+    now = time.ticks_ms()
+    settled = True
+    for first, last in _dirty.values():
+        if time.ticks_diff(now, first) >= MAX_DIRTY_MS:
+            flush()
+            return
+        if time.ticks_diff(now, last) < FLUSH_DELAY_MS:
+            settled = False
+    if settled:
+        flush()
+
+def is_dirty(ns=None):
+    if ns is None:
+        return bool(_dirty)
+    return ns in _dirty
@@ -0,0 +1,291 @@
+# Fyre-OS text layout and rendered-text cache
+# Labels and list rows are mostly the same strings drawn again and again.
+# This keeps the work done for them:
+#   textcache.wrap("Wifi Manager", 80)      # wrapped lines, cached by (text, font, width)
+#   textcache.width("Path: /sd")            # measured width in pixels, cached
+#   textcache.draw("Settings", 0, 20, 0xFFFFFF)
+# draw() renders a string once into a small sprite (UIFlow 2 canvas) and
+# pushes that on later draws; sprites are evicted least-recently-used
+# past BUDGET_BYTES. Firmware without canvases prints directly.
+# List screens use Rows, which remembers what each row shows and only
+# repaints the rows that changed:
+#   rows = textcache.Rows(0, 20, 15, 16)   # x, y, row height, row count
+#   rows.text(i, "> apps", 0xFFFFFF)
+#   rows.trim(len(items))                  # blank the rows below the list
+
+# ------------------------------
+# CONFIG
+# ------------------------------
+CHAR_W = 8                 # width per character when the font can't be measured
+LINE_H = 15
+LAYOUT_ENTRIES = 64
+BUDGET_BYTES = 16 * 1024
+MAX_SPRITE_W = 240
+USE_PSRAM = True
+
+# ------------------------------
+# STATE
+# ------------------------------
+_layouts = {}      # (text, font, width) -> tuple of lines
+_layout_order = []
+_widths = {}       # (text, font) -> pixels
+_sprites = {}      # (text, font, color, bg) -> (canvas, bytes)
+_sprite_order = []
+_measure = None    # text -> pixels from the display driver, or False
+used_bytes = 0
+hits = 0
+misses = 0
+direct = 0
+
+# ------------------------------
+# BACKENDS
+# ------------------------------
+def _lcd():
+    try:
+        import M5
+        return M5.Lcd
+    except:
+        from m5stack import lcd
+        return lcd
+
+def _measurer():
+    global _measure
+    if _measure is None:
+        _measure = False
+        try:
+            lcd = _lcd()
+            fn = getattr(lcd, "textWidth", None)
+            if fn is not None:
+                fn("M")
+                _measure = fn
+        except:
+            pass
+    return _measure
+
+def _print(text, x, y, color):
+    lcd = _lcd()
+    try:
+        lcd.print(text, x, y, color)
+    except TypeError:
+        # UIFlow 2 Lcd: position and colour are set separately
+        lcd.setTextColor(color)
+        lcd.drawString(text, x, y)
+
+def _new_canvas(w, h):
+    try:
+        import M5
+        return M5.Lcd.newCanvas(w, h, 16, USE_PSRAM)
+    except:
+        return None
+
+def _free_canvas(canvas):
+    try:
+        canvas.delete()
+    except:
+        pass
+
+# ------------------------------
+# LAYOUT
+# ------------------------------
+def width(text, font=None):
+    """Width of text in pixels in the current (or given) font."""
+    key = (text, font)
+    w = _widths.get(key)
+    if w is None:
+        measure = _measurer()
+        try:
+            w = measure(text) if measure else len(text) * CHAR_W
+        except:
+            w = len(text) * CHAR_W
+        if len(_widths) >= LAYOUT_ENTRIES * 4:
+            _widths.clear()
+        _widths[key] = w
+    return w
+
+def _wrap(text, max_w, font):
+    lines = []
+    line = ""
+    for word in text.split():
+        candidate = line + " " + word if line else word
+        if width(candidate, font) <= max_w:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        # A word longer than the line is broken across lines
+        while width(word, font) > max_w and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and width(word[:cut], font) > max_w:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line:
+        lines.append(line)
+    return tuple(lines)
+
+def wrap(text, max_w, font=None):
+    """text split into lines no wider than max_w pixels (a tuple; don't modify)."""
+    key = (text, font, max_w)
+    lines = _layouts.get(key)
+    if lines is None:
+        lines = _wrap(text, max_w, font)
+        if len(_layouts) >= LAYOUT_ENTRIES:
+            del _layouts[_layout_order.pop(0)]
+        _layouts[key] = lines
+        _layout_order.append(key)
+    return lines
+
+def fit(text, max_w, font=None):
+    """text cut to fit max_w pixels, with ".." when shortened."""
+    if width(text, font) <= max_w:
+        return text
+    cut = len(text)
+    while cut > 0 and width(text[:cut] + "..", font) > max_w:
+        cut -= 1
+    return text[:cut] + ".."
+
+# ------------------------------
+# RENDERED TEXT
+# ------------------------------
+def _touch(key):
+    if key in _sprite_order:
+        _sprite_order.remove(key)
+    _sprite_order.append(key)
+
+def _evict_until(free_needed):
+    global used_bytes
+    while _sprite_order and used_bytes + free_needed > BUDGET_BYTES:
+        canvas, nbytes = _sprites.pop(_sprite_order.pop(0))
+        _free_canvas(canvas)
+        used_bytes -= nbytes
+
+def _render(key, text, font, color, bg):
+    global used_bytes
+    w = width(text, font)
+    h = LINE_H
+    nbytes = w * h * 2
+    if not w or w > MAX_SPRITE_W or nbytes > BUDGET_BYTES:
+        return None
+    canvas = _new_canvas(w, h)
+    if canvas is None:
+        return None
+    try:
+        canvas.fillScreen(bg)
+        canvas.setTextColor(color, bg)
+        canvas.drawString(text, 0, 0)
+    except:
+        _free_canvas(canvas)
+        return None
+    _evict_until(nbytes)
+    _sprites[key] = (canvas, nbytes)
+    used_bytes += nbytes
+    return canvas
+
+def draw(text, x, y, color=0xFFFFFF, bg=0x000000, font=None, cache=True):
+    """Draw text at x, y from the rendered-text cache; cache=False for one-off text (an input line)."""
+    global hits, misses, direct
+    if not text:
+        return
+    if not cache:
+        direct += 1
+        _print(text, x, y, color)
+        return
+    key = (text, font, color, bg)
+    entry = _sprites.get(key)
+    if entry:
+        hits += 1
+        _touch(key)
+        entry[0].push(x, y)
+        return
+    misses += 1
+    canvas = _render(key, text, font, color, bg)
+    if canvas is not None:
+        _touch(key)
+        canvas.push(x, y)
+        return
+    direct += 1
+    _print(text, x, y, color)
+
+# ------------------------------
+# LIST ROWS
+# ------------------------------
+class Rows:
+    """A column of text rows that only repaints the rows whose content changed."""
+    def __init__(self, x, y, row_h, count, w=240, bg=0x000000):
+        self.x = x
+        self.y = y
+        self.row_h = row_h
+        self.count = count
+        self.w = w
+        self.bg = bg
+        self.shown = [None] * count
+        self.repaints = 0
+
+    def row_y(self, i):
+        return self.y + i * self.row_h
+
+    def changed(self, i, state):
+        """True if row i must be repainted to show state; the row is cleared for it."""
+        if i < 0 or i >= self.count or self.shown[i] == state:
+            return False
+        if self.shown[i] is not None:
+            _lcd().fillRect(self.x, self.row_y(i), self.w, self.row_h, self.bg)
+        self.shown[i] = state
+        self.repaints += 1
+        return True
+
+    def text(self, i, text, color=0xFFFFFF, cache=True):
+        if self.changed(i, (text, color)):
+            draw(text, self.x, self.row_y(i), color, self.bg, cache=cache)
+
+    def spans(self, i, spans):
+        """Row of (text, color) pieces drawn one after another."""
+        spans = tuple(spans)
+        if self.changed(i, spans):
+            x = self.x
+            for text, color in spans:
+                draw(text, x, self.row_y(i), color, self.bg)
+                x += width(text)
+
+    def trim(self, n, end=None):
+        """Blank every row from n on (up to end)."""
+        for i in range(n, self.count if end is None else end):
+            self.changed(i, None)
+
+    def invalidate(self):
+        """Forget what is on screen, e.g. after lcd.clear()."""
+        self.shown = [None] * self.count
+
+# ------------------------------
+# API
+# ------------------------------
+def set_budget(nbytes):
+    global BUDGET_BYTES
+    BUDGET_BYTES = nbytes
+    _evict_until(0)
+
+def clear():
+    global used_bytes
+    for canvas, nbytes in _sprites.values():
+        _free_canvas(canvas)
+    _sprites.clear()
+    del _sprite_order[:]
+    _layouts.clear()
+    del _layout_order[:]
+    _widths.clear()
+    used_bytes = 0
+
+def stats():
+    total = hits + misses
+    return {
+        "layouts": len(_layouts),
+        "widths": len(_widths),
+        "sprites": len(_sprites),
+        "bytes": used_bytes,
+        "budget": BUDGET_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "direct": direct,
+        "hit_rate": (hits * 100 // total) if total else 0,
+    }
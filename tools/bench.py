@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# Fyre-OS micro-benchmarks (runs on a PC, not on the device)
+#
+# Times the launcher and app code paths that get slow on big SD cards,
+# on the headless simulator (tools/m5sim) with a generated SD card:
+#   python3 tools/bench.py                                  run everything
+#   python3 tools/bench.py -k lorapass -k mp3               only some
+#   python3 tools/bench.py --save tools/bench_baseline.json
+#   python3 tools/bench.py --compare tools/bench_baseline.json
+#
+# Each benchmark boots the real script (hmenu.py or an app) until it
+# reaches its main loop, then calls one of its functions repeatedly.
+# sim_us (virtual device time: SD transfers, display bus, per-call CPU
+# cost), calls, SD and display counts are deterministic and compared
+# strictly; host_us is wall time on this PC, shown for reference only.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from boottrace_report import delta_row, print_table  # noqa: E402
+from m5sim import Simulator  # noqa: E402
+
+DEFAULT_SD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "1.7.12")
+
+# Fixture sizes
+EXTRA_APPS = 60
+FOLDER_ENTRIES = 10000
+HISTORY_ENTRIES = 1000
+TRACKS = 5000
+CLUTTER_FOLDERS = 200
+
+METRICS = ("sim_us", "calls", "sd_ops", "sd_bytes", "draw_ops", "panel_pixels")
+SD_OPS = ("sd.open", "sd.listdir", "sd.stat", "sd.remove", "sd.rename", "sd.mkdir", "sd.write")
+KNOWN_COUNTRIES = ("Japan", "Germany", "Brazil", "Kenya", "Canada")
+
+
+# ------------------------------
+# FIXTURE SD CARD
+# ------------------------------
+def touch(path, data=b"", mtime=None):
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def write_json(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(value, f)
+
+
+def build_sd(src, dest):
+    """The real SD folder plus a big one's worth of apps, files, history and music."""
+    shutil.copytree(src, dest, ignore=shutil.ignore_patterns("*.pyc", "__pycache__"))
+
+    for i in range(EXTRA_APPS):
+        touch(os.path.join(dest, "apps", "Bench {:02d}.py".format(i)), b'print("bench")\r\n')
+
+    folder = os.path.join(dest, "bench", "files")
+    os.makedirs(folder)
+    for i in range(FOLDER_ENTRIES):
+        if i % 100 == 0:
+            os.mkdir(os.path.join(folder, "dir_{:05d}".format(i)))
+        else:
+            touch(os.path.join(folder, "file_{:05d}.txt".format(i)))
+
+    base = 1767225600   # 2026-01-01
+    history = []
+    for i in range(HISTORY_ENTRIES):
+        history.append({
+            "id": "{:012x}".format(i), "name": "Walker {}".format(i),
+            "country": KNOWN_COUNTRIES[i % len(KNOWN_COUNTRIES)], "favorite": "Somewhere",
+            "future_os": "LoRaOS", "message": "Hello from LoRaPass!", "rssi": -70 - i % 30,
+            "time": base + i * 60,
+        })
+    write_json(os.path.join(dest, "lorapass", "history.json"), history)
+    write_json(os.path.join(dest, "lorapass", "collected.json"), list(KNOWN_COUNTRIES))
+
+    music = os.path.join(dest, "music")
+    os.makedirs(music, exist_ok=True)
+    for i in range(TRACKS):
+        name = "Artist {:03d} - Track {:04d}.mp3".format(i % 250, i)
+        touch(os.path.join(music, name), mtime=base + i * 37 % TRACKS)
+
+    # What the SD Cleaner looks for, among ordinary folders
+    for name in ("DCIM", "Android", ".Trashes", "System Volume Information", "LOST.DIR"):
+        os.makedirs(os.path.join(dest, name), exist_ok=True)
+    for i in range(CLUTTER_FOLDERS):
+        path = os.path.join(dest, "Folder {:03d}".format(i))
+        os.makedirs(path)
+        for j in range(i % 3):
+            os.mkdir(os.path.join(path, "sub{}".format(j)))
+        if i % 2:
+            touch(os.path.join(path, "notes.txt"), b"x" * 64)
+
+
+# ------------------------------
+# BENCHMARKS
+# ------------------------------
+def lorapass_packets(ns):
+    """A new walker every call, from a country already collected (no LED flash)."""
+    state = {"n": 0}
+
+    def send():
+        n = state["n"]
+        state["n"] += 1
+        pkt = {
+            "type": "lorapass", "id": "bench{:07d}".format(n), "name": "Bench {}".format(n),
+            "country": KNOWN_COUNTRIES[n % len(KNOWN_COUNTRIES)], "favorite": "Here",
+            "future_os": "LoRaOS", "message": "hi", "version": 1,
+        }
+        ns["handle_packet"](json.dumps(pkt), -72)
+    return send
+
+
+def lorapass_binary_packets(ns):
+    """The same walkers as binary beacons, encoded by the app itself."""
+    profile = ns["profile"]
+    state = {"n": 0}
+
+    def send():
+        n = state["n"]
+        state["n"] += 1
+        profile["name"] = "Bench {}".format(n)
+        profile["country"] = KNOWN_COUNTRIES[n % len(KNOWN_COUNTRIES)]
+        pkt = bytearray(ns["make_packet"]())
+        pkt[2:6] = (n + 1).to_bytes(4, "big")     # someone else's id hash
+        ns["handle_packet"](bytes(pkt), -72)
+    return send
+
+
+def lorapass_beacons(ns):
+    """Presence beacons from walkers whose profiles are already cached (seeded on the warm-up call)."""
+    profile = ns["profile"]
+    state = {"n": 0, "hashes": []}
+
+    def send():
+        if not state["hashes"]:
+            for i, country in enumerate(KNOWN_COUNTRIES):
+                profile["name"] = "Bench {}".format(i)
+                profile["country"] = country
+                ns["profile_changed"]()
+                pkt = bytearray(ns["make_packet"]())
+                pkt[2:6] = (i + 1).to_bytes(4, "big")
+                ns["handle_packet"](bytes(pkt), -72)
+                state["hashes"].append(ns["profile_hash"])
+        n = state["n"]
+        state["n"] += 1
+        i = n % len(KNOWN_COUNTRIES)
+        beacon = bytes((ns["PACKET_MAGIC"], ns["PACKET_BEACON"])) + (i + 1).to_bytes(4, "big") + state["hashes"][i]
+        ns["handle_packet"](beacon, -72)
+    return send
+
+
+def lorapass_flush(ns):
+    store = ns["store"]
+
+    def flush():
+        store.save(ns["HISTORY_NS"], ns["history"])
+        store.flush(ns["HISTORY_NS"])
+    return flush
+
+
+def mp3_search(ns):
+    terms = ["track 01", "artist 2", "7", "zz"]
+    state = {"n": 0}
+
+    def search():
+        ns["search_text"] = terms[state["n"] % len(terms)]
+        state["n"] += 1
+        ns["apply_search"]()
+    return search
+
+
+# name, script, boot ms, iterations, ns -> function to time
+BENCHMARKS = [
+    ("statusbar_draw", "hmenu.py", 15000, 50, lambda ns: ns["menu"].status.draw),
+    ("statusbar_draw_full", "hmenu.py", 15000, 50, lambda ns: lambda: ns["menu"].status.draw(force=True)),
+    ("menu_draw_{}_apps".format(EXTRA_APPS), "hmenu.py", 15000, 30, lambda ns: ns["menu"].draw_menu),
+    ("file_browser_list_dir_10k", "apps/File Browser.py", 2000, 3,
+     lambda ns: lambda: ns["list_dir"]("/sd/bench/files")),
+    ("lorapass_handle_packet", "apps/LoRaPass.py", 3000, 50, lorapass_packets),
+    ("lorapass_handle_binary_packet", "apps/LoRaPass.py", 3000, 50, lorapass_binary_packets),
+    ("lorapass_handle_beacon_cached", "apps/LoRaPass.py", 3000, 50, lorapass_beacons),
+    ("lorapass_history_flush", "apps/LoRaPass.py", 3000, 10, lorapass_flush),
+    ("mp3_load_music_5k", "apps/MP3 Player.py", 20000, 3, lambda ns: ns["load_music"]),
+    ("mp3_apply_search_5k", "apps/MP3 Player.py", 20000, 20, mp3_search),
+    ("sd_cleaner_scan", "apps/SD Cleaner.py", 5000, 3, lambda ns: ns["scan_sd"]),
+]
+
+
+# ------------------------------
+# RUNNING
+# ------------------------------
+def counters(sim):
+    c = sim.stats.values
+    return {
+        "sim_us": sim.elapsed_us(),
+        "calls": sim.calls,
+        "sd_ops": sum(c.get(k, 0) for k in SD_OPS),
+        "sd_bytes": c.get("sd.read_bytes", 0) + c.get("sd.write_bytes", 0),
+        "draw_ops": sum(v for k, v in c.items() if k.startswith(("panel.", "sprite.")) and not k.endswith(("pixels", "bytes"))),
+        "panel_pixels": c.get("panel.pixels", 0),
+    }
+
+
+def run_one(sd, name, script, boot_ms, iterations, make):
+    sim = Simulator(sd, until=boot_ms)
+    sim.install()
+    try:
+        ns = sim.execute(script)
+        if sim.outcome == "crashed":
+            return {"error": sim.error}
+        try:
+            fn = make(ns)
+        except KeyError as e:
+            return {"error": "{} did not get to {} within {} ms".format(script, e, boot_ms)}
+        sim.clock.resume()
+        sim.call(fn)        # warm-up: caches, first-time allocations
+        host = []
+        before = counters(sim)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            sim.call(fn)
+            host.append((time.perf_counter() - started) * 1e6)
+        after = counters(sim)
+    except Exception as e:
+        return {"error": "{}: {}".format(type(e).__name__, e)}
+    finally:
+        sim.clock.stop()
+        sim.uninstall()
+    result = {m: round((after[m] - before[m]) / iterations, 1) for m in METRICS}
+    host.sort()
+    result["host_us"] = round(host[len(host) // 2], 1)
+    result["iterations"] = iterations
+    return result
+
+
+def run_all(src, selected, iterations=None):
+    results = {}
+    scratch = tempfile.mkdtemp(prefix="fyre-bench-")
+    try:
+        for name, script, boot_ms, n, make in BENCHMARKS:
+            if selected and not any(k in name for k in selected):
+                continue
+            # Every benchmark gets a fresh card: earlier ones write caches and state
+            sd = os.path.join(scratch, name)
+            build_sd(src, sd)
+            print("  {} ...".format(name), end="", flush=True, file=sys.stderr)
+            results[name] = run_one(sd, name, script, boot_ms, iterations or n, make)
+            print(" done", file=sys.stderr)
+            shutil.rmtree(sd, ignore_errors=True)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+# ------------------------------
+# REPORTS
+# ------------------------------
+def print_results(results):
+    header = ["benchmark", "host us"] + list(METRICS)
+    rows = []
+    for name, r in results.items():
+        if "error" in r:
+            rows.append([name, "error: " + r["error"]] + [""] * len(METRICS))
+            continue
+        rows.append([name, fmt_num(r["host_us"])] + [fmt_num(r[m]) for m in METRICS])
+    print_table(header, rows)
+
+
+def fmt_num(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def compare(results, baseline, threshold, host_threshold):
+    base = baseline.get("benchmarks", {})
+    rows = []
+    regressions = 0
+    for name, r in results.items():
+        b = base.get(name)
+        if "error" in r or b is None or "error" in b:
+            continue
+        for metric in METRICS + ("host_us",):
+            row = delta_row(name + " " + metric, b.get(metric), r.get(metric),
+                            host_threshold if metric == "host_us" else threshold)
+            if row[-1] == "SLOWER" and metric != "host_us":
+                # Wall time varies from run to run: shown, never fails the run
+                regressions += 1
+            if row[-1] or metric == "sim_us":
+                rows.append(row)
+    print("\nAgainst baseline (sim/counts: {}%, host time: {}%):".format(threshold, host_threshold))
+    print_table(["benchmark", "baseline", "now", "delta", ""], rows)
+    missing = [name for name in base if name not in results]
+    if missing:
+        print("Not run this time:", ", ".join(missing))
+    return regressions
+
+
+# ------------------------------
+# MAIN
+# ------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Fyre-OS hot paths on the simulator.")
+    parser.add_argument("--sd", default=DEFAULT_SD, help="SD folder the fixture card is built from")
+    parser.add_argument("-k", dest="only", action="append", default=[],
+                        help="only benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--iterations", type=int, help="override the per-benchmark iteration count")
+    parser.add_argument("--save", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=5.0,
+                        help="percent change in sim time or counts that counts as a regression (default 5)")
+    parser.add_argument("--host-threshold", type=float, default=30.0,
+                        help="percent change in host wall time that is flagged (default 30, never fails)")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.sd, args.only, args.iterations)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "benchmarks": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("\nBaseline written to", args.save)
+
+    if args.compare:
+        try:
+            with open(args.compare, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print("Cannot read baseline {}: {}".format(args.compare, e), file=sys.stderr)
+            return 1
+        if compare(results, baseline, args.threshold, args.host_threshold):
+            return 2
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
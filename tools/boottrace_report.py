@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# Fyre-OS boot trace report (runs on a PC, not on the device)
+#
+# Copy boottrace.log / boottrace.1.log off the SD card and run:
+#   python3 tools/boottrace_report.py boottrace.1.log boottrace.log
+#
+# The latest boot is compared against the median of the boots before it;
+# stages that got slower than --threshold percent are flagged.
+
+import argparse
+import json
+import sys
+
+STAGE_NAME, STAGE_START, STAGE_MS, STAGE_HEAP, STAGE_READS, STAGE_BYTES = range(6)
+
+
+# ------------------------------
+# LOADING
+# ------------------------------
+def load_boots(paths):
+    boots = []
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        boots.append(json.loads(line))
+                    except ValueError:
+                        print("{}:{}: skipping corrupt record".format(path, line_no), file=sys.stderr)
+        except OSError as e:
+            print("Cannot read {}: {}".format(path, e), file=sys.stderr)
+    return boots
+
+
+def stage_map(boot):
+    return {s[STAGE_NAME]: s for s in boot.get("stages", [])}
+
+
+def median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2
+
+
+def stage_order(boots):
+    order = []
+    for boot in boots:
+        for s in boot.get("stages", []):
+            if s[STAGE_NAME] not in order:
+                order.append(s[STAGE_NAME])
+    return order
+
+
+# ------------------------------
+# REPORTS
+# ------------------------------
+def print_history(boots):
+    order = stage_order(boots)
+    header = ["#", "app"] + order + ["total", "heap", "reads", "KB"]
+    rows = []
+    for i, boot in enumerate(boots):
+        stages = stage_map(boot)
+        row = [str(i), str(boot.get("info", {}).get("boot_app", "?"))]
+        for name in order:
+            s = stages.get(name)
+            row.append(str(s[STAGE_MS]) if s else "-")
+        row.append(str(boot.get("total", "-")))
+        row.append(str(boot.get("heap", "-")))
+        row.append(str(boot.get("reads", "-")))
+        row.append(str(boot.get("bytes", 0) // 1024))
+        rows.append(row)
+    print_table(header, rows)
+
+
+def changed_inputs(latest, baseline):
+    """Info keys (boot_app, asset sizes) that differ between the latest boot and the baseline."""
+    changes = []
+    info = latest.get("info", {})
+    for key in sorted(info):
+        before = set(str(b.get("info", {}).get(key)) for b in baseline)
+        if str(info[key]) not in before:
+            changes.append("{}: {} -> {}".format(key, "/".join(sorted(before)), info[key]))
+    return changes
+
+
+def compare(boots, window, threshold):
+    latest = boots[-1]
+    baseline = boots[-1 - window:-1]
+    if not baseline:
+        print("Only one boot recorded, nothing to compare against.")
+        return 0
+
+    print("\nLatest boot vs median of previous {} boot(s):".format(len(baseline)))
+    rows = []
+    regressions = 0
+    latest_stages = stage_map(latest)
+    for name in stage_order(baseline + [latest]):
+        base = median([stage_map(b)[name][STAGE_MS] for b in baseline if name in stage_map(b)])
+        s = latest_stages.get(name)
+        now = s[STAGE_MS] if s else None
+        rows.append(delta_row(name, base, now, threshold))
+        if rows[-1][-1] == "SLOWER":
+            regressions += 1
+    rows.append(delta_row("total", median([b.get("total", 0) for b in baseline]), latest.get("total"), threshold))
+    if rows[-1][-1] == "SLOWER":
+        regressions += 1
+    print_table(["stage", "baseline ms", "latest ms", "delta", ""], rows)
+
+    changes = changed_inputs(latest, baseline)
+    if changes:
+        print("\nInputs changed since baseline (assets / boot_app):")
+        for c in changes:
+            print("  " + c)
+    return regressions
+
+
+def delta_row(name, base, now, threshold):
+    if base is None or now is None:
+        return [name, fmt(base), fmt(now), "-", "new" if base is None else "gone"]
+    if base == 0:
+        pct = 0.0 if now == 0 else 100.0
+    else:
+        pct = (now - base) * 100.0 / base
+    flag = ""
+    if pct > threshold:
+        flag = "SLOWER"
+    elif pct < -threshold:
+        flag = "faster"
+    return [name, fmt(base), fmt(now), "{:+.1f}%".format(pct), flag]
+
+
+def fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return "{:.1f}".format(value)
+    return str(value)
+
+
+def print_table(header, rows):
+    widths = [len(h) for h in header]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(cell))
+    line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(header))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)))
+
+
+# ------------------------------
+# MAIN
+# ------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Fyre-OS boot traces.")
+    parser.add_argument("logs", nargs="+", help="boottrace logs, oldest first")
+    parser.add_argument("--window", type=int, default=5, help="boots used as the baseline (default 5)")
+    parser.add_argument("--threshold", type=float, default=15.0, help="percent change that counts as a regression (default 15)")
+    parser.add_argument("--last", type=int, default=20, help="boots shown in the history table (default 20)")
+    args = parser.parse_args(argv)
+
+    boots = load_boots(args.logs)
+    if not boots:
+        print("No boot records found.")
+        return 1
+    print_history(boots[-args.last:])
+    regressions = compare(boots, args.window, args.threshold)
+    return 2 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
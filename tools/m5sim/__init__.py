@@ -0,0 +1,13 @@
+# Headless M5 Cardputer simulator (runs on a PC, not on the device).
+#
+# Runs main.py, hmenu.py or an app from a local copy of the SD card with
+# stand-ins for the firmware modules (M5, m5stack, m5ui, uiflow, machine,
+# network, espnow, lora, ...). Time is virtual and deterministic, input
+# comes from a scripted trace, and the run reports what the code did:
+# drawing calls and pixels pushed, SD reads/writes per file, sounds
+# played, radio traffic and backlight changes. See tools/simulate.py.
+
+from .clock import SimExit, SimReset
+from .sim import Simulator
+
+__all__ = ["Simulator", "SimExit", "SimReset"]
@@ -0,0 +1,187 @@
+# Virtual clock for the simulator.
+#
+# Simulated time only moves when every simulated thread is asleep (or
+# when a thread is charged for work it did, e.g. pushing pixels over the
+# display bus). Time then jumps straight to the next thing that can
+# happen: a thread waking, a machine.Timer firing or a scripted input
+# event. A session therefore runs as fast as the host allows and replays
+# the same way every time.
+
+import threading
+
+
+class SimExit(BaseException):
+    """Raised in simulated code once the run's time limit is reached."""
+
+
+class SimReset(BaseException):
+    """Raised by machine.reset(): the simulated device restarts (the run ends)."""
+
+
+class Timer:
+    def __init__(self, clock, period, callback, periodic):
+        self.clock = clock
+        self.period = max(1, int(period))
+        self.callback = callback
+        self.periodic = periodic
+        self.due = clock.now + self.period
+        self.fired = 0
+
+
+class Clock:
+    def __init__(self, until=None, start_ms=0):
+        self.now = start_ms
+        self.until = until
+        self.stopped = False
+        self.cond = threading.Condition(threading.RLock())
+        self.running = 1            # simulated threads that are not asleep, incl. the main one
+        self.threads = 1
+        self.sleepers = {}          # thread ident -> wake time
+        self.timers = []
+        self.busy_us = {}           # thread ident -> charged work not yet turned into time
+        self.in_callback = False
+        self.deadline_fn = None     # () -> next scripted event time or None
+        self.on_advance = None      # (now) -> None, runs with the clock held
+        self.sleeps = 0
+        self.callbacks = 0
+
+    # ------------------------------
+    # Threads
+    # ------------------------------
+    def thread_started(self):
+        with self.cond:
+            self.threads += 1
+            self.running += 1
+
+    def thread_finished(self):
+        with self.cond:
+            self.threads -= 1
+            self.running -= 1
+            self._advance_if_idle()
+
+    # ------------------------------
+    # Time
+    # ------------------------------
+    def ticks_ms(self):
+        return self.now
+
+    def sleep_ms(self, ms):
+        ms = max(0, int(ms))
+        ident = threading.get_ident()
+        with self.cond:
+            if self.stopped:
+                raise SimExit()
+            if self.in_callback:
+                # Timer callbacks run with the clock held: they can't wait
+                return
+            self.sleeps += 1
+            wake = self.now + ms
+            self.sleepers[ident] = wake
+            self.running -= 1
+            try:
+                self._advance_if_idle()
+                while self.now < wake and not self.stopped:
+                    self.cond.wait()
+            finally:
+                del self.sleepers[ident]
+                self.running += 1
+            if self.stopped:
+                raise SimExit()
+
+    def charge_us(self, us):
+        """The calling thread was busy for us microseconds (bus transfers, file reads)."""
+        if self.in_callback:
+            return
+        ident = threading.get_ident()
+        total = self.busy_us.get(ident, 0) + us
+        if total >= 1000:
+            self.busy_us[ident] = total % 1000
+            self.sleep_ms(total // 1000)
+        else:
+            self.busy_us[ident] = total
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+    def resume(self, until=None, wait_s=2.0):
+        """Restart a stopped clock for direct calls: other threads end, timers are dropped."""
+        with self.cond:
+            self.cond.notify_all()
+            waited = 0.0
+            while self.threads > 1 and waited < wait_s:
+                self.cond.wait(0.01)
+                waited += 0.01
+            self.timers = []
+            self.until = until
+            self.stopped = False
+
+    # ------------------------------
+    # machine.Timer
+    # ------------------------------
+    def add_timer(self, period, callback, periodic=True):
+        with self.cond:
+            timer = Timer(self, period, callback, periodic)
+            self.timers.append(timer)
+            return timer
+
+    def remove_timer(self, timer):
+        with self.cond:
+            if timer in self.timers:
+                self.timers.remove(timer)
+
+    def _fire_timers(self):
+        for timer in sorted(self.timers, key=lambda t: t.due):
+            if timer.due > self.now or timer not in self.timers:
+                continue
+            if timer.periodic:
+                # A late timer fires once, not once per missed period
+                while timer.due <= self.now:
+                    timer.due += timer.period
+            else:
+                self.timers.remove(timer)
+            timer.fired += 1
+            self.callbacks += 1
+            self.in_callback = True
+            try:
+                timer.callback(timer)
+            except (SimExit, SimReset):
+                raise
+            except Exception as e:
+                print("sim: timer callback failed:", e)
+            finally:
+                self.in_callback = False
+
+    # ------------------------------
+    # Advancing
+    # ------------------------------
+    def _next_time(self):
+        times = list(self.sleepers.values())
+        times.extend(t.due for t in self.timers)
+        if self.deadline_fn:
+            t = self.deadline_fn()
+            if t is not None:
+                times.append(t)
+        return min(times) if times else None
+
+    def _advance_if_idle(self):
+        while self.running <= 0 and not self.stopped:
+            if any(wake <= self.now for wake in self.sleepers.values()):
+                self.cond.notify_all()
+                return
+            target = self._next_time()
+            if target is None:
+                # Everyone waits and nothing is scheduled: the device hangs
+                self.stopped = True
+                self.cond.notify_all()
+                return
+            if self.until is not None and target > self.until:
+                self.now = self.until
+                self.stopped = True
+                self.cond.notify_all()
+                return
+            self.now = max(self.now, target)
+            if self.on_advance:
+                self.on_advance(self.now)
+            self._fire_timers()
@@ -0,0 +1,570 @@
+# Stand-ins for the firmware modules the OS and apps import.
+#
+# build(sim) returns {module name: module}. Every module is backed by
+# the one Simulator, so the UIFlow 1 and UIFlow 2 names for the same
+# hardware (lcd / M5.Lcd, btnA / M5Btn, ...) see the same state.
+
+import binascii
+import datetime
+import os
+import types
+
+from . import display
+
+SPEAKER_RATE = 16000
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    for key, value in attrs.items():
+        setattr(mod, key, value)
+    return mod
+
+
+class Recorder:
+    """Accepts any call and records it (radios, LEDs, pins nobody reads back)."""
+
+    def __init__(self, sim, name):
+        self._sim = sim
+        self._name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+
+        def call(*args, **kwargs):
+            self._sim.stats.count("{}.{}".format(self._name, attr))
+            return None
+        return call
+
+
+# ------------------------------
+# Buttons and keyboard
+# ------------------------------
+class Button:
+    def __init__(self, sim, name):
+        self.sim = sim
+        self.name = name
+
+    def isPressed(self):
+        self.sim.clock.charge_us(20)
+        return self.sim.inputs.is_pressed(self.name)
+
+    def isReleased(self):
+        return not self.isPressed()
+
+    def pressed(self, callback=None):
+        if callback is not None:
+            self.sim.inputs.button_callbacks.setdefault(self.name, []).append(callback)
+            return None
+        return self.isPressed()
+
+    def wasPressed(self, callback=None):
+        if callback is not None:
+            self.sim.inputs.button_callbacks.setdefault(self.name, []).append(callback)
+            return None
+        return self.sim.inputs.was_pressed(self.name)
+
+
+class Keyboard:
+    def __init__(self, sim):
+        self.sim = sim
+
+    def get_key(self):
+        return self.sim.inputs.get_key()
+
+    def getKey(self):
+        return self.sim.inputs.get_key()
+
+    def event(self, callback):
+        self.sim.inputs.key_callbacks.append(callback)
+
+    def isKeyPressed(self):
+        return bool(self.sim.inputs.keys)
+
+
+# ------------------------------
+# Audio
+# ------------------------------
+class Speaker:
+    """M5Stack.Speaker / m5stack.speaker: records what is played and for how long."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.busy_until = 0
+        self.volume = 100
+
+    def _play(self, kind, ms, what):
+        self.sim.stats.count("speaker." + kind)
+        self.sim.sound_log.append((self.sim.clock.now, kind, what, ms))
+        self.busy_until = self.sim.clock.now + ms
+
+    def playRaw(self, buf, rate=SPEAKER_RATE, stereo=False, repeat=1, channel=0, stop_current=False):
+        ms = len(buf) * 1000 // (max(1, rate) * (4 if stereo else 2))
+        self._play("raw", ms, len(buf))
+
+    def playWAV(self, path, *args, **kwargs):
+        try:
+            size = os.path.getsize(self.sim.sd.local(path))
+        except (OSError, TypeError):
+            size = 0
+        self.sim.sd.touch(path)
+        self._play("wav", size * 1000 // (SPEAKER_RATE * 2), path)
+
+    def tone(self, freq=1000, duration=100, *args, **kwargs):
+        self._play("tone", duration, freq)
+
+    def isPlaying(self, *args):
+        return self.sim.clock.now < self.busy_until
+
+    def stop(self, *args):
+        self.busy_until = self.sim.clock.now
+        self.sim.stats.count("speaker.stop")
+
+    def setVolume(self, volume):
+        self.volume = volume
+
+    def getVolume(self):
+        return self.volume
+
+    def begin(self):
+        return True
+
+    def end(self):
+        pass
+
+
+class Mp3Player:
+    """audio.Player (MP3 Player app)."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.playing = False
+
+    def play(self, path, *args, **kwargs):
+        self.sim.stats.count("mp3.play")
+        self.sim.sound_log.append((self.sim.clock.now, "mp3", path, None))
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def resume(self):
+        self.playing = True
+
+    def stop(self):
+        self.playing = False
+
+    def isPlaying(self):
+        return self.playing
+
+
+# ------------------------------
+# machine
+# ------------------------------
+class SimTimer:
+    PERIODIC = 1
+    ONE_SHOT = 0
+
+    def __init__(self, sim, timer_id=-1, **kwargs):
+        self.sim = sim
+        self.id = timer_id
+        self.handle = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=1, period=1000, callback=None, freq=None, **kwargs):
+        self.deinit()
+        if freq:
+            period = 1000 // freq
+        if callback is not None:
+            self.handle = self.sim.clock.add_timer(period, callback, mode == self.PERIODIC)
+        self.sim.stats.count("machine.timer_init")
+
+    def deinit(self):
+        if self.handle is not None:
+            self.sim.clock.remove_timer(self.handle)
+            self.handle = None
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    PULL_DOWN = 1
+
+    def __init__(self, pin, mode=None, *args, **kwargs):
+        self.pin = pin
+        self._value = 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+
+def _machine(sim):
+    def timer_factory(timer_id=-1, **kwargs):
+        return SimTimer(sim, timer_id, **kwargs)
+    timer_factory.PERIODIC = SimTimer.PERIODIC
+    timer_factory.ONE_SHOT = SimTimer.ONE_SHOT
+
+    class Timer(SimTimer):
+        def __init__(self, timer_id=-1, **kwargs):
+            SimTimer.__init__(self, sim, timer_id, **kwargs)
+
+    class RTC:
+        def datetime(self, value=None):
+            if value is not None:
+                return None
+            t = sim.boot_time + datetime.timedelta(milliseconds=sim.clock.now)
+            return (t.year, t.month, t.day, t.weekday(), t.hour, t.minute, t.second, 0)
+
+        def init(self, *args):
+            pass
+
+    def freq(hz=None):
+        if hz is None:
+            return sim.cpu_hz
+        sim.stats.count("machine.freq_set")
+        sim.cpu_hz = hz
+
+    def reset():
+        sim.stats.count("machine.reset")
+        from .clock import SimReset
+        raise SimReset()
+
+    def lightsleep(ms=None):
+        sim.stats.count("machine.lightsleep")
+        sim.stats.add("machine.lightsleep_ms", ms or 0)
+        sim.clock.sleep_ms(ms or 0)
+
+    def screen_brightness(level):
+        sim.set_brightness(level * 10)
+
+    return _module(
+        "machine",
+        Timer=Timer, Pin=Pin, RTC=RTC, freq=freq, reset=reset, soft_reset=reset,
+        lightsleep=lightsleep, deepsleep=lambda ms=None: reset(),
+        unique_id=lambda: b"\x24\x6f\x28\x51\x5a\x01",
+        battery=lambda: int(sim.battery), is_charging=lambda: sim.charging,
+        screen_brightness=screen_brightness,
+        Keyboard=lambda: sim.keyboard,
+        I2C=lambda *a, **k: Recorder(sim, "i2c"), SPI=lambda *a, **k: Recorder(sim, "spi"),
+        UART=lambda *a, **k: Recorder(sim, "uart"), PWM=lambda *a, **k: Recorder(sim, "pwm"),
+        ADC=lambda *a, **k: Recorder(sim, "adc"),
+    )
+
+
+# ------------------------------
+# Network and radios
+# ------------------------------
+class WLAN:
+    def __init__(self, sim, interface=0):
+        self.sim = sim
+
+    def active(self, on=None):
+        return True
+
+    def isconnected(self):
+        return self.sim.wifi_rssi is not None
+
+    def connect(self, ssid=None, password=None, *args):
+        self.sim.stats.count("wifi.connect")
+
+    def disconnect(self):
+        self.sim.wifi_rssi = None
+
+    def status(self, param=None):
+        if param == "rssi":
+            return self.sim.wifi_rssi or 0
+        return self.sim.wifi_rssi or 0
+
+    def scan(self):
+        return []
+
+    def ifconfig(self, *args):
+        return ("192.168.4.2", "255.255.255.0", "192.168.4.1", "192.168.4.1")
+
+    def config(self, *args, **kwargs):
+        return "sim"
+
+
+class Response:
+    def __init__(self, status, body):
+        self.status_code = status
+        self.content = body if isinstance(body, bytes) else str(body).encode()
+        self.text = self.content.decode("utf-8", "replace")
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+    def close(self):
+        pass
+
+
+def _urequests(sim):
+    def request(method, url, *args, **kwargs):
+        sim.stats.count("http." + method.lower())
+        sim.clock.charge_us(50000)
+        if sim.wifi_rssi is None:
+            raise OSError("sim: not connected")
+        if url in sim.http:
+            status, body = sim.http[url]
+            return Response(status, body)
+        if "generate_204" in url:
+            return Response(204, b"")
+        raise OSError("sim: no response scripted for " + url)
+
+    return _module(
+        "urequests", request=request,
+        get=lambda url, *a, **k: request("GET", url),
+        post=lambda url, *a, **k: request("POST", url),
+        put=lambda url, *a, **k: request("PUT", url),
+        delete=lambda url, *a, **k: request("DELETE", url),
+    )
+
+
+class LoRa:
+    LORA_MODE = 1
+    FSK_MODE = 0
+
+    def __init__(self, sim, *args, **kwargs):
+        self.sim = sim
+
+    def send(self, data, *args):
+        self.sim.stats.count("lora.send")
+        self.sim.stats.add("lora.tx_bytes", len(data))
+        self.sim.lora_tx.append((self.sim.clock.now, bytes(data) if not isinstance(data, str) else data.encode()))
+
+    def recv(self, *args):
+        if self.sim.lora_rx:
+            payload, self.sim.lora_last_rssi = self.sim.lora_rx.pop(0)
+            self.sim.stats.count("lora.recv")
+            return payload.encode() if isinstance(payload, str) else bytes(payload)
+        return None
+
+    def get_rssi(self):
+        return self.sim.lora_last_rssi
+
+    def __getattr__(self, attr):
+        # set_spreading_factor, set_bandwidth, set_rx, ...
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return lambda *a, **k: None
+
+
+class ESPNow:
+    def __init__(self, sim):
+        self.sim = sim
+
+    def init(self, *args):
+        pass
+
+    def active(self, *args):
+        return True
+
+    def add_peer(self, *args, **kwargs):
+        pass
+
+    def send(self, peer, msg=None, *args):
+        self.sim.stats.count("espnow.send")
+
+    def recv(self, *args):
+        if self.sim.espnow_rx:
+            data = self.sim.espnow_rx.pop(0)
+            return b"\x00" * 6, data.encode() if isinstance(data, str) else data
+        return None
+
+
+# ------------------------------
+# UI widgets (m5stack_ui / m5ui)
+# ------------------------------
+class Label:
+    def __init__(self, sim, text="", x=0, y=0, color=0xFFFFFF, font=None, parent=None, **kwargs):
+        self.sim = sim
+        self.x, self.y, self.color = x, y, color
+        self.text = ""
+        self.set_text(text)
+
+    def set_text(self, text):
+        surface = self.sim.panel
+        surface.fill_rect(self.x, self.y, len(self.text) * display.CHAR_W, display.CHAR_H, 0)
+        self.text = str(text)
+        surface.text(self.text, self.x, self.y, self.color)
+
+    setText = set_text
+
+    def set_text_color(self, color):
+        self.color = color
+        self.set_text(self.text)
+
+    def set_pos(self, x, y):
+        self.x, self.y = x, y
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return lambda *a, **k: None
+
+
+class Widget(Label):
+    """Buttons and other touch widgets: drawn as a box; callbacks never fire (no touch panel)."""
+
+    def __init__(self, sim, text="", x=0, y=0, w=60, h=30, **kwargs):
+        self.w, self.h = w, h
+        Label.__init__(self, sim, text, x, y, kwargs.get("fg", kwargs.get("text_c", 0xFFFFFF)))
+        sim.panel.rect(x, y, w, h, 0x888888)
+
+    def pressed(self, callback=None):
+        return None
+
+    released = pressed
+    long_pressed = pressed
+
+
+class NeoPixel:
+    def __init__(self, sim, pin=None, n=1, *args, **kwargs):
+        self.sim = sim
+        self.pixels = [(0, 0, 0)] * n
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, color):
+        self.pixels[i] = color
+
+    def __getitem__(self, i):
+        return self.pixels[i]
+
+    def fill(self, color):
+        self.pixels = [color] * self.n
+
+    def write(self):
+        self.sim.stats.count("neopixel.write")
+
+
+class Image:
+    """UIFlow image widget (App Manager): drawn once where it is placed."""
+
+    def __init__(self, sim, *args, **kwargs):
+        self.sim = sim
+        self.x = kwargs.get("x", 0)
+        self.y = kwargs.get("y", 0)
+
+    def set_img_src(self, path):
+        self.sim.panel.image(path, self.x, self.y)
+
+    setImage = set_img_src
+
+    def set_pos(self, x, y):
+        self.x, self.y = x, y
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return lambda *a, **k: None
+
+
+# ------------------------------
+# Modules
+# ------------------------------
+def build(sim):
+    lcd1 = display.Lcd1(sim.panel)
+    lcd2 = display.Lcd2(sim)
+    btn_a, btn_b, btn_c = Button(sim, "A"), Button(sim, "B"), Button(sim, "C")
+    speaker = Speaker(sim)
+    machine = _machine(sim)
+
+    def wait_ms(ms):
+        sim.clock.sleep_ms(ms)
+
+    def wait(s):
+        sim.clock.sleep_ms(int(s * 1000))
+
+    def set_screen_color(color=0, *args):
+        sim.panel.clear(color)
+
+    def set_key_callback(callback):
+        sim.inputs.key_callbacks.append(callback)
+
+    def input_box(prompt="", default="", *args):
+        return default
+
+    class M5Btn:
+        """UIFlow 2 G0 button: M5Btn.pressed()."""
+
+        @staticmethod
+        def pressed(*args):
+            return sim.inputs.is_pressed("G0") or sim.inputs.is_pressed("A")
+
+        @staticmethod
+        def wasPressed(*args):
+            return sim.inputs.was_pressed("G0")
+
+    def m5screen():
+        return display.Screen(sim)
+
+    widgets = dict(
+        M5Label=lambda *a, **k: Label(sim, *a, **k),
+        M5TextBox=lambda text="", x=0, y=0, *a, **k: Label(sim, text, x, y, k.get("color", 0xFFFFFF)),
+        M5Title=lambda title="", *a, **k: Label(sim, title, 0, 0),
+        M5Btn=lambda *a, **k: Widget(sim, *a, **k),
+        M5Rect=lambda *a, **k: Recorder(sim, "ui"),
+        M5Circle=lambda *a, **k: Recorder(sim, "ui"),
+        M5Img=lambda *a, **k: Recorder(sim, "ui"),
+        M5Screen=m5screen,
+    )
+    fonts = {"FONT_MONT_{}".format(n): n for n in range(10, 50, 2)}
+    fonts.update(FONT_UNICODE_24=24)
+
+    common = dict(
+        lcd=lcd1, btnA=btn_a, btnB=btn_b, btnC=btn_c, speaker=speaker,
+        wait_ms=wait_ms, wait=wait, setScreenColor=set_screen_color,
+        setKeyCallback=set_key_callback, keyboard=sim.keyboard, machine=machine,
+    )
+    modules = {
+        "machine": machine,
+        "m5stack": _module("m5stack", M5Screen=m5screen, **common),
+        "m5ui": _module("m5ui", **dict(common, **widgets)),
+        "m5stack_ui": _module("m5stack_ui", **dict(common, **dict(widgets, **fonts))),
+        "uiflow": _module("uiflow", inputBox=input_box, **common),
+        "M5": _module(
+            "M5", Lcd=lcd2, M5Screen=m5screen, M5Btn=M5Btn, M5Keyboard=sim.keyboard,
+            Speaker=speaker, Widgets=Recorder(sim, "widgets"),
+            begin=lambda *a: None, update=lambda *a: None,
+            BtnA=btn_a, BtnB=btn_b, BtnC=btn_c,
+        ),
+        "M5Stack": _module("M5Stack", Speaker=speaker),
+        "audio": _module("audio", Player=lambda *a, **k: Mp3Player(sim)),
+        "wifiCfg": _module(
+            "wifiCfg",
+            getWiFiStatus=lambda: {"rssi": sim.wifi_rssi} if sim.wifi_rssi is not None else None,
+            doConnect=lambda *a, **k: None, autoConnect=lambda *a, **k: None,
+            wlan_sta=WLAN(sim),
+        ),
+        "network": _module(
+            "network", STA_IF=0, AP_IF=1, WLAN=lambda interface=0: WLAN(sim, interface),
+        ),
+        "urequests": _urequests(sim),
+        "espnow": _module("espnow", ESPNow=lambda *a, **k: ESPNow(sim)),
+        "lora": _module("lora", LoRa=type("LoRa", (LoRa,), {
+            "__init__": lambda self, *a, **k: LoRa.__init__(self, sim, *a, **k)})),
+        "neopixel": _module("neopixel", NeoPixel=lambda *a, **k: NeoPixel(sim, *a, **k)),
+        "image": _module("image", Image=lambda *a, **k: Image(sim, *a, **k)),
+        "ubinascii": binascii,
+        "uos": os,
+        "micropython": _module(
+            "micropython", const=lambda x: x, schedule=lambda fn, arg: fn(arg),
+            mem_info=lambda *a: None, alloc_emergency_exception_buf=lambda n: None,
+        ),
+    }
+    return modules
@@ -0,0 +1,408 @@
+# Simulated 240x135 panel and the drawing APIs the firmware exposes.
+#
+# Everything draws into an RGB565 framebuffer, so frames can be saved as
+# PNG and compared between runs. Text uses block glyphs (one outline per
+# character in an 8x12 cell): positions and sizes match what the code
+# asks for, the letter shapes do not. Every call is counted and charged
+# to the virtual clock as a bus transfer of the pixels it touches.
+
+import array
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pngio  # noqa: E402
+
+WIDTH = 240
+HEIGHT = 135
+CHAR_W = 8
+CHAR_H = 12
+BUS_HZ = 40000000          # SPI clock: 16 bits per pixel
+
+
+def rgb565(color):
+    """0xRRGGBB -> RGB565."""
+    color = int(color) & 0xFFFFFF
+    return ((color >> 8) & 0xF800) | ((color >> 5) & 0x07E0) | ((color >> 3) & 0x001F)
+
+
+def to_rgb(c):
+    r = (c >> 11) & 0x1F
+    g = (c >> 5) & 0x3F
+    b = c & 0x1F
+    return (r << 3 | r >> 2, g << 2 | g >> 4, b << 3 | b >> 2)
+
+
+class Surface:
+    """An RGB565 pixel buffer with the primitives every drawing API is built on."""
+
+    def __init__(self, sim, w, h, panel=False):
+        self.sim = sim
+        self.w = w
+        self.h = h
+        self.panel = panel
+        self.pixels = array.array("H", bytes(w * h * 2))
+        self.text_color = 0xFFFFFF
+        self.text_bg = None
+        self.cursor = (0, 0)
+
+    # ------------------------------
+    # Accounting
+    # ------------------------------
+    def _count(self, op, npixels):
+        stats = self.sim.stats
+        key = "panel" if self.panel else "sprite"
+        stats.count(key + "." + op)
+        if self.panel:
+            stats.add("panel.pixels", npixels)
+            self.sim.clock.charge_us(npixels * 16 * 1000000 // BUS_HZ)
+
+    # ------------------------------
+    # Primitives
+    # ------------------------------
+    def _fill(self, x, y, w, h, c):
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = min(self.w, int(x) + int(w)), min(self.h, int(y) + int(h))
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        row = array.array("H", [c]) * (x1 - x0)
+        for yy in range(y0, y1):
+            start = yy * self.w + x0
+            self.pixels[start:start + (x1 - x0)] = row
+        return (x1 - x0) * (y1 - y0)
+
+    def _outline(self, x, y, w, h, c):
+        n = self._fill(x, y, w, 1, c) + self._fill(x, y + h - 1, w, 1, c)
+        return n + self._fill(x, y, 1, h, c) + self._fill(x + w - 1, y, 1, h, c)
+
+    def fill_rect(self, x, y, w, h, color):
+        self._count("fill_rect", self._fill(x, y, w, h, rgb565(color)))
+
+    def rect(self, x, y, w, h, color):
+        self._count("rect", self._outline(x, y, w, h, rgb565(color)))
+
+    def clear(self, color=0x000000):
+        self._count("clear", self._fill(0, 0, self.w, self.h, rgb565(color)))
+
+    def pixel(self, x, y, color):
+        self._count("pixel", self._fill(x, y, 1, 1, rgb565(color)))
+
+    def text(self, s, x, y, color=None, bg=None):
+        s = str(s)
+        c = rgb565(self.text_color if color is None else color)
+        bg = self.text_bg if bg is None else bg
+        n = 0
+        if bg is not None:
+            n += self._fill(x, y, len(s) * CHAR_W, CHAR_H, rgb565(bg))
+        cx = int(x)
+        for ch in s:
+            if not ch.isspace():
+                n += self._outline(cx + 1, int(y) + 2, CHAR_W - 2, CHAR_H - 3, c)
+            cx += CHAR_W
+        self.cursor = (cx, int(y))
+        self._count("text", max(n, len(s) * CHAR_W * CHAR_H))
+        return len(s) * CHAR_W
+
+    def image(self, path, x, y):
+        img = self.sim.images.get(path)
+        if img is None:
+            # Unknown format or missing file: a crossed box where it would be
+            self._count("image", self._outline(x, y, 32, 32, 0xF800))
+            return False
+        w, h, rows = img
+        n = 0
+        for yy in range(h):
+            ty = int(y) + yy
+            if ty < 0 or ty >= self.h:
+                continue
+            base = ty * self.w
+            for xx, c in enumerate(rows[yy]):
+                tx = int(x) + xx
+                if 0 <= tx < self.w and c is not None:
+                    self.pixels[base + tx] = c
+                    n += 1
+        self._count("image", w * h)
+        return True
+
+    def raw(self, buf, x, y, w, h, swapped=True):
+        """Blit a w*h RGB565 buffer (bytes in panel order when swapped)."""
+        data = array.array("H", bytes(buf[:w * h * 2]))
+        if swapped and sys.byteorder == "little":
+            data.byteswap()
+        for yy in range(h):
+            ty = int(y) + yy
+            if ty < 0 or ty >= self.h:
+                continue
+            for xx in range(w):
+                tx = int(x) + xx
+                if 0 <= tx < self.w:
+                    self.pixels[ty * self.w + tx] = data[yy * w + xx]
+        self._count("raw", w * h)
+
+    def blit(self, other, x, y):
+        x, y = int(x), int(y)
+        sx0, sx1 = max(0, -x), min(other.w, self.w - x)
+        if sx0 < sx1:
+            for yy in range(max(0, -y), min(other.h, self.h - y)):
+                src = yy * other.w
+                dst = (y + yy) * self.w + x
+                self.pixels[dst + sx0:dst + sx1] = other.pixels[src + sx0:src + sx1]
+        self._count("push", other.w * other.h)
+
+    def save_png(self, path, dim=100):
+        """Save what is on the surface; dim is the backlight level in percent."""
+        dim = max(0, min(100, dim))
+        rows = []
+        for y in range(self.h):
+            row = []
+            for x in range(self.w):
+                r, g, b = to_rgb(self.pixels[y * self.w + x])
+                row.append((r * dim // 100, g * dim // 100, b * dim // 100))
+            rows.append(row)
+        pngio.write_png(path, self.w, self.h, rows)
+
+
+class ImageCache:
+    """Decoded assets (host-side cache: decoding is the simulator's cost, not the device's)."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.decoded = {}
+
+    def get(self, path):
+        if not isinstance(path, str):
+            return None
+        if path not in self.decoded:
+            self.decoded[path] = self._load(path)
+        else:
+            # The device decodes on every draw: count the read it would do
+            self.sim.sd.touch(path)
+        return self.decoded[path]
+
+    def _load(self, path):
+        try:
+            w, h, pixels = pngio.read_png(path)
+        except Exception:
+            return None
+        rows = []
+        for line in pixels:
+            rows.append([rgb565((r << 16) | (g << 8) | b) if a >= 128 else None for r, g, b, a in line])
+        return w, h, rows
+
+
+# ------------------------------
+# API FLAVOURS
+# ------------------------------
+class Lcd1:
+    """UIFlow 1 'lcd' (m5stack): lcd.print(text, x, y, color), lcd.image(x, y, path) ..."""
+
+    BLACK = 0x000000
+    WHITE = 0xFFFFFF
+    RED = 0xFF0000
+    GREEN = 0x00FF00
+    BLUE = 0x0000FF
+    YELLOW = 0xFFFF00
+    ORANGE = 0xFFA500
+    DARKGREY = 0x7B7B7B
+    LIGHTGREY = 0xC6C6C6
+    FONT_Default = 0
+    FONT_DejaVu18 = 1
+    FONT_DejaVu24 = 2
+    FONT_Ubuntu = 3
+    FONT_Comic = 4
+    FONT_Minya = 5
+    FONT_Tooney = 6
+    FONT_Small = 7
+
+    def __init__(self, surface):
+        self.s = surface
+
+    def print(self, text, x=None, y=None, color=None, *args, **kwargs):
+        if x is None or y is None:
+            x, y = self.s.cursor
+        self.s.text(text, x, y, color)
+
+    def text(self, x, y, text, color=None, *args, **kwargs):
+        self.s.text(text, x, y, color)
+
+    def clear(self, color=0x000000):
+        self.s.clear(color)
+
+    def fill(self, color=0x000000):
+        self.s.clear(color)
+
+    def fillRect(self, x, y, w, h, color=0xFFFFFF, *args):
+        self.s.fill_rect(x, y, w, h, color)
+
+    def rect(self, x, y, w, h, color=0xFFFFFF, fillcolor=None):
+        if fillcolor is not None:
+            self.s.fill_rect(x, y, w, h, fillcolor)
+        self.s.rect(x, y, w, h, color)
+
+    def drawPixel(self, x, y, color=0xFFFFFF):
+        self.s.pixel(x, y, color)
+
+    def line(self, x0, y0, x1, y1, color=0xFFFFFF):
+        self.s.fill_rect(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1, color)
+
+    def image(self, x, y, path, *args, **kwargs):
+        self.s.image(path, x, y)
+
+    def setTextColor(self, color=0xFFFFFF, bg=None):
+        self.s.text_color = color
+        self.s.text_bg = bg
+
+    def setCursor(self, x, y):
+        self.s.cursor = (x, y)
+
+    def font(self, font, *args, **kwargs):
+        self.s.sim.stats.count("panel.font")
+
+    def textWidth(self, text):
+        return len(str(text)) * CHAR_W
+
+    def fontSize(self):
+        return CHAR_W, CHAR_H
+
+    def textHeight(self, *args):
+        return CHAR_H
+
+    def width(self):
+        return self.s.w
+
+    def height(self):
+        return self.s.h
+
+    def drawRawBuf(self, buf, x, y, w, h, *args):
+        self.s.raw(buf, x, y, w, h)
+
+    def drawRightString(self, text, x, y, *args):
+        self.s.text(text, x - len(str(text)) * CHAR_W, y)
+
+    def drawString(self, text, x, y, *args):
+        self.s.text(text, x, y)
+
+    def setBrightness(self, value):
+        self.s.sim.set_brightness(value * 100 // 255)
+
+
+class Sprite:
+    """UIFlow 2 canvas from newCanvas(): draws off-screen, push() copies it to its parent (the panel for Lcd)."""
+
+    def __init__(self, sim, w, h, parent=None):
+        self.sim = sim
+        self.s = Surface(sim, w, h)
+        self.parent = parent if parent is not None else sim.panel
+        sim.stats.count("sprite.new")
+        sim.stats.add("sprite.bytes", w * h * 2)
+
+    def fillScreen(self, color=0):
+        self.s.clear(color)
+
+    def clear(self, color=0):
+        self.s.clear(color)
+
+    def fillRect(self, x, y, w, h, color):
+        self.s.fill_rect(x, y, w, h, color)
+
+    def drawRect(self, x, y, w, h, color):
+        self.s.rect(x, y, w, h, color)
+
+    def setTextColor(self, color, bg=None):
+        self.s.text_color = color
+        self.s.text_bg = bg
+
+    def drawString(self, text, x, y, *args):
+        self.s.text(text, x, y)
+
+    def setCursor(self, x, y):
+        self.s.cursor = (x, y)
+
+    def print(self, text, *args):
+        self.s.text(text, self.s.cursor[0], self.s.cursor[1])
+
+    def drawImage(self, path, x=0, y=0, *args):
+        if not self.s.image(path, x, y):
+            raise OSError("cannot decode " + str(path))
+
+    def drawPng(self, path, x=0, y=0, *args):
+        self.drawImage(path, x, y)
+
+    def drawRawBuf(self, buf, x, y, w, h, *args):
+        self.s.raw(buf, x, y, w, h)
+
+    def textWidth(self, text):
+        return len(str(text)) * CHAR_W
+
+    def newCanvas(self, w, h, bpp=16, psram=False):
+        # pushes onto this canvas (the panel for Lcd.newCanvas)
+        if self.sim.no_psram and psram and w * h * 2 > 64 * 1024:
+            raise MemoryError("sim: no PSRAM")
+        return Sprite(self.sim, w, h, self.s)
+
+    def push(self, x, y):
+        self.parent.blit(self.s, x, y)
+
+    def delete(self):
+        self.sim.stats.count("sprite.delete")
+        self.sim.stats.add("sprite.bytes", -self.s.w * self.s.h * 2)
+
+
+class Lcd2(Sprite):
+    """UIFlow 2 'M5.Lcd': the panel itself, plus newCanvas()."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.s = sim.panel
+
+    def width(self):
+        return self.s.w
+
+    def height(self):
+        return self.s.h
+
+    def setBrightness(self, value):
+        self.sim.set_brightness(value * 100 // 255)
+
+    def push(self, x, y):
+        pass
+
+    def delete(self):
+        pass
+
+
+class Screen:
+    """M5Screen (UIFlow 1 m5stack_ui / UIFlow 2 M5): whole-screen helpers."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.s = sim.panel
+
+    def clean(self):
+        self.s.clear(0)
+
+    def clean_screen(self):
+        self.s.clear(0)
+
+    def set_screen_bg_color(self, color):
+        self.s.clear(color)
+
+    def setBrightness(self, value):
+        self.sim.set_brightness(value)
+
+    def set_screen_brightness(self, value):
+        self.sim.set_brightness(value)
+
+    def setCursor(self, x, y):
+        self.s.cursor = (x, y)
+
+    def print(self, text, *args):
+        x, y = self.s.cursor
+        self.s.text(text, x, y)
+
+    def drawImage(self, path, x=0, y=0, *args):
+        if not self.s.image(path, x, y):
+            raise OSError("cannot decode " + str(path))
+
+    def fillRectAlpha(self, x, y, w, h, alpha=255, color=0):
+        self.s.fill_rect(x, y, w, h, color)
@@ -0,0 +1,135 @@
+# Scripted input for a simulated session.
+#
+# A trace is a JSON list (or one JSON object per line) of timed events,
+# t in simulated milliseconds since boot:
+#   {"t": 3000, "press": "B"}                 button A/B/C (or G0), held "ms" (100)
+#   {"t": 4000, "key": "p"}                   one key
+#   {"t": 5000, "keys": "print(1)\n"}         typed one by one, "gap" ms apart (80)
+#   {"t": 6000, "battery": 40, "charging": false}
+#   {"t": 7000, "wifi": -60}                  joined, with this RSSI (null: disconnected)
+#   {"t": 8000, "lora": "payload"}            a LoRa packet arrives ("rssi" optional)
+#   {"t": 8000, "lora_hex": "a702..."}        the same, binary
+#   {"t": 8000, "espnow": "hello"}            an ESP-NOW message arrives
+#   {"t": 9000, "snapshot": "menu"}           save the screen as menu.png
+#   {"t": 20000, "stop": true}                end the run
+# Events are applied exactly at their time: the virtual clock stops there.
+
+import json
+
+KEY_GAP_MS = 80
+PRESS_MS = 100
+
+
+def load(path):
+    with open(path, "r") as f:
+        text = f.read().strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def expand(events):
+    """Split "keys" into single key events and sort by time."""
+    out = []
+    for n, event in enumerate(events):
+        if "keys" in event:
+            gap = event.get("gap", KEY_GAP_MS)
+            for i, ch in enumerate(event["keys"]):
+                out.append(dict(t=event["t"] + i * gap, key=ch))
+            continue
+        out.append(dict(event))
+    out.sort(key=lambda e: e["t"])
+    return out
+
+
+class Inputs:
+    def __init__(self, sim, events):
+        self.sim = sim
+        self.events = expand(events)
+        self.pos = 0
+        self.presses = []          # [button, start, end]
+        self.keys = []             # queued for getKey()
+        self.key_callbacks = []
+        self.latched = {}          # button -> pressed since last wasPressed()
+        self.button_callbacks = {}
+        self.applied = 0
+
+    # ------------------------------
+    # Clock integration
+    # ------------------------------
+    def next_time(self):
+        """Earliest simulated time at which something scripted happens."""
+        now = self.sim.clock.now
+        times = []
+        if self.pos < len(self.events):
+            times.append(self.events[self.pos]["t"])
+        for _, start, end in self.presses:
+            if end > now:
+                times.append(end)
+        times = [t for t in times if t > now] or times
+        return min(times) if times else None
+
+    def advance(self, now):
+        while self.pos < len(self.events) and self.events[self.pos]["t"] <= now:
+            event = self.events[self.pos]
+            self.pos += 1
+            self.applied += 1
+            self.apply(event)
+        self.presses = [p for p in self.presses if p[2] > now]
+
+    def apply(self, event):
+        sim = self.sim
+        t = event["t"]
+        if "press" in event:
+            name = str(event["press"]).upper()
+            self.presses.append([name, t, t + event.get("ms", PRESS_MS)])
+            self.latched[name] = True
+            for cb in self.button_callbacks.get(name, ()):
+                sim.callback(cb)
+        if "key" in event:
+            key = event["key"]
+            if self.key_callbacks:
+                for cb in self.key_callbacks:
+                    sim.callback(cb, key)
+            else:
+                self.keys.append(key)
+        if "battery" in event:
+            sim.battery = event["battery"]
+        if "charging" in event:
+            sim.charging = bool(event["charging"])
+        if "wifi" in event:
+            sim.wifi_rssi = event["wifi"]
+        if "lora" in event:
+            sim.lora_rx.append((event["lora"], event.get("rssi", -70)))
+        if "lora_hex" in event:
+            sim.lora_rx.append((bytes.fromhex(event["lora_hex"]), event.get("rssi", -70)))
+        if "espnow" in event:
+            sim.espnow_rx.append(event["espnow"])
+        if "snapshot" in event:
+            sim.snapshot(event["snapshot"])
+        if event.get("stop"):
+            sim.outcome = "trace stop"
+            sim.clock.stop()
+
+    # ------------------------------
+    # Device side
+    # ------------------------------
+    def is_pressed(self, name):
+        now = self.sim.clock.now
+        for button, start, end in self.presses:
+            if button == name and start <= now < end:
+                return True
+        return False
+
+    def was_pressed(self, name):
+        hit = self.latched.get(name, False)
+        self.latched[name] = False
+        return hit
+
+    def get_key(self):
+        self.sim.clock.charge_us(50)
+        if self.keys:
+            return self.keys.pop(0)
+        return None
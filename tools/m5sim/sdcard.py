@@ -0,0 +1,191 @@
+# /sd mapped onto a local directory, with every access counted.
+#
+# open() and the os functions the firmware code uses are patched for the
+# run: paths under /sd go to the chosen directory, anything else is left
+# alone. Reads, writes, listings and stats are counted per kind and per
+# file, and reads/writes are charged to the virtual clock at SD speed.
+
+import builtins
+import os
+import shutil
+
+SD_READ_BPS = 2000000      # SPI SD card, realistic sustained rates
+SD_WRITE_BPS = 500000
+SD_OP_US = 300             # per open/stat/listdir
+
+
+class _File:
+    """Counts bytes through a file opened on /sd."""
+
+    def __init__(self, sd, path, f):
+        self._sd = sd
+        self._path = path
+        self._f = f
+
+    def read(self, *args):
+        data = self._f.read(*args)
+        self._sd.read_bytes(self._path, len(data))
+        return data
+
+    def readinto(self, buf):
+        n = self._f.readinto(buf)
+        self._sd.read_bytes(self._path, n or 0)
+        return n
+
+    def readline(self, *args):
+        data = self._f.readline(*args)
+        self._sd.read_bytes(self._path, len(data))
+        return data
+
+    def readlines(self, *args):
+        lines = self._f.readlines(*args)
+        self._sd.read_bytes(self._path, sum(len(x) for x in lines))
+        return lines
+
+    def write(self, data):
+        n = self._f.write(data)
+        self._sd.wrote_bytes(self._path, len(data))
+        return n
+
+    def __iter__(self):
+        for line in self._f:
+            self._sd.read_bytes(self._path, len(line))
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+class SDCard:
+    def __init__(self, sim, root, mount="/sd"):
+        self.sim = sim
+        self.root = os.path.abspath(root)
+        self.mount = mount
+        self.saved = {}
+        self.files = {}        # device path -> [opens, bytes read, bytes written]
+
+    # ------------------------------
+    # Paths
+    # ------------------------------
+    def owns(self, path):
+        return isinstance(path, str) and (path == self.mount or path.startswith(self.mount + "/"))
+
+    def local(self, path):
+        if not self.owns(path):
+            return path
+        rest = path[len(self.mount):].lstrip("/")
+        return os.path.join(self.root, rest) if rest else self.root
+
+    # ------------------------------
+    # Accounting
+    # ------------------------------
+    def _file(self, path):
+        entry = self.files.get(path)
+        if entry is None:
+            entry = self.files[path] = [0, 0, 0]
+        return entry
+
+    def op(self, kind, path):
+        self.sim.stats.count("sd." + kind)
+        self.sim.clock.charge_us(SD_OP_US)
+
+    def touch(self, path):
+        """A read the device would do (e.g. decoding an image again)."""
+        self.op("open", path)
+        try:
+            size = os.path.getsize(self.local(path)) if self.owns(path) else 0
+        except OSError:
+            size = 0
+        self._file(path)[0] += 1
+        self.read_bytes(path, size)
+
+    def read_bytes(self, path, n):
+        self._file(path)[1] += n
+        self.sim.stats.add("sd.read_bytes", n)
+        self.sim.clock.charge_us(n * 1000000 // SD_READ_BPS)
+
+    def wrote_bytes(self, path, n):
+        self._file(path)[2] += n
+        self.sim.stats.add("sd.write_bytes", n)
+        self.sim.clock.charge_us(n * 1000000 // SD_WRITE_BPS)
+
+    def top_files(self, n=15):
+        rows = sorted(self.files.items(), key=lambda kv: (kv[1][1] + kv[1][2], kv[1][0]), reverse=True)
+        return [{"path": p, "opens": v[0], "read": v[1], "written": v[2]} for p, v in rows[:n]]
+
+    # ------------------------------
+    # Patching
+    # ------------------------------
+    def install(self):
+        real_open = builtins.open
+        sd = self
+
+        def sim_open(file, mode="r", *args, **kwargs):
+            if not sd.owns(file):
+                return real_open(file, mode, *args, **kwargs)
+            sd.op("open", file)
+            sd._file(file)[0] += 1
+            return _File(sd, file, real_open(sd.local(file), mode, *args, **kwargs))
+
+        self.saved["open"] = (builtins, "open", real_open)
+        builtins.open = sim_open
+
+        def wrap(name, kind, returns_path=False):
+            real = getattr(os, name)
+
+            def patched(path, *args, **kwargs):
+                if not sd.owns(path):
+                    return real(path, *args, **kwargs)
+                sd.op(kind, path)
+                return real(sd.local(path), *args, **kwargs)
+            self.saved[name] = (os, name, real)
+            setattr(os, name, patched)
+
+        for name, kind in (("listdir", "listdir"), ("scandir", "listdir"), ("stat", "stat"),
+                           ("lstat", "stat"), ("remove", "remove"), ("unlink", "remove"),
+                           ("mkdir", "mkdir"), ("rmdir", "remove"), ("access", "stat"),
+                           ("chmod", "write"), ("statvfs", "stat"), ("utime", "write")):
+            wrap(name, kind)
+
+        real_rename = os.rename
+
+        def sim_rename(src, dst):
+            if sd.owns(src) or sd.owns(dst):
+                sd.op("rename", src)
+            return real_rename(sd.local(src), sd.local(dst))
+        self.saved["rename"] = (os, "rename", real_rename)
+        os.rename = sim_rename
+
+        def ilistdir(path="/"):
+            # MicroPython: (name, type, inode[, size]) with 0x4000 for folders
+            for entry in os.scandir(path):
+                st = entry.stat()
+                kind = 0x4000 if entry.is_dir() else 0x8000
+                yield (entry.name, kind, 0, st.st_size)
+        self.saved["ilistdir"] = (os, "ilistdir", getattr(os, "ilistdir", None))
+        os.ilistdir = ilistdir
+
+        real_copy = shutil.copyfile
+
+        def sim_copyfile(src, dst, *args, **kwargs):
+            return real_copy(sd.local(src), sd.local(dst), *args, **kwargs)
+        self.saved["copyfile"] = (shutil, "copyfile", real_copy)
+        shutil.copyfile = sim_copyfile
+
+    def uninstall(self):
+        for owner, name, value in self.saved.values():
+            if value is None:
+                try:
+                    delattr(owner, name)
+                except AttributeError:
+                    pass
+            else:
+                setattr(owner, name, value)
+        self.saved = {}
@@ -0,0 +1,337 @@
+# The simulated Cardputer: one object owning the clock, panel, SD card,
+# inputs and radios, plus the stand-in modules the firmware imports.
+
+import _thread as real_thread
+import builtins
+import datetime
+import importlib.machinery
+import json
+import os
+import sys
+import time as real_time
+import types
+
+from . import devices, display, inputs, sdcard, uasyncio
+from .clock import Clock, SimExit, SimReset
+
+HEAP_BYTES = 8 * 1024 * 1024      # PSRAM build
+BOOT_TIME = datetime.datetime(2026, 1, 1, 12, 0, 0)
+CPU_HZ = 240000000
+CALL_US = 4                       # MicroPython function call on the ESP32-S3, roughly
+
+
+class Stats:
+    """Named counters; add() for sums (bytes, ms), count() for events."""
+
+    def __init__(self):
+        self.values = {}
+
+    def count(self, name, n=1):
+        self.values[name] = self.values.get(name, 0) + n
+
+    add = count
+
+    def get(self, name, default=0):
+        return self.values.get(name, default)
+
+    def as_dict(self):
+        return dict(sorted(self.values.items()))
+
+
+class Simulator:
+    def __init__(self, sd_root, trace=None, until=None, frames_dir=None, every_ms=None,
+                 no_psram=False):
+        self.stats = Stats()
+        self.clock = Clock(until)
+        self.panel = display.Surface(self, display.WIDTH, display.HEIGHT, panel=True)
+        self.images = display.ImageCache(self)
+        self.sd = sdcard.SDCard(self, sd_root)
+        self.inputs = inputs.Inputs(self, inputs.load(trace) if isinstance(trace, str) else (trace or []))
+        self.keyboard = devices.Keyboard(self)
+        self.frames_dir = frames_dir
+        self.every_ms = every_ms
+        self.next_frame = every_ms
+        self.frames = []
+        self.no_psram = no_psram
+        self.boot_time = BOOT_TIME
+        self.cpu_hz = CPU_HZ
+        self.brightness = 100
+        self.brightness_log = []
+        self.battery = 100
+        self.charging = False
+        self.wifi_rssi = None
+        self.http = {}                    # url -> (status, body) for urequests
+        self.lora_rx = []
+        self.lora_tx = []
+        self.lora_last_rssi = 0
+        self.espnow_rx = []
+        self.sound_log = []
+        self.outcome = None
+        self.error = None
+        self.saved = {}
+        self.code_roots = (self.sd.mount + "/", self.sd.root + os.sep)
+        self.firmware_code = {}
+        self.calls = 0
+        self.clock.deadline_fn = self._deadline
+        self.clock.on_advance = self._advance
+
+    # ------------------------------
+    # Clock hooks
+    # ------------------------------
+    def _deadline(self):
+        times = [self.inputs.next_time(), self.next_frame]
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def _advance(self, now):
+        self.inputs.advance(now)
+        while self.next_frame is not None and self.next_frame <= now:
+            self.snapshot("frame_{:07d}".format(self.next_frame))
+            self.next_frame += self.every_ms
+
+    def _profile(self, frame, event, arg):
+        # Firmware code costs CPU time per call, so busy loops move the clock
+        # like they would on the device instead of spinning forever
+        if event == "call" or event == "c_call":
+            code = frame.f_code
+            mine = self.firmware_code.get(code)
+            if mine is None:
+                mine = self.firmware_code[code] = code.co_filename.startswith(self.code_roots)
+            if mine:
+                self.calls += 1
+                self.clock.charge_us(CALL_US)
+
+    def callback(self, fn, *args):
+        """Run a firmware callback (key event, button handler) the way an IRQ would."""
+        clock = self.clock
+        was = clock.in_callback
+        clock.in_callback = True
+        clock.callbacks += 1
+        try:
+            fn(*args)
+        except (SimExit, SimReset):
+            raise
+        except Exception as e:
+            print("sim: callback failed:", repr(e))
+        finally:
+            clock.in_callback = was
+
+    # ------------------------------
+    # Device state
+    # ------------------------------
+    def set_brightness(self, percent):
+        percent = max(0, min(100, int(percent)))
+        if percent != self.brightness:
+            self.brightness = percent
+            self.brightness_log.append((self.clock.now, percent))
+            self.stats.count("display.brightness_set")
+
+    def snapshot(self, name):
+        if not self.frames_dir:
+            return None
+        os.makedirs(self.frames_dir, exist_ok=True)
+        path = os.path.join(self.frames_dir, name + ".png")
+        self.panel.save_png(path, dim=self.brightness)
+        self.frames.append(path)
+        return path
+
+    # ------------------------------
+    # Stand-in modules
+    # ------------------------------
+    def _time_module(self):
+        clock = self.clock
+        mod = types.ModuleType("time")
+        for name in dir(real_time):
+            if not name.startswith("_"):
+                setattr(mod, name, getattr(real_time, name))
+
+        def epoch():
+            return self.boot_time.timestamp() + clock.now / 1000
+
+        mod.ticks_ms = clock.ticks_ms
+        mod.ticks_us = lambda: clock.now * 1000 + clock.busy_us.get(real_thread.get_ident(), 0)
+        mod.ticks_cpu = mod.ticks_us
+        mod.ticks_diff = lambda a, b: a - b
+        mod.ticks_add = lambda a, b: a + b
+        mod.sleep_ms = clock.sleep_ms
+        mod.sleep_us = lambda us: clock.sleep_ms(us // 1000)
+        mod.sleep = lambda s: clock.sleep_ms(int(s * 1000))
+        mod.time = epoch
+        mod.time_ns = lambda: int(epoch() * 1e9)
+        mod.monotonic = lambda: clock.now / 1000
+        mod.perf_counter = mod.monotonic
+        mod.localtime = lambda secs=None: real_time.localtime(epoch() if secs is None else secs)
+        mod.gmtime = lambda secs=None: real_time.gmtime(epoch() if secs is None else secs)
+        return mod
+
+    def _gc_module(self):
+        import gc as real_gc
+        stats = self.stats
+        mod = types.ModuleType("gc")
+        mod.collect = lambda *a: stats.count("gc.collect")
+        mod.enable = real_gc.enable
+        mod.disable = real_gc.disable
+        mod.isenabled = real_gc.isenabled
+        mod.threshold = lambda *a: None
+        mod.mem_alloc = lambda: max(0, stats.get("sprite.bytes"))
+        mod.mem_free = lambda: HEAP_BYTES - mod.mem_alloc()
+        return mod
+
+    def _thread_module(self):
+        sim = self
+        clock = self.clock
+        mod = types.ModuleType("_thread")
+        for name in ("allocate_lock", "get_ident", "LockType", "stack_size"):
+            setattr(mod, name, getattr(real_thread, name))
+
+        def start_new_thread(fn, args, kwargs=None):
+            sim.stats.count("thread.start")
+            clock.thread_started()
+
+            def body():
+                sys.setprofile(sim._profile)
+                try:
+                    fn(*args, **(kwargs or {}))
+                except SimExit:
+                    pass
+                except SimReset:
+                    sim.outcome = "reset"
+                    clock.stop()
+                except Exception as e:
+                    print("sim: thread failed:", repr(e))
+                finally:
+                    clock.thread_finished()
+            return real_thread.start_new_thread(body, ())
+        mod.start_new_thread = start_new_thread
+        return mod
+
+    def _exec(self):
+        real_exec = builtins.exec
+
+        def mp_exec(code, globals=None, locals=None):
+            # MicroPython: exec() without a namespace runs in the caller's globals
+            if globals is None:
+                globals = sys._getframe(1).f_globals
+                locals = globals
+            return real_exec(code, globals, locals)
+        return real_exec, mp_exec
+
+    def _sd_path_hook(self, path):
+        if not self.sd.owns(path):
+            raise ImportError
+        details = (importlib.machinery.SourceFileLoader, importlib.machinery.SOURCE_SUFFIXES)
+        return importlib.machinery.FileFinder(self.sd.local(path), details)
+
+    def install(self):
+        modules = devices.build(self)
+        uasyncio.bind(self.clock)
+        modules.update(
+            time=self._time_module(), gc=self._gc_module(), _thread=self._thread_module(),
+            uasyncio=uasyncio, asyncio=uasyncio,
+        )
+        self.saved["modules"] = {name: sys.modules.get(name) for name in modules}
+        self.saved["loaded"] = set(sys.modules)
+        self.saved["path"] = list(sys.path)
+        self.saved["cwd"] = os.getcwd()
+        self.saved["bytecode"] = sys.dont_write_bytecode
+        sys.dont_write_bytecode = True
+        sys.modules.update(modules)
+        self.saved["exec"], builtins.exec = self._exec()
+        sys.path_hooks.insert(0, self._sd_path_hook)
+        sys.path_importer_cache.clear()
+        sys.path.insert(0, self.sd.mount)
+        self.sd.install()
+
+    def uninstall(self):
+        self.sd.uninstall()
+        builtins.exec = self.saved["exec"]
+        sys.path_hooks.remove(self._sd_path_hook)
+        sys.path_importer_cache.clear()
+        sys.path[:] = self.saved["path"]
+        for name in list(sys.modules):
+            if name not in self.saved["loaded"]:
+                del sys.modules[name]
+        for name, mod in self.saved["modules"].items():
+            if mod is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = mod
+        os.chdir(self.saved["cwd"])
+        sys.dont_write_bytecode = self.saved["bytecode"]
+        self.saved = {}
+
+    # ------------------------------
+    # Running
+    # ------------------------------
+    def execute(self, script):
+        """Run a script with the simulator installed; returns its globals (kept after a time limit)."""
+        path = self.sd.mount + "/" + script.lstrip("/")
+        namespace = {"__name__": "__main__", "__file__": path}
+        if script.startswith("apps/"):
+            # What the launcher hands every app (see hmenu.run_python_app)
+            namespace["kb"] = self.keyboard
+        try:
+            with open(self.sd.local(path), "r") as f:
+                code = compile(f.read(), path, "exec")
+            sys.setprofile(self._profile)
+            exec(code, namespace)
+            self.outcome = "returned"
+        except SimExit:
+            self.outcome = self.outcome or "time limit"
+        except SimReset:
+            self.outcome = "reset"
+        except Exception as e:
+            self.outcome = "crashed"
+            self.error = "{}: {}".format(type(e).__name__, e)
+            print("sim: {} crashed:".format(script), self.error)
+        finally:
+            sys.setprofile(None)
+            self.clock.stop()
+        return namespace
+
+    def call(self, fn, *args):
+        """Call firmware code directly (after execute() and clock.resume()), charged like the script."""
+        sys.setprofile(self._profile)
+        try:
+            return fn(*args)
+        finally:
+            sys.setprofile(None)
+
+    def elapsed_us(self):
+        clock = self.clock
+        return clock.now * 1000 + clock.busy_us.get(real_thread.get_ident(), 0)
+
+    def run(self, script="main.py"):
+        """Boot a script from the SD card and run it until it ends, resets or time runs out."""
+        self.install()
+        started = real_time.perf_counter()
+        try:
+            self.execute(script)
+        finally:
+            self.uninstall()
+        host_s = real_time.perf_counter() - started
+        return self.report(script, host_s)
+
+    def report(self, script, host_s=0.0):
+        clock = self.clock
+        return {
+            "script": script,
+            "outcome": self.outcome,
+            "error": self.error,
+            "sim_ms": clock.now,
+            "host_s": round(host_s, 3),
+            "sleeps": clock.sleeps,
+            "callbacks": clock.callbacks,
+            "calls": self.calls,
+            "inputs_applied": self.inputs.applied,
+            "brightness": self.brightness_log,
+            "counters": self.stats.as_dict(),
+            "sd_files": self.sd.top_files(),
+            "sounds": self.sound_log[:50],
+            "lora_tx": [[t, data.hex()] for t, data in self.lora_tx[:50]],
+            "frames": self.frames,
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(""), f, indent=2)
@@ -0,0 +1,186 @@
+# Minimal uasyncio on the simulator's virtual clock.
+#
+# Covers what the launcher uses: sleep/sleep_ms, Event, create_task,
+# gather and run. When no task is ready the loop sleeps on the virtual
+# clock until the earliest wake-up, so timers and scripted input still
+# fire in between.
+
+import heapq
+import itertools
+
+_clock = None
+_loop = None
+
+
+def bind(clock):
+    global _clock
+    _clock = clock
+
+
+class CancelledError(BaseException):
+    pass
+
+
+class _Sleep:
+    def __init__(self, ms):
+        self.ms = max(0, int(ms))
+
+    def __await__(self):
+        yield self
+
+
+def sleep_ms(ms):
+    return _Sleep(ms)
+
+
+def sleep(s):
+    return _Sleep(s * 1000)
+
+
+class _Wait:
+    def __init__(self, waiters):
+        self.waiters = waiters
+
+    def __await__(self):
+        yield self
+
+
+class Event:
+    def __init__(self):
+        self.state = False
+        self.waiters = []
+
+    def set(self):
+        self.state = True
+        waiters, self.waiters = self.waiters, []
+        for task in waiters:
+            _loop.ready(task)
+
+    def clear(self):
+        self.state = False
+
+    def is_set(self):
+        return self.state
+
+    async def wait(self):
+        if not self.state:
+            await _Wait(self.waiters)
+        return True
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = False
+        self.result = None
+        self.error = None
+        self.joiners = []
+
+    def _finish(self, result=None, error=None):
+        self.done = True
+        self.result = result
+        self.error = error
+        for task in self.joiners:
+            _loop.ready(task)
+        self.joiners = []
+
+    def cancel(self):
+        if not self.done:
+            _loop.throw(self, CancelledError())
+
+    def __await__(self):
+        if not self.done:
+            yield _Wait(self.joiners)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class _Loop:
+    def __init__(self):
+        self.queue = []            # (wake ms, seq, task)
+        self.seq = itertools.count()
+        self.pending = {}          # task -> exception to throw in on resume
+
+    def ready(self, task, at=None):
+        at = _clock.now if at is None else at
+        heapq.heappush(self.queue, (at, next(self.seq), task))
+
+    def throw(self, task, exc):
+        self.pending[task] = exc
+        self.ready(task)
+
+    def step(self, task):
+        try:
+            exc = self.pending.pop(task, None)
+            cmd = task.coro.throw(exc) if exc is not None else task.coro.send(None)
+        except StopIteration as e:
+            task._finish(e.value)
+            return
+        except CancelledError as e:
+            task._finish(error=e)
+            return
+        except Exception as e:
+            task._finish(error=e)
+            if not task.joiners:
+                print("sim: task failed:", repr(e))
+            return
+        if isinstance(cmd, _Sleep):
+            self.ready(task, _clock.now + cmd.ms)
+        elif isinstance(cmd, _Wait):
+            cmd.waiters.append(task)
+        else:
+            self.ready(task)
+
+    def run_until(self, main):
+        while not main.done:
+            if not self.queue:
+                # Nothing can run again: the device would hang here
+                _clock.sleep_ms(1 << 30)
+                continue
+            at, _, task = self.queue[0]
+            if at > _clock.now:
+                _clock.sleep_ms(at - _clock.now)
+                continue
+            heapq.heappop(self.queue)
+            if not task.done:
+                self.step(task)
+
+
+def create_task(coro):
+    task = Task(coro)
+    _loop.ready(task)
+    return task
+
+
+async def gather(*aws, return_exceptions=False):
+    results = []
+    for aw in aws:
+        task = aw if isinstance(aw, Task) else create_task(aw)
+        try:
+            results.append(await task)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+
+def run(coro):
+    global _loop
+    _loop = _Loop()
+    main = create_task(coro)
+    _loop.run_until(main)
+    if main.error is not None:
+        raise main.error
+    return main.result
+
+
+def get_event_loop():
+    return _loop
+
+
+def new_event_loop():
+    global _loop
+    _loop = _Loop()
+    return _loop
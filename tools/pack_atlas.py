@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Fyre-OS atlas packer (runs on a PC, not on the device)
+#
+# Packs small PNG icons into one atlas file for atlas.py:
+#   python3 tools/pack_atlas.py                      # status bar icons
+#   python3 tools/pack_atlas.py --out x.atlas a.png b.png
+#
+# Alpha is flattened onto --background (the status bar is black), since
+# the device blits raw RGB565 without blending.
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pngio  # noqa: E402
+
+ATLAS_MAGIC = b"FYA1"
+DEFAULT_ASSETS = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "1.7.12", "assets"))
+
+# Everything hmenu.StatusBar draws
+STATUS_BAR_ICONS = [
+    "wifi0.png", "wifi1.png", "wifi2.png", "wifi3.png", "wifi4.png",
+    "connect1.png", "connect2.png", "connect3.png", "wifilocked.png",
+    "battery1.png", "battery2.png", "battery3.png", "battery4.png",
+    "batterycharge.png", "batcritanim1.png", "batcritanim2.png",
+]
+
+
+def sprite_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def encode_sprite(path, background):
+    width, height, rows = pngio.read_png(path)
+    out = bytearray()
+    for row in rows:
+        for px in row:
+            out += struct.pack(">H", pngio.rgb565(*pngio.blend(px, background)))
+    return width, height, bytes(out)
+
+
+def pack(paths, background=(0, 0, 0)):
+    """Return the atlas file contents for the given PNG paths."""
+    sprites = {}
+    data = bytearray()
+    for path in paths:
+        name = sprite_name(path)
+        if name in sprites:
+            continue
+        width, height, pixels = encode_sprite(path, background)
+        sprites[name] = [len(data), width, height]
+        data += pixels
+    index = json.dumps({"sprites": sprites}, separators=(",", ":")).encode()
+    return ATLAS_MAGIC + struct.pack("<H", len(index)) + index + bytes(data)
+
+
+def parse_color(text):
+    text = text.lstrip("#")
+    if text.lower().startswith("0x"):
+        text = text[2:]
+    value = int(text, 16)
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack PNG icons into a Fyre-OS sprite atlas.")
+    parser.add_argument("images", nargs="*", help="PNG files (default: the status bar icons in --assets)")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS, help="assets folder (default: 1.7.12/assets)")
+    parser.add_argument("--out", help="atlas file (default: <assets>/statusbar.atlas)")
+    parser.add_argument("--background", default="000000", help="colour alpha is flattened onto (default 000000)")
+    args = parser.parse_args(argv)
+
+    paths = args.images or [os.path.join(args.assets, name) for name in STATUS_BAR_ICONS]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print("Missing: " + ", ".join(missing), file=sys.stderr)
+        return 1
+    out = args.out or os.path.join(args.assets, "statusbar.atlas")
+    blob = pack(paths, parse_color(args.background))
+    with open(out, "wb") as f:
+        f.write(blob)
+    source_bytes = sum(os.path.getsize(p) for p in paths)
+    print("{}: {} sprites, {} bytes (PNG sources: {} files, {} bytes)".format(
+        out, len(set(sprite_name(p) for p in paths)), len(blob), len(paths), source_bytes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
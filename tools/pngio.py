@@ -0,0 +1,128 @@
+# Minimal PNG reader/writer for the host tools (stdlib only, no Pillow).
+# Reads non-interlaced 8-bit grey, grey+alpha, RGB, RGBA and palette
+# images; writes 8-bit RGB. Pixels are lists of rows of (r, g, b, a).
+
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    if pb <= pc:
+        return b
+    return c
+
+
+def _unfilter(raw, width, height, bpp):
+    stride = width * bpp
+    rows = []
+    prev = bytearray(stride)
+    pos = 0
+    for _ in range(height):
+        ftype = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        for i in range(stride):
+            left = line[i - bpp] if i >= bpp else 0
+            up = prev[i]
+            if ftype == 1:
+                line[i] = (line[i] + left) & 0xFF
+            elif ftype == 2:
+                line[i] = (line[i] + up) & 0xFF
+            elif ftype == 3:
+                line[i] = (line[i] + ((left + up) >> 1)) & 0xFF
+            elif ftype == 4:
+                upleft = prev[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + _paeth(left, up, upleft)) & 0xFF
+        rows.append(line)
+        prev = line
+    return rows
+
+
+def read_png(path):
+    """Return (width, height, rows) with rows[y][x] = (r, g, b, a)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("{} is not a PNG".format(path))
+    idat = []
+    palette = []
+    trns = b""
+    for kind, body in _chunks(data):
+        if kind == b"IHDR":
+            width, height, depth, ctype, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = [tuple(body[i:i + 3]) for i in range(0, len(body), 3)]
+        elif kind == b"tRNS":
+            trns = body
+        elif kind == b"IDAT":
+            idat.append(body)
+    if depth != 8 or interlace:
+        raise ValueError("{}: only 8-bit non-interlaced PNGs are supported".format(path))
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[ctype]
+    rows = _unfilter(zlib.decompress(b"".join(idat)), width, height, channels)
+    pixels = []
+    for line in rows:
+        out = []
+        for x in range(width):
+            px = line[x * channels:(x + 1) * channels]
+            if ctype == 0:
+                out.append((px[0], px[0], px[0], 255))
+            elif ctype == 2:
+                out.append((px[0], px[1], px[2], 255))
+            elif ctype == 3:
+                r, g, b = palette[px[0]]
+                a = trns[px[0]] if px[0] < len(trns) else 255
+                out.append((r, g, b, a))
+            elif ctype == 4:
+                out.append((px[0], px[0], px[0], px[1]))
+            else:
+                out.append((px[0], px[1], px[2], px[3]))
+        pixels.append(out)
+    return width, height, pixels
+
+
+def write_png(path, width, height, rows):
+    """Write rows[y][x] = (r, g, b[, a]) as an 8-bit RGB PNG."""
+    raw = bytearray()
+    for row in rows:
+        raw.append(0)
+        for px in row:
+            raw.extend(px[:3])
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(bytes(raw), 9)))
+        f.write(chunk(b"IEND", b""))
+
+
+def rgb565(r, g, b):
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+
+def blend(px, background):
+    """Composite an (r, g, b, a) pixel over an (r, g, b) background."""
+    r, g, b, a = px
+    br, bg, bb = background
+    return (
+        (r * a + br * (255 - a)) // 255,
+        (g * a + bg * (255 - a)) // 255,
+        (b * a + bb * (255 - a)) // 255,
+    )
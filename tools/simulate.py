@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Fyre-OS headless simulator (runs on a PC, not on the device)
+#
+# Boots the OS, the launcher or a single app from a local copy of the SD
+# card with simulated hardware, and reports what it did:
+#   python3 tools/simulate.py --until 20000 --frames out/ --every 1000
+#   python3 tools/simulate.py --trace session.json --report run.json hmenu.py
+#   python3 tools/simulate.py --trace keys.json "apps/Python.py"
+#
+# See tools/m5sim/inputs.py for the trace format. Time is virtual: a
+# 60 s session takes as long as the host needs to run the code, and two
+# runs with the same trace produce the same frames and counts.
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from m5sim import Simulator  # noqa: E402
+
+DEFAULT_SD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "1.7.12")
+
+
+# ------------------------------
+# REPORT
+# ------------------------------
+def print_summary(report):
+    c = report["counters"]
+    print("{}: {} after {} ms simulated ({} s on this host)".format(
+        report["script"], report["outcome"], report["sim_ms"], report["host_s"]))
+    if report["error"]:
+        print("  error:", report["error"])
+    print("  display: {} panel pixels, {} sprite pushes, {} clears".format(
+        c.get("panel.pixels", 0), c.get("panel.push", 0), c.get("panel.clear", 0)))
+    print("  sd: {} opens, {} listdirs, {} stats, {} B read, {} B written".format(
+        c.get("sd.open", 0), c.get("sd.listdir", 0), c.get("sd.stat", 0),
+        c.get("sd.read_bytes", 0), c.get("sd.write_bytes", 0)))
+    print("  clock: {} sleeps, {} timer/input callbacks, {} inputs applied".format(
+        report["sleeps"], report["callbacks"], report["inputs_applied"]))
+    if report["sounds"]:
+        print("  sounds:", len(report["sounds"]))
+    for entry in report["sd_files"][:8]:
+        print("    {:>6} B read {:>6} B written {:>3} opens  {}".format(
+            entry["read"], entry["written"], entry["opens"], entry["path"]))
+    if report["frames"]:
+        print("  frames: {} saved".format(len(report["frames"])))
+
+
+# ------------------------------
+# MAIN
+# ------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Run Fyre-OS code on a simulated Cardputer.")
+    parser.add_argument("script", nargs="?", default="main.py",
+                        help="path on the SD card to run (default main.py)")
+    parser.add_argument("--sd", default=DEFAULT_SD, help="local folder used as /sd")
+    parser.add_argument("--trace", help="scripted input events (JSON)")
+    parser.add_argument("--until", type=int, default=30000, help="simulated ms to run (default 30000)")
+    parser.add_argument("--frames", help="folder for PNG screenshots")
+    parser.add_argument("--every", type=int, help="also save a frame every N simulated ms")
+    parser.add_argument("--report", help="write the full report as JSON")
+    parser.add_argument("--no-psram", action="store_true", help="fail large canvas allocations")
+    parser.add_argument("--in-place", action="store_true",
+                        help="let the run write to the SD folder (default: a scratch copy)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.sd):
+        parser.error("no such SD folder: " + args.sd)
+    if args.every and not args.frames:
+        parser.error("--every needs --frames")
+
+    sd = args.sd
+    if not args.in_place:
+        # Settings, caches and logs written during the run go to a copy
+        scratch = tempfile.mkdtemp(prefix="m5sim-")
+        sd = os.path.join(scratch, "sd")
+        shutil.copytree(args.sd, sd, ignore=shutil.ignore_patterns("*.pyc"))
+    sim = Simulator(sd, trace=args.trace, until=args.until, frames_dir=args.frames,
+                    every_ms=args.every, no_psram=args.no_psram)
+    try:
+        report = sim.run(args.script)
+    finally:
+        if not args.in_place:
+            shutil.rmtree(scratch, ignore_errors=True)
+    print_summary(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["outcome"] == "crashed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
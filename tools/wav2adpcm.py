@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# Fyre-OS sound converter (runs on a PC, not on the device)
+#
+# Writes an IMA-ADPCM copy (a WAV with format tag 0x11, a quarter of the
+# size of 16-bit PCM) next to each WAV asset, for adpcm.py / audiosvc.py:
+#   python3 tools/wav2adpcm.py                      # every WAV in 1.7.12/assets
+#   python3 tools/wav2adpcm.py a.wav -o out/
+#   assets/startup.wav -> assets/startup.adp
+# The .wav stays as it is: firmware that can only play files by name
+# (Speaker.playWAV) keeps using it, audiosvc streams the .adp when there
+# is one. Copies whose SNR would fall below --min-snr are not written.
+# Accepts 8/16-bit PCM and 32-bit float WAVs; --mono and --rate are there
+# for new sounds that don't need the full format.
+
+import argparse
+import array
+import math
+import os
+import struct
+import sys
+
+DEFAULT_ASSETS = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "1.7.12", "assets"))
+
+# The device decoder is the reference: share its tables and check with it
+sys.path.insert(0, os.path.normpath(os.path.join(DEFAULT_ASSETS, "..")))
+import adpcm  # noqa: E402
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_FLOAT = 3
+ADPCM_EXT = adpcm.ADPCM_EXT
+
+
+def read_wav(path):
+    """Return (rate, channels, samples) with samples as a list of int16 per channel."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a WAV file")
+    fmt = None
+    pcm = None
+    pos = 12
+    while pos + 8 <= len(data):
+        kind, size = struct.unpack("<4sI", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + size]
+        if kind == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", body[:16])
+        elif kind == b"data":
+            pcm = body
+        pos += 8 + size + (size & 1)
+    if fmt is None or pcm is None:
+        raise ValueError("missing fmt or data chunk")
+    tag, channels, rate, _, _, bits = fmt
+    if tag == adpcm.WAVE_FORMAT_IMA_ADPCM:
+        raise ValueError("already IMA-ADPCM")
+    if tag == WAVE_FORMAT_PCM and bits == 16:
+        values = array.array("h", pcm[:len(pcm) // 2 * 2])
+    elif tag == WAVE_FORMAT_PCM and bits == 8:
+        values = [(b - 128) << 8 for b in pcm]
+    elif tag == WAVE_FORMAT_FLOAT and bits == 32:
+        floats = array.array("f", pcm[:len(pcm) // 4 * 4])
+        values = [max(-32768, min(32767, int(round(v * 32767)))) for v in floats]
+    else:
+        raise ValueError("unsupported format {} / {} bits".format(tag, bits))
+    if sys.byteorder != "little" and isinstance(values, array.array):
+        values.byteswap()
+    return rate, channels, [list(values[c::channels]) for c in range(channels)]
+
+
+def to_mono(channels):
+    if len(channels) == 1:
+        return channels
+    return [[sum(frame) // len(frame) for frame in zip(*channels)]]
+
+
+def resample(samples, rate, target):
+    """Integer-factor decimation with a box filter (44100 -> 22050, ...)."""
+    if target >= rate:
+        return samples
+    if rate % target:
+        raise ValueError("--rate must divide {}".format(rate))
+    factor = rate // target
+    return [sum(samples[i:i + factor]) // len(samples[i:i + factor])
+            for i in range(0, len(samples), factor)]
+
+
+def _encode_sample(sample, pred, index):
+    step = adpcm.STEPS[index]
+    diff = sample - pred
+    nib = 0
+    if diff < 0:
+        nib = 8
+        diff = -diff
+    if diff >= step:
+        nib |= 4
+        diff -= step
+    if diff >= step >> 1:
+        nib |= 2
+        diff -= step >> 1
+    if diff >= step >> 2:
+        nib |= 1
+    # Track the predictor exactly as the decoder will
+    delta = step >> 3
+    if nib & 4:
+        delta += step
+    if nib & 2:
+        delta += step >> 1
+    if nib & 1:
+        delta += step >> 2
+    pred = pred - delta if nib & 8 else pred + delta
+    pred = max(-32768, min(32767, pred))
+    index = max(0, min(88, index + adpcm.ADJUST[nib] - 1))
+    return nib, pred, index
+
+
+def encode(channels, block_align):
+    """IMA-ADPCM data chunk for equally long int16 channels."""
+    count = len(channels)
+    per_block = adpcm.samples_per_block(block_align, count)
+    total = len(channels[0])
+    indexes = [0] * count
+    out = bytearray()
+    for start in range(0, total, per_block):
+        header = bytearray()
+        words = []
+        for c, samples in enumerate(channels):
+            block = samples[start:start + per_block]
+            pred = block[0]
+            index = indexes[c]
+            header += struct.pack("<hBB", pred, index, 0)
+            body = block[1:]
+            body += [body[-1] if body else pred] * ((-len(body)) % 8)
+            nibbles = []
+            for sample in body:
+                nib, pred, index = _encode_sample(sample, pred, index)
+                nibbles.append(nib)
+            indexes[c] = index
+            words.append(bytes(nibbles[i] | (nibbles[i + 1] << 4) for i in range(0, len(nibbles), 2)))
+        out += header
+        # Channels interleave in 4-byte (8 sample) groups
+        for g in range(0, len(words[0]), 4):
+            for c in range(count):
+                out += words[c][g:g + 4]
+    return bytes(out)
+
+
+def wav_bytes(data, rate, channels, block_align, frames):
+    per_block = adpcm.samples_per_block(block_align, channels)
+    byte_rate = rate * block_align // per_block
+    fmt = struct.pack("<HHIIHHHH", adpcm.WAVE_FORMAT_IMA_ADPCM, channels, rate, byte_rate,
+                      block_align, 4, 2, per_block)
+    chunks = (b"fmt " + struct.pack("<I", len(fmt)) + fmt
+              + b"fact" + struct.pack("<II", 4, frames)
+              + b"data" + struct.pack("<I", len(data)) + data + (b"\0" if len(data) & 1 else b""))
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def snr_db(channels, data, block_align):
+    decoded = array.array("h", adpcm.decode(data, block_align, len(channels)))
+    signal = noise = 0
+    for c, samples in enumerate(channels):
+        for a, b in zip(samples, decoded[c::len(channels)]):
+            signal += a * a
+            noise += (a - b) * (a - b)
+    if not noise:
+        return float("inf")
+    return 10 * math.log10(max(signal, 1) / noise)
+
+
+def adpcm_path(path, out_dir=None):
+    base = os.path.splitext(os.path.basename(path))[0] + ADPCM_EXT
+    return os.path.join(out_dir if out_dir else os.path.dirname(path), base)
+
+
+def convert(path, out_path, mono=False, rate=None, block=1024, check=True, min_snr=None):
+    """Returns (bytes, SNR); bytes is None when the copy was too lossy to write."""
+    src_rate, _, channels = read_wav(path)
+    if mono:
+        channels = to_mono(channels)
+    out_rate = src_rate
+    if rate and rate < src_rate:
+        channels = [resample(s, src_rate, rate) for s in channels]
+        out_rate = rate
+    block_align = block * len(channels)
+    data = encode(channels, block_align)
+    blob = wav_bytes(data, out_rate, len(channels), block_align, len(channels[0]))
+    quality = snr_db(channels, data, block_align) if check else None
+    if quality is not None and min_snr is not None and quality < min_snr:
+        return None, quality
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, out_path)
+    return len(blob), quality
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert WAV sounds to IMA-ADPCM for Fyre-OS.")
+    parser.add_argument("wavs", nargs="*", help="WAV files (default: every .wav in --assets)")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS, help="assets folder (default: 1.7.12/assets)")
+    parser.add_argument("-o", "--out", help="output folder (default: next to each WAV)")
+    parser.add_argument("--mono", action="store_true", help="mix down to one channel")
+    parser.add_argument("--rate", type=int, help="downsample to this rate (must divide the source rate)")
+    parser.add_argument("--block", type=int, default=1024, help="ADPCM block bytes per channel (default 1024)")
+    parser.add_argument("--no-check", action="store_true", help="skip the decode/SNR check")
+    parser.add_argument("--min-snr", type=float, default=30.0,
+                        help="don't write copies below this SNR in dB (default 30)")
+    args = parser.parse_args(argv)
+
+    paths = args.wavs or sorted(os.path.join(args.assets, n) for n in os.listdir(args.assets)
+                                if n.lower().endswith(".wav"))
+    failed = 0
+    for path in paths:
+        out_path = adpcm_path(path, args.out)
+        before = os.path.getsize(path)
+        try:
+            size, quality = convert(path, out_path, args.mono, args.rate, args.block,
+                                    not args.no_check, args.min_snr)
+        except ValueError as e:
+            print("{}: skipped ({})".format(path, e))
+            continue
+        except OSError as e:
+            print("{}: failed ({})".format(path, e), file=sys.stderr)
+            failed += 1
+            continue
+        if size is None:
+            print("{}: kept as PCM only (SNR {:.1f} dB < {:.0f})".format(path, quality, args.min_snr))
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            continue
+        note = "" if quality is None else ", SNR {:.1f} dB".format(quality)
+        print("{}: {} -> {} bytes ({:.0f}%){}".format(out_path, before, size, size * 100.0 / before, note))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())